@@ -0,0 +1,423 @@
+"""
+bench_hotpaths.py
+---------------------------------
+Micro-benchmarks for the analysis hot paths (Phase 5.6)
+
+Purpose:
+- Time + peak memory of each hot path at 1k / 10k / 100k / 1M bars
+- Synthetic OHLCV (deterministic random walk, src/synthetic.py) or
+  recorded MT5 OHLCV
+- Compare against baselines stored in benchmarks/baselines.json and
+  exit non-zero when a hot path regresses beyond the threshold
+
+Usage:
+    python -m benchmarks.bench_hotpaths                    # compare
+    python -m benchmarks.bench_hotpaths --update-baseline  # record
+    python -m benchmarks.bench_hotpaths --source recorded --data-dir benchmarks/data
+    python -m benchmarks.bench_hotpaths --record EURUSD 30m --days 3650
+    python -m benchmarks.bench_hotpaths --parity            # kernels + indicator backends
+
+Recorded data:
+- CSV files <SYMBOL>_<TF>.csv with columns time,open,high,low,close,tick_volume
+  (time = unix seconds, the raw copy_rates_range layout)
+"""
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import aoi, aoi_score, ema, ema_score, indicators, kernels, structure
+from src.analysis.confluence import run_analysis
+from src.synthetic import kernel_inputs, synthetic_rates, to_ohlcv
+
+# =========================
+# CONFIG
+# =========================
+
+BENCH_DIR = Path(__file__).resolve().parent
+BASELINE_FILE = BENCH_DIR / "baselines.json"
+DATA_DIR = BENCH_DIR / "data"
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+REPEATS = 3
+THRESHOLD = 0.25  # 25% slower than baseline = regression
+
+# Absolute noise floor: differences below these never count as regressions
+NOISE_FLOOR = {"seconds": 0.001, "peak_mb": 0.25}
+
+# =========================
+# DATA
+# =========================
+
+def recorded_rates(data_dir: Path, n_bars: int) -> Optional[pd.DataFrame]:
+    """
+    Last n_bars of the first recorded CSV that is long enough, else None.
+    """
+    for path in sorted(data_dir.glob("*.csv")):
+        df = pd.read_csv(path)
+        if len(df) < n_bars:
+            continue
+        df["time"] = pd.to_datetime(df["time"], unit="s").dt.tz_localize("UTC")
+        return df.set_index("time").iloc[-n_bars:]
+    return None
+
+
+# =========================
+# CASES
+# =========================
+
+def _standardize_case(raw: pd.DataFrame, df: pd.DataFrame) -> Callable:
+    from src.data_engine import standardize_dataframe
+    return lambda: standardize_dataframe(raw)
+
+
+def _swings_case(raw, df):
+    return lambda: structure.detect_swings(df)
+
+
+def _classify_case(raw, df):
+    swings = structure.detect_swings(df)
+    return lambda: structure.classify_structure_from_swings(swings)
+
+
+def _htf_aoi_case(raw, df):
+    return lambda: aoi.detect_htf_aoi(df, "4H")
+
+
+def _ltf_aoi_case(raw, df):
+    # Last few HTF zones only: the LTF scan is zones x bars
+    htf = aoi.detect_htf_aoi(df, "4H")[-10:]
+    return lambda: aoi.detect_ltf_aoi(df, "30m", htf)
+
+
+def _analyze_ema_case(raw, df):
+    return lambda: ema.analyze_ema(df, "4H")
+
+
+def _score_aoi_case(raw, df):
+    zones = aoi.detect_htf_aoi(df, "4H")
+    bias = aoi_score.StructureBias.BULLISH
+    return lambda: [aoi_score.score_aoi(z, bias) for z in zones]
+
+
+def _score_ema_case(raw, df):
+    # Scoring is O(1) per state: score one state per 100 bars
+    state = ema.analyze_ema(df, "4H")
+    calls = max(1, len(df) // 100)
+    bias = ema_score.MarketBias.BULLISH
+    return lambda: [ema_score.score_ema(state, bias) for _ in range(calls)]
+
+
+def _run_analysis_case(raw, df):
+    return lambda: run_analysis(df, "4H")
+
+
+def _kernel_case(name: str) -> Callable:
+    def setup(raw, df):
+        args = kernel_inputs(df)[name]
+        return lambda: kernels.KERNELS[name](*args)
+    return setup
+
+
+def _indicators_case(backend: str) -> Callable:
+    def setup(raw, df):
+        if backend == "talib" and indicators.talib is None:
+            raise ImportError("TA-Lib not installed")
+        def run():
+            indicators.ema(df["close"], 50, backend=backend)
+            indicators.atr(df["high"], df["low"], df["close"], 14, backend=backend)
+            indicators.rolling_mean(df["volume"], 20, backend=backend)
+        return run
+    return setup
+
+
+# name -> (setup, max_bars)
+CASES: Dict[str, tuple] = {
+    "standardize_dataframe": (_standardize_case, None),
+    "detect_swings": (_swings_case, None),
+    "classify_structure_from_swings": (_classify_case, None),
+    "detect_htf_aoi": (_htf_aoi_case, None),
+    "detect_ltf_aoi": (_ltf_aoi_case, 100_000),
+    "analyze_ema": (_analyze_ema_case, None),
+    "score_aoi": (_score_aoi_case, None),
+    "score_ema": (_score_ema_case, None),
+    "run_analysis": (_run_analysis_case, None),
+    "kernel_zigzag": (_kernel_case("zigzag"), None),
+    "kernel_zone_touches": (_kernel_case("zone_touches"), 100_000),
+    "kernel_resolve_trades": (_kernel_case("resolve_trades"), None),
+    "indicators_pandas": (_indicators_case("pandas"), None),
+    "indicators_numpy": (_indicators_case("numpy"), None),
+    "indicators_talib": (_indicators_case("talib"), None),
+}
+
+# =========================
+# MEASUREMENT
+# =========================
+
+def measure(fn: Callable, repeats: int = REPEATS) -> Dict:
+    """
+    Best-of-N wall time, then one separate tracemalloc run for peak memory
+    (tracing slows allocation-heavy code, so it is not timed).
+    """
+    fn()  # warm-up (imports, caches)
+
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": best, "peak_mb": peak / 2**20}
+
+
+def run_benchmarks(
+    sizes: List[int],
+    cases: List[str],
+    source: str = "synthetic",
+    data_dir: Path = DATA_DIR,
+    repeats: int = REPEATS
+) -> Dict[str, Dict]:
+    results = {}
+
+    for n_bars in sizes:
+        raw = synthetic_rates(n_bars) if source == "synthetic" else recorded_rates(data_dir, n_bars)
+        if raw is None:
+            print(f"[SKIP] no recorded data with {n_bars} bars in {data_dir}")
+            continue
+        df = to_ohlcv(raw)
+
+        for name in cases:
+            setup, max_bars = CASES[name]
+            if max_bars and n_bars > max_bars:
+                continue
+
+            key = f"{source}:{name}:{n_bars}"
+            try:
+                results[key] = measure(setup(raw, df), repeats)
+            except ImportError as e:
+                print(f"[SKIP] {key} – {e}")
+                continue
+
+            r = results[key]
+            print(f"{key:<52} {r['seconds'] * 1e3:>11.3f} ms {r['peak_mb']:>9.2f} MB")
+
+    return results
+
+# =========================
+# BASELINES
+# =========================
+
+def load_baselines(path: Path = BASELINE_FILE) -> Dict:
+    if not path.exists():
+        return {"threshold": THRESHOLD, "results": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(results: Dict, path: Path = BASELINE_FILE, threshold: float = THRESHOLD):
+    baselines = load_baselines(path)
+    baselines["threshold"] = threshold
+    baselines["results"].update({
+        key: {"seconds": round(r["seconds"], 6), "peak_mb": round(r["peak_mb"], 3)}
+        for key, r in results.items()
+    })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict, baselines: Dict, threshold: Optional[float] = None) -> List[str]:
+    """
+    Return regression messages (empty = pass).
+    Time AND peak memory are both checked against the same threshold.
+    """
+    threshold = baselines.get("threshold", THRESHOLD) if threshold is None else threshold
+    regressions = []
+
+    for key, r in results.items():
+        base = baselines["results"].get(key)
+        if base is None:
+            print(f"[NEW] {key} has no baseline")
+            continue
+
+        for metric in ("seconds", "peak_mb"):
+            if r[metric] - base[metric] <= NOISE_FLOOR[metric]:
+                continue
+            ratio = r[metric] / base[metric]
+            if ratio > 1 + threshold:
+                regressions.append(
+                    f"{key} {metric}: {r[metric]:.4g} vs baseline {base[metric]:.4g} "
+                    f"(+{(ratio - 1) * 100:.0f}%)"
+                )
+
+    return regressions
+
+# =========================
+# KERNEL PARITY
+# =========================
+
+def check_kernel_parity(sizes: List[int], seeds: int = 3) -> List[str]:
+    """
+    Compiled kernels vs their pure-Python versions on synthetic frames.
+    Returns mismatch messages (empty = identical).
+    """
+    print(f"kernels backend: {kernels.BACKEND}")
+    mismatches = []
+
+    for n_bars in sizes:
+        for seed in range(seeds):
+            df = to_ohlcv(synthetic_rates(n_bars, seed=seed))
+            for name, args in kernel_inputs(df, seed).items():
+                fast = kernels.KERNELS[name](*args)
+                slow = kernels.PY_KERNELS[name](*args)
+                fast = fast if isinstance(fast, tuple) else (fast,)
+                slow = slow if isinstance(slow, tuple) else (slow,)
+                if not all(np.array_equal(a, b) for a, b in zip(fast, slow)):
+                    mismatches.append(f"{name} n={n_bars} seed={seed}")
+
+    return mismatches
+
+
+# Bars skipped before comparing TA-Lib (SMA-seeded) with the pandas
+# reference: seed differences decay below the tolerance by then
+TALIB_WARMUP = 400
+INDICATOR_RTOL = 1e-9
+
+
+def check_indicator_parity(sizes: List[int]) -> List[str]:
+    """
+    numpy / talib indicator backends vs the pandas reference.
+    numpy must match everywhere (ATR within float tolerance: cumulative
+    vs online window sums); talib only after TALIB_WARMUP bars, except
+    the SMA ATR which differs only on its first valid bar.
+    """
+    mismatches = []
+    backends = [b for b in indicators.BACKENDS if b != "pandas"]
+    if indicators.talib is None:
+        backends.remove("talib")
+        print("[SKIP] talib parity – TA-Lib not installed")
+
+    for n_bars in sizes:
+        df = to_ohlcv(synthetic_rates(n_bars))
+        h, l, c, v = df["high"], df["low"], df["close"], df["volume"].astype(float)
+        reference = {
+            "ema": indicators.ema(c, 50, backend="pandas"),
+            "atr_sma": indicators.atr(h, l, c, 14, backend="pandas"),
+            "atr_wilder": indicators.atr(h, l, c, 14, "wilder", backend="pandas"),
+            "rolling_mean": indicators.rolling_mean(v, 20, backend="pandas"),
+        }
+        for backend in backends:
+            values = {
+                "ema": indicators.ema(c, 50, backend=backend),
+                "atr_sma": indicators.atr(h, l, c, 14, backend=backend),
+                "atr_wilder": indicators.atr(h, l, c, 14, "wilder", backend=backend),
+                "rolling_mean": indicators.rolling_mean(v, 20, backend=backend),
+            }
+            for name, ref in reference.items():
+                got = values[name].to_numpy()
+                ref = ref.to_numpy()
+                if backend == "talib":
+                    skip = 15 if name == "atr_sma" else (
+                        TALIB_WARMUP if name in ("ema", "atr_wilder") else 0
+                    )
+                    got, ref = got[skip:], ref[skip:]
+                if not np.allclose(got, ref, rtol=INDICATOR_RTOL, atol=0, equal_nan=True):
+                    mismatches.append(f"{backend}:{name} n={n_bars}")
+
+    return mismatches
+
+# =========================
+# RECORDING
+# =========================
+
+def record_rates(symbol: str, tf_label: str, days_back: int, data_dir: Path = DATA_DIR):
+    """Dump raw MT5 rates to benchmarks/data/<SYMBOL>_<TF>.csv."""
+    from datetime import datetime, timedelta
+
+    import pytz
+
+    from src.data_engine import TIMEFRAMES, connect_mt5, fetch_rates, shutdown_mt5
+
+    to_date = datetime.utcnow().replace(tzinfo=pytz.UTC)
+    from_date = to_date - timedelta(days=days_back)
+
+    connect_mt5()
+    try:
+        df = fetch_rates(symbol, TIMEFRAMES[tf_label], from_date, to_date)
+    finally:
+        shutdown_mt5()
+
+    df = df.reset_index()
+    df["time"] = df["time"].dt.as_unit("s").astype("int64")
+    data_dir.mkdir(parents=True, exist_ok=True)
+    path = data_dir / f"{symbol}_{tf_label}.csv"
+    df.to_csv(path, index=False)
+    print(f"💾 {len(df)} bars -> {path}")
+
+# =========================
+# CLI
+# =========================
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analysis hot-path benchmarks")
+    parser.add_argument("--sizes", nargs="*", type=int, default=SIZES)
+    parser.add_argument("--cases", nargs="*", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--source", choices=["synthetic", "recorded"], default="synthetic")
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--threshold", type=float)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--record", nargs=2, metavar=("SYMBOL", "TF"))
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--parity", action="store_true", help="check compiled kernels / indicator backends against the reference")
+    args = parser.parse_args(argv)
+
+    if args.parity:
+        sizes = [n for n in args.sizes if n <= 100_000]
+        mismatches = check_kernel_parity(sizes) + check_indicator_parity(sizes)
+        for message in mismatches:
+            print(f"[MISMATCH] {message}")
+        print("✅ parity ok" if not mismatches else f"{len(mismatches)} mismatches")
+        return 1 if mismatches else 0
+
+    if args.record:
+        record_rates(args.record[0], args.record[1], args.days, args.data_dir)
+        return 0
+
+    results = run_benchmarks(
+        args.sizes, args.cases, args.source, args.data_dir, args.repeats
+    )
+
+    if args.update_baseline:
+        threshold = THRESHOLD if args.threshold is None else args.threshold
+        save_baselines(results, args.baseline, threshold)
+        print(f"📌 Baselines updated -> {args.baseline}")
+        return 0
+
+    regressions = compare(results, load_baselines(args.baseline), args.threshold)
+    for message in regressions:
+        print(f"[REGRESSION] {message}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
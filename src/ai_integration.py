@@ -1,14 +1,72 @@
+import json
+from typing import Dict, Optional
+
 import openai
 
-def get_ai_opinion(prompt, model="gpt-3.5-turbo", api_key=None):
+def get_ai_opinion(prompt, model="gpt-3.5-turbo", api_key=None, base_url=None):
     """
     Query OpenAI GPT for trading signal confirmation or pattern opinion.
+    Uses a per-call client: no global openai.api_key is set.
+    For cached / rate-limited calls use ai_service.AIOpinionService.
     """
-    openai.api_key = api_key
-    response = openai.ChatCompletion.create(
-        model=model,
-        messages=[{"role": "user", "content": prompt}]
-    )
-    return response['choices'][0]['message']['content']
+    with openai.OpenAI(api_key=api_key, base_url=base_url) as client:
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+    return response.choices[0].message.content
+
+
+async def get_ai_opinion_async(
+    prompt: str,
+    model: str = "gpt-3.5-turbo",
+    client: Optional[openai.AsyncOpenAI] = None,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: float = 30.0
+) -> str:
+    """
+    Non-blocking variant of get_ai_opinion().
+
+    Pass a shared `client` to reuse its connection pool; otherwise a
+    one-off client is built from api_key / base_url (base_url points the
+    call at any OpenAI-compatible endpoint, e.g. a local stub server).
+    """
+    own_client = client is None
+    if own_client:
+        client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
 
+    try:
+        response = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        return response.choices[0].message.content
+    finally:
+        if own_client:
+            await client.close()
 
+
+def build_ai_prompt(symbol: str, analysis: Dict[str, Optional[Dict]]) -> str:
+    """
+    Condensed MTF summary for AI validation (Task 3.2 / 3.3).
+
+    analysis: {timeframe: confluence.run_analysis() output or None}
+    """
+    summary = {
+        label: {
+            "bias": result["structure"]["bias"],
+            "bos": bool(result["structure"]["bos"]),
+            "ema": result["ema"],
+            "score": int(result["confluence"]["score_total"]),
+        }
+        for label, result in analysis.items()
+        if result
+    }
+
+    return (
+        f"You are a discretionary forex trader reviewing a trade checklist for {symbol}.\n"
+        f"Multi-timeframe analysis (JSON): {json.dumps(summary, separators=(',', ':'))}\n"
+        "Reply with: bias (bullish/bearish/neutral), confidence (0-100), "
+        "and one sentence of reasoning."
+    )
@@ -0,0 +1,321 @@
+"""
+ai_service.py
+---------------------------------
+AI Validation Service (Phase 3.8 – Rate limit & cost control)
+
+Purpose:
+- Content-hash prompt cache (TTL + size bound, persisted to a local file)
+- Request coalescing: identical in-flight prompts share ONE request
+- Token-bucket rate limiter + bounded concurrency
+- Concurrent batch submission across symbols
+- Cache hit rate / latency exported through src.metrics
+
+An unchanged setup asked about twice costs one LLM round trip.
+
+Usage:
+    service = AIOpinionService(api_key=..., cache_path="ai_cache.json")
+    opinions = await service.submit_batch({"EURUSD": prompt_a, "GBPUSD": prompt_b})
+    await service.close()
+
+`base_url` points the service at any OpenAI-compatible endpoint
+(e.g. a local stand-in server for tests).
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import openai
+
+from src import metrics
+from src.ai_integration import get_ai_opinion_async
+
+# =========================
+# CONFIG
+# =========================
+
+CACHE_TTL = 6 * 3600          # seconds
+CACHE_MAX_ENTRIES = 2_000
+RATE_PER_SECOND = 1.0         # sustained requests / second
+RATE_BURST = 5                # bucket capacity
+CONCURRENCY = 4
+TIMEOUT = 30.0
+
+# =========================
+# PROMPT CACHE
+# =========================
+
+def prompt_key(model: str, prompt: str) -> str:
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """
+    LRU + TTL cache of {prompt hash: (created_at, response)}.
+    Persisted as JSON (atomic replace) when `path` is given.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = CACHE_TTL,
+        max_entries: int = CACHE_MAX_ENTRIES
+    ):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        created_at, response = entry
+        if time.time() - created_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: str):
+        self._entries[key] = (time.time(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(list(self._entries.items()), f)
+        os.replace(tmp, self.path)
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                items = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[WARN] AI cache {self.path} unreadable – {e}")
+            return
+
+        now = time.time()
+        for key, (created_at, response) in items:
+            if now - created_at <= self.ttl:
+                self._entries[key] = (created_at, response)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+# =========================
+# RATE LIMITER
+# =========================
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens / second, up to `capacity` banked.
+    Usable from successive event loops (one asyncio.run() per scan):
+    the FIFO lock is rebuilt for each loop.
+    """
+
+    def __init__(self, rate: float = RATE_PER_SECOND, capacity: float = RATE_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _loop_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        # Lock keeps waiters FIFO: nobody jumps the queue while another sleeps
+        async with self._loop_lock():
+            self._refill()
+            if self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+# =========================
+# SERVICE
+# =========================
+
+class AIOpinionService:
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        api_key: Optional[str] = None,
+        base_url: Optional[str] = None,
+        timeout: float = TIMEOUT,
+        cache_path: Optional[str] = None,
+        cache_ttl: float = CACHE_TTL,
+        cache_max_entries: int = CACHE_MAX_ENTRIES,
+        rate_per_second: float = RATE_PER_SECOND,
+        burst: float = RATE_BURST,
+        concurrency: int = CONCURRENCY
+    ):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.cache = PromptCache(cache_path, cache_ttl, cache_max_entries)
+        self.limiter = TokenBucket(rate_per_second, burst)
+
+        # Loop-bound state, rebuilt when the service is used from a new
+        # event loop (see _bind_loop)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._client: Optional[openai.AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._stats = {
+            "hits": 0, "misses": 0, "coalesced": 0, "errors": 0,
+            "latency_sum": 0.0, "completed": 0,
+        }
+
+    async def close(self):
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._client = None
+        self._loop = None  # next opinion() rebuilds the client
+
+    def _bind_loop(self):
+        """
+        The HTTP client, semaphore and in-flight futures belong to the
+        loop that created them. A shared service reused by a later
+        asyncio.run() (run_scan) starts them afresh on the new loop; the
+        old client's pool died with its loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        self._client = openai.AsyncOpenAI(
+            api_key=self.api_key, base_url=self.base_url, timeout=self.timeout
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._inflight = {}
+
+    # -------------------------
+    # Single prompt
+    # -------------------------
+
+    async def opinion(self, prompt: str) -> str:
+        self._bind_loop()
+        key = prompt_key(self.model, prompt)
+
+        while True:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("hits", "hit")
+                return cached
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+
+            self._count("coalesced", "coalesced")
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not this waiter: take over
+                if inflight.cancelled() and not asyncio.current_task().cancelling():
+                    continue
+                raise
+
+        self._count("misses", "miss")
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._request(prompt)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved: no waiter is not an error
+            raise
+        else:
+            self.cache.put(key, response)
+            future.set_result(response)
+            return response
+        finally:
+            del self._inflight[key]
+
+    async def _request(self, prompt: str) -> str:
+        await self.limiter.acquire()
+        async with self._semaphore:
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(
+                    get_ai_opinion_async(prompt, model=self.model, client=self._client),
+                    self.timeout
+                )
+            except Exception:
+                self._count("errors", "error")
+                raise
+            finally:
+                latency = time.perf_counter() - start
+                self._stats["latency_sum"] += latency
+                self._stats["completed"] += 1
+                metrics.registry.observe("trading_ai_latency_seconds", latency, model=self.model)
+
+    # -------------------------
+    # Batch
+    # -------------------------
+
+    async def submit_batch(self, prompts: Dict[str, str]) -> Dict[str, object]:
+        """
+        {symbol: prompt} -> {symbol: opinion | Exception}, all concurrently.
+        """
+        symbols = list(prompts)
+        answers = await asyncio.gather(
+            *(self.opinion(prompts[symbol]) for symbol in symbols),
+            return_exceptions=True
+        )
+        return dict(zip(symbols, answers))
+
+    # -------------------------
+    # Stats
+    # -------------------------
+
+    def _count(self, stat: str, result: str):
+        self._stats[stat] += 1
+        metrics.registry.inc("trading_ai_requests_total", result=result)
+
+    def stats(self) -> Dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        completed = self._stats["completed"]  # misses still in flight have no latency yet
+        return {
+            "hits": self._stats["hits"],
+            "misses": self._stats["misses"],
+            "coalesced": self._stats["coalesced"],
+            "errors": self._stats["errors"],
+            "hit_rate": (self._stats["hits"] + self._stats["coalesced"]) / lookups if lookups else 0.0,
+            "avg_latency": self._stats["latency_sum"] / completed if completed else 0.0,
+            "cache_entries": len(self.cache),
+        }
@@ -0,0 +1,202 @@
+"""
+alignment.py
+---------------------------------
+LTF -> HTF Bar Alignment
+
+Purpose:
+- Map every lower-timeframe bar to the last FULLY CLOSED higher-
+  timeframe bar with one np.searchsorted over int64 close times
+  (built once per symbol / timeframe pair, O(n log m))
+- Per-bar HTF state that only uses information available when each HTF
+  bar closed: structure bias, EMA / ATR, price inside an HTF AOI
+- Broadcast that state onto LTF arrays without lookahead:
+  an LTF bar closing at 10:30 sees the 4H bar that closed at 08:00,
+  never the 08:00-12:00 bar still forming
+
+Bar times are open times (MT5 convention); a bar closes at
+open + its duration (data_engine.TIMEFRAME_SECONDS). Durations are
+inferred from the index when not given.
+
+Usage:
+    state = htf_state(df_4h)
+    per_bar = align_htf_state(df_30m, state, ltf_seconds=1800, htf_seconds=14400)
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .aoi import HTF_IMPULSE_FACTOR, impulse_origin_masks
+from .ema import calculate_atr, calculate_ema
+from .structure import StructureBias, classify_structure_from_swings, detect_swing_candidates
+
+# Index = code returned by structure_bias_codes()
+STRUCTURE_CODES = tuple(StructureBias)
+
+# =========================
+# ALIGNMENT INDEX
+# =========================
+
+class AlignmentIndex(NamedTuple):
+    closed: np.ndarray    # per LTF bar: position of the last closed HTF bar, -1 if none
+    forming: np.ndarray   # per LTF bar: position of the HTF bar containing its open, -1 if none
+
+
+def _as_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    return pd.DatetimeIndex(index).as_unit("ns").asi8
+
+
+def infer_bar_seconds(index: pd.DatetimeIndex) -> int:
+    """Smallest spacing between bars (gaps only ever widen it)."""
+    stamps = _as_ns(index)
+    if len(stamps) < 2:
+        raise ValueError("Need at least 2 bars to infer the bar duration")
+    return int(np.diff(stamps).min() // 1_000_000_000)
+
+
+def align_timeframes(
+    ltf_index: pd.DatetimeIndex,
+    htf_index: pd.DatetimeIndex,
+    ltf_seconds: Optional[int] = None,
+    htf_seconds: Optional[int] = None
+) -> AlignmentIndex:
+    """
+    Alignment of two sorted bar indexes of one symbol.
+
+    closed[i] is the last HTF bar whose close time is <= the close time
+    of LTF bar i, i.e. what an evaluation at that LTF close could know.
+    """
+    if ltf_seconds is None:
+        ltf_seconds = infer_bar_seconds(ltf_index)
+    if htf_seconds is None:
+        htf_seconds = infer_bar_seconds(htf_index)
+
+    ltf_open = _as_ns(ltf_index)
+    htf_open = _as_ns(htf_index)
+
+    ltf_close = ltf_open + ltf_seconds * 1_000_000_000
+    htf_close = htf_open + htf_seconds * 1_000_000_000
+
+    return AlignmentIndex(
+        closed=np.searchsorted(htf_close, ltf_close, side="right") - 1,
+        forming=np.searchsorted(htf_open, ltf_open, side="right") - 1,
+    )
+
+
+def broadcast(values: np.ndarray, positions: np.ndarray, fill=np.nan) -> np.ndarray:
+    """values[positions] with `fill` where the position is -1."""
+    values = np.asarray(values)
+    out = values[np.maximum(positions, 0)]
+    if (positions < 0).any():
+        out = out.astype(np.result_type(out, type(fill)))
+        out[positions < 0] = fill
+    return out
+
+# =========================
+# CAUSAL HTF STATE (PER BAR)
+# =========================
+
+def structure_bias_codes(df: pd.DataFrame, lookback: int = 5) -> np.ndarray:
+    """
+    classify_structure_from_swings(detect_swings(df.iloc[:i + 1])) for
+    every bar i, as int8 codes into STRUCTURE_CODES.
+
+    A pivot at p is confirmed at bar p + lookback; the ZigZag cleanup is
+    a left fold, so it is replayed once over the confirmed pivots and
+    the bias forward-filled between confirmations.
+    """
+    candidates = detect_swing_candidates(df, lookback)
+    transition = STRUCTURE_CODES.index(StructureBias.TRANSITION)
+    codes = np.full(len(df), transition, dtype=np.int8)
+    if not candidates:
+        return codes
+
+    confirmed_at = df.index.get_indexer([s.index for s in candidates]) + lookback
+    after = np.empty(len(candidates), dtype=np.int8)
+
+    swings = []
+    for k, point in enumerate(candidates):
+        last = swings[-1] if swings else None
+        if last is not None and last.kind == point.kind:
+            if (point.price > last.price) if point.kind == "high" else (point.price < last.price):
+                swings[-1] = point
+        else:
+            swings.append(point)
+        after[k] = STRUCTURE_CODES.index(classify_structure_from_swings(swings[-4:]))
+
+    k = np.searchsorted(confirmed_at, np.arange(len(df)), side="right") - 1
+    return np.where(k >= 0, after[np.maximum(k, 0)], transition).astype(np.int8)
+
+
+def in_htf_aoi(
+    df: pd.DataFrame,
+    impulse_factor: float = HTF_IMPULSE_FACTOR
+) -> np.ndarray:
+    """
+    Per bar i: close[i] inside a detect_htf_aoi() zone of df.iloc[:i + 1]
+    (origins 3 .. i - 3, the detector's scan range on that prefix).
+    (bars x origins) comparison: meant for HTF frame sizes.
+    """
+    close = df["close"].to_numpy()
+    demand, supply = impulse_origin_masks(df["open"].to_numpy(), close, impulse_factor)
+    origins = np.flatnonzero(demand | supply)
+    origins = origins[origins >= 3]
+    if len(origins) == 0:
+        return np.zeros(len(df), dtype=bool)
+
+    low = df["low"].to_numpy()[origins]
+    high = df["high"].to_numpy()[origins]
+    bars = np.arange(len(df))[:, None]
+    inside = (
+        (origins[None, :] <= bars - 3)
+        & (low[None, :] <= close[:, None])
+        & (high[None, :] >= close[:, None])
+    )
+    return inside.any(axis=1)
+
+
+def htf_state(
+    df: pd.DataFrame,
+    ema_period: int = 50,
+    lookback: int = 5,
+    impulse_factor: float = HTF_IMPULSE_FACTOR
+) -> pd.DataFrame:
+    """State of every HTF bar as known at its close."""
+    return pd.DataFrame(
+        {
+            "bias": pd.Categorical.from_codes(
+                structure_bias_codes(df, lookback), [b.value for b in STRUCTURE_CODES]
+            ),
+            "close": df["close"].to_numpy(),
+            "ema": calculate_ema(df, ema_period).to_numpy(),
+            "atr": calculate_atr(df).to_numpy(),
+            "in_aoi": in_htf_aoi(df, impulse_factor),
+        },
+        index=df.index
+    )
+
+
+def align_htf_state(
+    ltf_df: pd.DataFrame,
+    state: pd.DataFrame,
+    ltf_seconds: Optional[int] = None,
+    htf_seconds: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    htf_state() of the last closed HTF bar for every LTF bar, indexed
+    like ltf_df; `htf_time` is that HTF bar's open (NaT before the
+    first HTF close).
+    """
+    positions = align_timeframes(ltf_df.index, state.index, ltf_seconds, htf_seconds).closed
+    aligned = (
+        state.iloc[np.maximum(positions, 0)]
+        .reset_index(names="htf_time")
+        .set_axis(ltf_df.index)
+    )
+
+    unknown = positions < 0
+    if unknown.any():
+        for name, column in aligned.items():
+            aligned[name] = column.mask(unknown, False) if column.dtype == bool else column.mask(unknown)
+    return aligned
@@ -14,9 +14,14 @@ AOI Types:
 """
 
 from enum import Enum
-from typing import List, Dict
+from typing import List, Dict, Tuple
+import numpy as np
 import pandas as pd
 
+from .. import metrics
+from .ema import calculate_atr
+from .kernels import zone_touches
+
 # =========================
 # ENUMS
 # =========================
@@ -56,61 +61,134 @@ def build_aoi(
 # HTF AOI DETECTION
 # =========================
 
+HTF_IMPULSE_FACTOR = 1.5
+
+def impulse_origin_masks(
+    open_: np.ndarray,
+    close: np.ndarray,
+    impulse_factor: float = HTF_IMPULSE_FACTOR
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized base/expansion test over every bar.
+
+    Returns (demand, supply) boolean masks aligned to bar positions:
+    - demand[i]: bearish base at i, bullish expansion at i+1 larger than
+      base body * impulse_factor
+    - supply[i]: mirrored
+    The last bar is always False (no expansion candle yet).
+    """
+    n = len(close)
+    demand = np.zeros(n, dtype=bool)
+    supply = np.zeros(n, dtype=bool)
+    if n < 2:
+        return demand, supply
+
+    base_open, base_close = open_[:-1], close[:-1]
+    next_open, next_close = open_[1:], close[1:]
+
+    demand[:-1] = (
+        (base_close < base_open)  # bearish base
+        & (next_close > next_open)  # bullish expansion
+        & ((next_close - next_open) > (base_open - base_close) * impulse_factor)
+    )
+    supply[:-1] = (
+        (base_close > base_open)
+        & (next_close < next_open)
+        & ((next_open - next_close) > (base_close - base_open) * impulse_factor)
+    )
+    return demand, supply
+
 def detect_htf_aoi(
     df: pd.DataFrame,
-    timeframe: str
+    timeframe: str,
+    impulse_factor: float = HTF_IMPULSE_FACTOR,
+    annotate: bool = True
 ) -> List[Dict]:
     """
     Detect HTF AOI zones based on:
     - Impulse move
     - Base candle(s)
+
+    annotate: fill touches / reactions / broken_at (annotate_touches)
     """
 
     aois = []
-
-    for i in range(3, len(df) - 3):
-        candle = df.iloc[i]
-        next_candle = df.iloc[i + 1]
-
-        # -------------------------
-        # Bullish impulse origin
-        # -------------------------
-        if (
-            candle['close'] < candle['open']  # bearish base
-            and next_candle['close'] > next_candle['open']  # bullish expansion
-            and (next_candle['close'] - next_candle['open']) >
-               (candle['open'] - candle['close']) * 1.5
-        ):
+    n = len(df)
+    if n < 7:
+        return aois
+
+    with metrics.stage("aoi", timeframe=timeframe):
+        demand, supply = impulse_origin_masks(
+            df["open"].to_numpy(),
+            df["close"].to_numpy(),
+            impulse_factor
+        )
+        high = df["high"].to_numpy()
+        low = df["low"].to_numpy()
+
+        # Same scan window as the original bar loop: range(3, len(df) - 3)
+        origins = np.flatnonzero((demand | supply)[3:n - 3]) + 3
+
+        for i in origins:
             aoi = build_aoi(
-                aoi_type=AOIType.DEMAND,
+                aoi_type=AOIType.DEMAND if demand[i] else AOIType.SUPPLY,
                 source=AOISource.HTF,
-                high=candle['high'],
-                low=candle['low'],
+                high=high[i],
+                low=low[i],
                 timeframe=timeframe,
-                origin_index=i
+                origin_index=int(i)
             )
             aois.append(aoi)
 
-        # -------------------------
-        # Bearish impulse origin
-        # -------------------------
-        if (
-            candle['close'] > candle['open']
-            and next_candle['close'] < next_candle['open']
-            and (next_candle['open'] - next_candle['close']) >
-               (candle['close'] - candle['open']) * 1.5
-        ):
-            aoi = build_aoi(
-                aoi_type=AOIType.SUPPLY,
-                source=AOISource.HTF,
-                high=candle['high'],
-                low=candle['low'],
-                timeframe=timeframe,
-                origin_index=i
-            )
-            aois.append(aoi)
+        if annotate:
+            annotate_touches(aois, df)
+
+    return aois
+
+# =========================
+# TOUCHES / REACTIONS
+# =========================
 
+def annotate_touches(
+    aois: List[Dict],
+    df: pd.DataFrame,
+    horizon: int = 10,
+    strong_atr: float = 1.0
+) -> List[Dict]:
+    """
+    Fill "touches" / "reactions" of HTF zones (origin_index = bar
+    position in df) by walking price after each zone's expansion candle
+    (kernels.zone_touches). A reaction of at least strong_atr x ATR at
+    the origin within `horizon` bars is "strong". "broken_at" is the bar
+    that closed through the zone, or None.
+    """
+    if not aois:
+        return aois
+
+    origins = np.array([zone["origin_index"] for zone in aois], dtype=np.int64)
+    atr = calculate_atr(df).to_numpy()
+
+    touches, strong, broken_at = zone_touches(
+        df["high"].to_numpy(dtype=float),
+        df["low"].to_numpy(dtype=float),
+        df["close"].to_numpy(dtype=float),
+        np.array([zone["low"] for zone in aois], dtype=float),
+        np.array([zone["high"] for zone in aois], dtype=float),
+        np.array([1 if zone["type"] == AOIType.DEMAND else -1 for zone in aois], dtype=np.int64),
+        origins + 2,  # after base + expansion candle
+        horizon,
+        atr[origins] * strong_atr,
+    )
+
+    for zone, n_touches, n_strong, broken in zip(aois, touches.tolist(), strong.tolist(), broken_at.tolist()):
+        zone["touches"] = n_touches
+        zone["reactions"] = (
+            [{"strength": "strong"}] * n_strong
+            + [{"strength": "weak"}] * (n_touches - n_strong)
+        )
+        zone["broken_at"] = broken if broken >= 0 else None
     return aois
+
 def detect_ltf_aoi(
     df: pd.DataFrame,
     timeframe: str,
@@ -123,32 +201,33 @@ def detect_ltf_aoi(
 
     aois = []
 
-    for htf in htf_aois:
-        zone_high = htf["high"]
-        zone_low = htf["low"]
-
-        # Filter candles inside HTF AOI
-        zone_df = df[
-            (df["low"] <= zone_high) &
-            (df["high"] >= zone_low)
-        ]
-
-        for i in range(2, len(zone_df) - 2):
-            candle = zone_df.iloc[i]
-
-            # Simple base candle logic
-            if abs(candle["close"] - candle["open"]) < (
-                candle["high"] - candle["low"]
-            ) * 0.3:
-
-                aoi = build_aoi(
-                    aoi_type=htf["type"],
-                    source=AOISource.LTF,
-                    high=candle["high"],
-                    low=candle["low"],
-                    timeframe=timeframe,
-                    origin_index=i
-                )
-                aois.append(aoi)
+    with metrics.stage("aoi", timeframe=timeframe):
+        for htf in htf_aois:
+            zone_high = htf["high"]
+            zone_low = htf["low"]
+
+            # Filter candles inside HTF AOI
+            zone_df = df[
+                (df["low"] <= zone_high) &
+                (df["high"] >= zone_low)
+            ]
+
+            for i in range(2, len(zone_df) - 2):
+                candle = zone_df.iloc[i]
+
+                # Simple base candle logic
+                if abs(candle["close"] - candle["open"]) < (
+                    candle["high"] - candle["low"]
+                ) * 0.3:
+
+                    aoi = build_aoi(
+                        aoi_type=htf["type"],
+                        source=AOISource.LTF,
+                        high=candle["high"],
+                        low=candle["low"],
+                        timeframe=timeframe,
+                        origin_index=i
+                    )
+                    aois.append(aoi)
 
     return aois
@@ -12,6 +12,7 @@ Inputs:
 - aoi (from aoi.py)
 - market_structure (from structure.py)
 - optional EMA context
+- optional psychological level proximity (from psych_levels.py)
 
 Output:
 - aoi_score (int)
@@ -73,8 +74,14 @@ AOI_SCORE_WEIGHTS = {
 
     # Penalties
     "range_penalty": -10,
+
+    # Round number inside / near the zone
+    "psych_level": 10,
 }
 
+# Max distance (pips) from zone to a big / half figure for the bonus
+PSYCH_PROXIMITY_PIPS = 10
+
 
 # =========================
 # CORE LOGIC
@@ -84,6 +91,7 @@ def score_aoi(
     aoi: Dict,
     structure_bias: StructureBias,
     ema_context: Optional[Dict] = None,
+    psych_level: Optional[Dict] = None,
 ) -> Dict:
     """
     Score a single AOI zone.
@@ -91,6 +99,8 @@ def score_aoi(
     aoi: output from aoi.build_aoi()
     structure_bias: HTF structure bias
     ema_context: optional EMA context (from ema.py)
+    psych_level: optional nearest level of this zone
+                 (from psych_levels.aoi_level_proximity())
     """
 
     score = 0
@@ -185,7 +195,15 @@ def score_aoi(
             reasons.append("ema_rejection_inside_aoi")
 
     # =========================
-    # 6. CONFIDENCE MAPPING
+    # 6. PSYCHOLOGICAL LEVEL (OPTIONAL)
+    # =========================
+
+    if psych_level and psych_level["distance_pips"] <= PSYCH_PROXIMITY_PIPS:
+        score += AOI_SCORE_WEIGHTS["psych_level"]
+        reasons.append("aoi_at_psych_level")
+
+    # =========================
+    # 7. CONFIDENCE MAPPING
     # =========================
 
     if score >= 50:
@@ -12,16 +12,23 @@ Modules Integrated:
 - Structure (2.1)
 - EMA Logic (2.2)
 - EMA Score (2.6)
-- AOI (2.3) [Future]
+- AOI (2.3): the unbroken HTF zone holding the last close, scored by
+  aoi_score and added to the EMA score
+- Psychological levels: round-number bonus of that zone (needs the symbol)
 """
 
 import pandas as pd
-from typing import Dict, Optional
+from typing import Dict, List, Optional
+
+from .. import metrics
 
 # Import Analysis Modules
 from . import structure
 from . import ema
 from . import ema_score
+from . import aoi
+from . import aoi_score
+from . import psych_levels
 
 class ConfluenceEngine:
     """
@@ -37,14 +44,20 @@ class ConfluenceEngine:
         df: pd.DataFrame, 
         timeframe: str,
         structure_lookback: int = 5,
-        ema_period: int = 50
+        ema_period: int = 50,
+        slope_factor: float = 0.15,
+        zone_atr_factor: float = 0.2,
+        symbol: Optional[str] = None
     ) -> Dict:
         """
         Run full technical stack on a single dataframe.
+        symbol: selects the psychological level grid; without it the
+        AOI score gets no round-number bonus.
         """
         
         # 1. Market Structure (Mandatory)
-        struct_res = structure.analyze_market_structure(df, lookback=structure_lookback)
+        with metrics.stage("structure", timeframe=timeframe):
+            struct_res = structure.analyze_market_structure(df, lookback=structure_lookback)
         bias = struct_res["bias"] # Enum: BULLISH, BEARISH, TRANSITION...
         
         # 2. EMA Logic (Mandatory)
@@ -55,25 +68,43 @@ class ConfluenceEngine:
         
         market_bias = self._convert_bias(bias)
         
-        ema_res = ema.analyze_ema(
-            df, 
-            timeframe=timeframe, 
-            ema_period=ema_period,
-            market_bias=market_bias
-        )
+        with metrics.stage("ema", timeframe=timeframe):
+            ema_res = ema.analyze_ema(
+                df, 
+                timeframe=timeframe, 
+                ema_period=ema_period,
+                market_bias=market_bias,
+                slope_factor=slope_factor,
+                zone_atr_factor=zone_atr_factor
+            )
         
-        # 3. EMA Scoring (Optional but recommended)
+        # 3. AOI: zone the price is currently in (None if outside all)
+        zone = self._active_zone(aoi.detect_htf_aoi(df, timeframe), df)
+
+        # 4. EMA Scoring (Optional but recommended)
         # Check if EMA analysis was valid
         if ema_res["valid"]:
-            score_res = ema_score.score_ema(
-                ema_state=ema_res,
-                structure_bias=market_bias,
-                in_aoi=False # TODO: AOI Integration later
-            )
+            with metrics.stage("scoring", timeframe=timeframe):
+                score_res = ema_score.score_ema(
+                    ema_state=ema_res,
+                    structure_bias=market_bias,
+                    in_aoi=zone is not None
+                )
         else:
             score_res = {"ema_score": 0, "confidence": "none", "reasons": ["ema_invalid"]}
-            
-        # 4. Final Aggregation
+
+        # 5. AOI Scoring: only a zone holding the price adds to the score
+        aoi_res = {"aoi_score": 0, "reasons": []}
+        if zone is not None:
+            with metrics.stage("scoring", timeframe=timeframe):
+                aoi_res = aoi_score.score_aoi(
+                    self._convert_aoi(zone),
+                    structure_bias=aoi_score.StructureBias(market_bias.value),
+                    ema_context={"rejection": ema_res["rejection"].value} if ema_res["valid"] else None,
+                    psych_level=psych_levels.aoi_level_proximity([zone], symbol)[0] if symbol else None
+                )
+
+        # 6. Final Aggregation
         return {
             "timeframe": timeframe,
             "structure": {
@@ -87,9 +118,9 @@ class ConfluenceEngine:
                 "rejection": ema_res["rejection"].value if ema_res["valid"] else "n/a"
             },
             "confluence": {
-                "score_total": score_res["ema_score"], # Currently only EMA contributes
+                "score_total": score_res["ema_score"] + aoi_res["aoi_score"],
                 "confidence": score_res["confidence"],
-                "reasons": score_res["reasons"]
+                "reasons": score_res["reasons"] + aoi_res["reasons"]
             }
         }
 
@@ -106,8 +137,34 @@ class ConfluenceEngine:
         else:
             return ema_score.MarketBias.RANGE
 
+    def _active_zone(self, zones: List[Dict], df: pd.DataFrame) -> Optional[Dict]:
+        """
+        Most recent unbroken zone containing the last close, or None.
+        """
+        if not zones:
+            return None
+        price = df["close"].iloc[-1]
+        for zone in reversed(zones):
+            if zone.get("broken_at") is None and zone["low"] <= price <= zone["high"]:
+                return zone
+        return None
+
+    def _convert_aoi(self, zone: Dict) -> Dict:
+        """
+        Adapter: aoi.py enums -> aoi_score enums (same values)
+        """
+        return {
+            **zone,
+            "type": aoi_score.AOIType(zone["type"].value),
+            "source": aoi_score.AOISource(zone["source"].value),
+        }
+
 # Singleton instance
 engine = ConfluenceEngine()
 
-def run_analysis(df: pd.DataFrame, tf: str) -> Dict:
-    return engine.analyze_timeframe(df, tf)
+# Bump whenever an analysis module changes its output: part of every
+# result_cache key, so stale cached results are never served
+ANALYSIS_VERSION = 4
+
+def run_analysis(df: pd.DataFrame, tf: str, symbol: Optional[str] = None) -> Dict:
+    return engine.analyze_timeframe(df, tf, symbol=symbol)
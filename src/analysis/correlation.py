@@ -0,0 +1,262 @@
+"""
+correlation.py
+---------------------------------
+Cross-Symbol Correlation & Currency Strength
+
+Purpose:
+- Rolling return correlation of the whole watchlist as one S x S
+  matrix (matrix products over the aligned close matrix, no Python
+  loop over pairs)
+- Per-currency strength index (EUR, USD, JPY, ...) from the same
+  returns through a pair -> currency incidence matrix
+- RollingCorrelation keeps window sums and updates them in O(S^2) per
+  new bar instead of recomputing the window
+- Collapse setups that are the same currency move (EURUSD long +
+  EURGBP long + EURJPY long) behind the best-ranked one
+
+Returns are log returns on the aligned time axis (panel.OHLCVPanel);
+a return is missing when either bar is missing, and each pair is
+correlated over the bars both symbols have (pairwise-complete).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOW = 100            # bars
+CORRELATION_THRESHOLD = 0.8     # |corr| treated as the same move
+MIN_OVERLAP = 20                # common bars needed for a coefficient
+
+BIAS_DIRECTION = {"bullish": 1, "bearish": -1}
+
+# =========================
+# RETURNS / CURRENCIES
+# =========================
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    """(symbols, time) closes -> log returns, NaN on the first bar and
+    wherever either bar is missing."""
+    close = np.asarray(close, dtype=float)
+    returns = np.full_like(close, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns[..., 1:] = np.diff(np.log(close), axis=-1)
+    return returns
+
+
+def split_pair(symbol: str) -> Optional[Tuple[str, str]]:
+    """'EURUSD' -> ('EUR', 'USD'); None for non-pair names (USOIL)."""
+    name = symbol.upper()[:6]
+    if len(name) != 6 or not name.isalpha():
+        return None
+    return name[:3], name[3:]
+
+
+def currency_incidence(symbols: Sequence[str]) -> Tuple[Tuple[str, ...], np.ndarray]:
+    """
+    Currencies of the watchlist and the (symbols, currencies) matrix:
+    +1 base, -1 quote, 0 otherwise. A pair's return is then
+    base strength - quote strength.
+    """
+    pairs = [split_pair(symbol) for symbol in symbols]
+    currencies = tuple(sorted({c for pair in pairs if pair for c in pair}))
+    incidence = np.zeros((len(symbols), len(currencies)))
+    for s, pair in enumerate(pairs):
+        if pair:
+            incidence[s, currencies.index(pair[0])] = 1.0
+            incidence[s, currencies.index(pair[1])] = -1.0
+    return currencies, incidence
+
+# =========================
+# WINDOW SUMS
+# =========================
+
+def _window_sums(returns: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """
+    Pairwise-complete sums over a (bars, symbols) block of returns:
+    n[i, j]   bars where both i and j have a return
+    sx[i, j]  sum of x_i over those bars  (sx.T: sum of x_j)
+    sxx[i, j] sum of x_i^2 over those bars
+    sxy[i, j] sum of x_i * x_j
+    """
+    valid = ~np.isnan(returns)
+    mask = valid.astype(float)
+    x = np.where(valid, returns, 0.0)
+    return mask.T @ mask, x.T @ mask, (x * x).T @ mask, x.T @ x
+
+
+def _correlation(n, sx, sxx, sxy, min_overlap: int) -> np.ndarray:
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sx.T
+        var = (n * sxx - sx * sx) * (n * sxx.T - sx.T * sx.T)
+        corr = cov / np.sqrt(var)
+    corr[(n < min_overlap) | ~(var > 0)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def correlation_matrix(
+    returns: np.ndarray,
+    window: int = DEFAULT_WINDOW,
+    min_overlap: int = MIN_OVERLAP
+) -> np.ndarray:
+    """(symbols, time) returns -> (symbols, symbols) correlation over
+    the last `window` bars; NaN where the overlap is too short."""
+    block = np.asarray(returns, dtype=float)[:, -window:].T
+    return _correlation(*_window_sums(block), min_overlap)
+
+
+def currency_strength(
+    close: np.ndarray,
+    symbols: Sequence[str],
+    window: int = DEFAULT_WINDOW,
+    index: Optional[pd.Index] = None
+) -> pd.DataFrame:
+    """
+    Strength of every currency at every bar: mean signed log return
+    over the last `window` bars of the pairs containing it (time x
+    currencies). Missing returns count as flat.
+    """
+    currencies, incidence = currency_incidence(symbols)
+    returns = np.nan_to_num(log_returns(close).T)
+    moved = pd.DataFrame(returns).rolling(window, min_periods=1).sum().to_numpy()
+    pairs_per_currency = np.maximum(np.abs(incidence).sum(axis=0), 1)
+    return pd.DataFrame(moved @ incidence / pairs_per_currency, index=index, columns=list(currencies))
+
+# =========================
+# INCREMENTAL
+# =========================
+
+class RollingCorrelation:
+    """
+    Correlation matrix + currency strength over the last `window` bars,
+    updated bar by bar. The window's returns are kept in a ring so the
+    leaving bar can be subtracted; sums are rebuilt from the ring every
+    `window` updates to stop floating-point drift.
+    """
+    __slots__ = (
+        "symbols", "window", "min_overlap", "currencies", "incidence",
+        "_ring", "_head", "_count", "_updates", "_last_close", "_sums",
+    )
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        window: int = DEFAULT_WINDOW,
+        min_overlap: int = MIN_OVERLAP
+    ):
+        self.symbols = list(symbols)
+        self.window = window
+        self.min_overlap = min_overlap
+        self.currencies, self.incidence = currency_incidence(self.symbols)
+
+        size = len(self.symbols)
+        self._ring = np.full((window, size), np.nan)
+        self._head = 0          # next slot to write
+        self._count = 0         # bars currently in the window
+        self._updates = 0
+        self._last_close = np.full(size, np.nan)
+        self._sums = _window_sums(self._ring[:0])
+
+    @classmethod
+    def from_closes(
+        cls,
+        symbols: Sequence[str],
+        close: np.ndarray,
+        window: int = DEFAULT_WINDOW,
+        min_overlap: int = MIN_OVERLAP
+    ) -> "RollingCorrelation":
+        """Seed from aligned (symbols, time) closes in one batch."""
+        rolling = cls(symbols, window, min_overlap)
+        close = np.asarray(close, dtype=float)
+        returns = log_returns(close)[:, -window:].T
+
+        rolling._count = len(returns)
+        rolling._ring[:rolling._count] = returns
+        rolling._head = rolling._count % window
+        if close.shape[1]:
+            rolling._last_close = close[:, -1].copy()
+        rolling._sums = _window_sums(returns)
+        return rolling
+
+    def update(self, close: np.ndarray):
+        """Add one aligned bar: (symbols,) closes, NaN where missing."""
+        close = np.asarray(close, dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            row = np.log(close / self._last_close)
+        self._last_close = close.copy()
+
+        if self._count == self.window:
+            leaving = _window_sums(self._ring[self._head][None, :])
+        else:
+            leaving = None
+            self._count += 1
+        self._ring[self._head] = row
+        self._head = (self._head + 1) % self.window
+
+        self._updates += 1
+        if self._updates % self.window == 0:
+            self._sums = _window_sums(self._ring[:self._count])
+            return
+
+        sums = [total + new for total, new in zip(self._sums, _window_sums(row[None, :]))]
+        if leaving is not None:
+            sums = [total - old for total, old in zip(sums, leaving)]
+        self._sums = tuple(sums)
+
+    def correlation(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            _correlation(*self._sums, self.min_overlap),
+            index=self.symbols, columns=self.symbols
+        )
+
+    def strength(self) -> pd.Series:
+        """Mean signed log return of each currency's pairs over the window."""
+        # Diagonal of sx: sum of each symbol's own returns
+        moved = np.diagonal(self._sums[1])
+        pairs_per_currency = np.maximum(np.abs(self.incidence).sum(axis=0), 1)
+        return pd.Series(moved @ self.incidence / pairs_per_currency, index=list(self.currencies))
+
+# =========================
+# RANKING
+# =========================
+
+def collapse_correlated(
+    ranked: Sequence[str],
+    directions: Dict[str, int],
+    correlation: pd.DataFrame,
+    threshold: float = CORRELATION_THRESHOLD
+) -> Dict[str, Optional[str]]:
+    """
+    Walk setups best first; a setup whose direction-adjusted correlation
+    with an already kept setup is >= threshold is the same move (EURUSD
+    long vs EURJPY long, or EURUSD long vs USDCHF short).
+
+    Returns {symbol: None if kept, else the kept symbol it duplicates}.
+    Symbols without direction or correlation data are always kept.
+    """
+    symbols = list(correlation.index)
+    position = {symbol: i for i, symbol in enumerate(symbols)}
+    matrix = correlation.to_numpy()
+
+    kept: List[int] = []
+    kept_sign: List[int] = []
+    leaders: Dict[str, Optional[str]] = {}
+
+    for symbol in ranked:
+        direction = directions.get(symbol, 0)
+        i = position.get(symbol)
+        if direction == 0 or i is None:
+            leaders[symbol] = None
+            continue
+
+        if kept:
+            same_move = matrix[i, kept] * direction * np.asarray(kept_sign) >= threshold
+            if same_move.any():
+                leaders[symbol] = symbols[kept[int(same_move.argmax())]]
+                continue
+
+        kept.append(i)
+        kept_sign.append(direction)
+        leaders[symbol] = None
+
+    return leaders
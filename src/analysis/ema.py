@@ -18,6 +18,8 @@ from enum import Enum
 import pandas as pd
 import numpy as np
 
+from . import indicators
+
 
 # =========================
 # ENUMS
@@ -54,26 +56,13 @@ class MarketBias(Enum):
 # =========================
 
 def calculate_ema(df: pd.DataFrame, period: int = 50) -> pd.Series:
-    """Calculate EMA"""
-    return df["close"].ewm(span=period, adjust=False).mean()
+    """Calculate EMA (configured indicators backend)"""
+    return indicators.ema(df["close"], period)
 
 
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
-    """Average True Range for volatility normalization"""
-    high = df["high"]
-    low = df["low"]
-    close = df["close"].shift(1)
-
-    tr = pd.concat(
-        [
-            high - low,
-            (high - close).abs(),
-            (low - close).abs()
-        ],
-        axis=1
-    ).max(axis=1)
-
-    return tr.rolling(period).mean()
+    """Average True Range for volatility normalization (SMA of true range)"""
+    return indicators.atr(df["high"], df["low"], df["close"], period)
 
 
 # =========================
@@ -112,11 +101,14 @@ def detect_slope(
 def detect_position(
     df: pd.DataFrame,
     ema: pd.Series,
-    zone_atr_factor: float = 0.2
+    zone_atr_factor: float = 0.2,
+    atr: pd.Series | None = None
 ) -> EmaPosition:
     """
     Determine price position relative to EMA.
     Structure-aware via candle close sequencing.
+
+    atr: optional precomputed calculate_atr(df) to avoid recomputing it.
     """
 
     close_now = df["close"].iloc[-1]
@@ -125,8 +117,9 @@ def detect_position(
     ema_now = ema.iloc[-1]
     ema_prev = ema.iloc[-2]
 
-    atr = calculate_atr(df).iloc[-1]
-    zone_buffer = atr * zone_atr_factor
+    if atr is None:
+        atr = calculate_atr(df)
+    zone_buffer = atr.iloc[-1] * zone_atr_factor
 
     # Touch / reaction zone
     if abs(close_now - ema_now) <= zone_buffer:
@@ -196,21 +189,30 @@ def analyze_ema(
     df: pd.DataFrame,
     timeframe: str,
     ema_period: int = 50,
-    market_bias: MarketBias = MarketBias.NEUTRAL
+    market_bias: MarketBias = MarketBias.NEUTRAL,
+    slope_factor: float = 0.15,
+    zone_atr_factor: float = 0.2,
+    ema: pd.Series | None = None,
+    atr: pd.Series | None = None
 ) -> dict:
     """
     Main EMA analysis entry.
     Used by Confluence Engine (Phase 2.6)
+
+    ema / atr: optional precomputed series aligned with df (parameter
+    sweeps compute them once per period and slice per window).
     """
 
     if len(df) < ema_period + 20:
         return {"valid": False, "reason": "not_enough_data"}
 
-    ema = calculate_ema(df, ema_period)
-    atr = calculate_atr(df)
+    if ema is None:
+        ema = calculate_ema(df, ema_period)
+    if atr is None:
+        atr = calculate_atr(df)
 
-    slope = detect_slope(ema, atr)
-    position = detect_position(df, ema)
+    slope = detect_slope(ema, atr, slope_factor=slope_factor)
+    position = detect_position(df, ema, zone_atr_factor, atr=atr)
     rejection = detect_rejection(df, ema, atr, slope, market_bias)
 
     price = df["close"].iloc[-1]
@@ -0,0 +1,58 @@
+# analysis/entry/break_retest.py
+from enum import Enum
+
+import pandas as pd
+
+from ..ema import calculate_atr
+from ..structure import detect_swings
+
+class BreakRetest(Enum):
+    NONE = "none"          # last swing level not broken
+    PENDING = "pending"    # broken, no retest yet
+    VALID = "valid"        # broken, retested, held
+    INVALID = "invalid"    # broken, then closed back through the level
+
+def detect_break_retest(
+    df: pd.DataFrame,
+    structure_bias,
+    lookback: int = 5,
+    tolerance_atr: float = 0.25
+) -> BreakRetest:
+    """
+    Break & retest of the last swing level in the direction of structure.
+
+    Bullish: close above the last swing high, then a low back to the
+    level (within tolerance_atr x ATR) without a close below it.
+    Bearish mirrors it on the last swing low.
+    structure_bias: StructureBias / TrendBias member or its string value.
+    """
+    bias = getattr(structure_bias, "value", structure_bias)
+    if bias not in ("bullish", "bearish"):
+        return BreakRetest.NONE
+
+    kind = "high" if bias == "bullish" else "low"
+    swing = next((s for s in reversed(detect_swings(df, lookback)) if s.kind == kind), None)
+    if swing is None:
+        return BreakRetest.NONE
+
+    level = swing.price
+    after = df[df.index > swing.index]
+    broke = after["close"] > level if bias == "bullish" else after["close"] < level
+    if not broke.any():
+        return BreakRetest.NONE
+
+    post = after.iloc[int(broke.to_numpy().argmax()) + 1:]
+    tolerance = calculate_atr(df).iloc[-1] * tolerance_atr
+
+    if bias == "bullish":
+        failed = (post["close"] < level - tolerance).any()
+        retested = (post["low"] <= level + tolerance).any()
+    else:
+        failed = (post["close"] > level + tolerance).any()
+        retested = (post["high"] >= level - tolerance).any()
+
+    if failed:
+        return BreakRetest.INVALID
+    if retested:
+        return BreakRetest.VALID
+    return BreakRetest.PENDING
@@ -1,4 +1,18 @@
 # analysis/entry/entry_candle.py
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+class EntrySignal(Enum):
+    NONE = "none"
+    BULLISH_REJECTION = "bullish_rejection"
+    BEARISH_REJECTION = "bearish_rejection"
+    BULLISH_MOMENTUM = "bullish_momentum"
+    BEARISH_MOMENTUM = "bearish_momentum"
+
+# Index = code returned by entry_candle_signals()
+SIGNAL_CODES = tuple(EntrySignal)
 
 def detect_entry_candle(
     df: pd.DataFrame,
@@ -51,3 +65,58 @@ def detect_entry_candle(
             return {"signal": EntrySignal.BEARISH_MOMENTUM}
 
     return {"signal": EntrySignal.NONE}
+
+# =========================
+# BATCH (EVERY BAR)
+# =========================
+
+def entry_candle_signals(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    direction: np.ndarray,
+    at_key_level: np.ndarray | bool = False
+) -> np.ndarray:
+    """
+    detect_entry_candle() for every bar at once.
+
+    Arrays share one shape; time is the LAST axis (1-D history or a
+    symbols x time panel). direction: +1 bullish / -1 bearish / 0 none,
+    broadcastable like at_key_level. Returns int8 codes into
+    SIGNAL_CODES; the first bar of each row (no previous bar) is NONE.
+    """
+    body = np.abs(close - open_)
+    range_ = high - low
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        close_position = (close - low) / range_
+
+    upper_wick = high - np.maximum(open_, close)
+    lower_wick = np.minimum(open_, close) - low
+
+    prev_high = np.full_like(high, np.nan, dtype=float)
+    prev_low = np.full_like(low, np.nan, dtype=float)
+    prev_high[..., 1:] = high[..., :-1]
+    prev_low[..., 1:] = low[..., :-1]
+
+    bullish = direction == 1
+    bearish = direction == -1
+    valid = (range_ != 0) & ~np.isnan(prev_high)
+
+    # Same precedence as the scalar version: rejection before momentum
+    conditions = [
+        at_key_level & bullish & (close > open_) & (lower_wick > body * 1.3) & (close_position > 0.6),
+        at_key_level & bearish & (close < open_) & (upper_wick > body * 1.3) & (close_position < 0.4),
+        (body > range_ * 0.65) & bullish & (close > prev_high),
+        (body > range_ * 0.65) & bearish & (close < prev_low),
+    ]
+    choices = [
+        SIGNAL_CODES.index(EntrySignal.BULLISH_REJECTION),
+        SIGNAL_CODES.index(EntrySignal.BEARISH_REJECTION),
+        SIGNAL_CODES.index(EntrySignal.BULLISH_MOMENTUM),
+        SIGNAL_CODES.index(EntrySignal.BEARISH_MOMENTUM),
+    ]
+    signals = np.select(conditions, choices, default=0).astype(np.int8)
+    signals[~np.broadcast_to(valid, signals.shape)] = 0
+    return signals
@@ -1,12 +1,16 @@
 # analysis/entry/entry_engine.py
-import pandas as pd
+from enum import Enum
 from typing import Dict
 
-from analysis.trend import TrendBias
-from analysis.entry.entry_candle import detect_entry_candle
-from analysis.entry.break_retest import detect_break_retest, BreakRetest
-from analysis.entry.volume_filter import evaluate_volume
-from analysis.entry.entry_score import grade_entry, EntryGrade
+import numpy as np
+import pandas as pd
+
+from ... import metrics
+from ..trend import TrendBias
+from .entry_candle import SIGNAL_CODES, EntrySignal, detect_entry_candle, entry_candle_signals
+from .break_retest import detect_break_retest, BreakRetest
+from .volume_filter import VOLUME_CODES, VolumeState, evaluate_volume, volume_baseline, volume_states
+from .entry_score import GRADE_CODES, grade_entry, grade_entries, EntryGrade
 
 class EntryDecision(Enum):
     TRADE = "trade"
@@ -20,6 +24,14 @@ def analyze_entry(
     """
     Discretionary Entry Engine
     """
+    with metrics.stage("entry"):
+        return _analyze_entry(df, context)
+
+
+def _analyze_entry(
+    df: pd.DataFrame,
+    context: Dict
+) -> Dict:
 
     # =========================
     # 1. HARD FILTERS (NO MERCY)
@@ -86,3 +98,128 @@ def analyze_entry(
         "grade": grade.value,
         "volume": volume_state.value,
     }
+
+# =========================
+# BATCH (EVERY BAR)
+# =========================
+
+# Index = code in analyze_entries() output
+DECISION_CODES = tuple(EntryDecision)
+REASON_CODES = (
+    "",
+    "no_clear_trend",
+    "ema_weak",
+    "outside_aoi",
+    "bad_retest",
+    "no_entry_candle",
+    "low_quality",
+)
+
+TREND_DIRECTION = {TrendBias.BULLISH: 1, TrendBias.BEARISH: -1}
+
+
+def trend_direction(trend: TrendBias) -> int:
+    """TrendBias -> +1 / -1 / 0 as used by analyze_entries()."""
+    return TREND_DIRECTION.get(trend, 0)
+
+
+def analyze_entries(
+    open_: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    volume: np.ndarray,
+    trend: np.ndarray,
+    ema_weak: np.ndarray,
+    in_aoi: np.ndarray,
+    ema_score: np.ndarray,
+    retest_invalid: np.ndarray | bool = False,
+    volume_base: np.ndarray | None = None,
+    lookback: int = 20
+) -> Dict[str, np.ndarray]:
+    """
+    analyze_entry() for every bar at once, no per-bar Python.
+
+    Prices / volume share one shape with time on the LAST axis (history
+    or symbols x time panel). Per-bar context is given as broadcastable
+    arrays: trend (+1 / -1 / 0, see trend_direction()), ema_weak,
+    in_aoi, ema_score, retest_invalid (e.g. from detect_break_retest()).
+    volume_base: per-bar volume baseline (e.g. session_volume_baseline());
+    defaults to the rolling `lookback` mean.
+
+    Returns int8 code arrays: decision (DECISION_CODES), reason
+    (REASON_CODES, first failing check), signal (SIGNAL_CODES),
+    grade (GRADE_CODES), volume (VOLUME_CODES).
+    """
+    with metrics.stage("entry"):
+        shape = np.shape(close)
+        trend = np.broadcast_to(trend, shape)
+
+        signals = entry_candle_signals(open_, high, low, close, trend)
+
+        if volume_base is None:
+            volume_base = volume_baseline(volume, lookback)
+        # analyze_entry() judges volume without the entry type
+        volumes = volume_states(volume, volume_base)
+
+        trend_clear = trend != 0
+        has_signal = signals != SIGNAL_CODES.index(EntrySignal.NONE)
+        grades = grade_entries(
+            trend_clear, ema_score, has_signal,
+            volumes == VOLUME_CODES.index(VolumeState.HIGH)
+        )
+
+        # Hard filters as masks, in analyze_entry() order: first failure wins
+        reasons = np.select(
+            [
+                ~trend_clear,
+                np.broadcast_to(ema_weak, shape),
+                ~np.broadcast_to(in_aoi, shape),
+                np.broadcast_to(retest_invalid, shape),
+                ~has_signal,
+                grades == GRADE_CODES.index(EntryGrade.SKIP),
+            ],
+            range(1, len(REASON_CODES)),
+            default=0,
+        ).astype(np.int8)
+
+        decisions = np.select(
+            [reasons == 0, reasons == REASON_CODES.index("no_entry_candle")],
+            [DECISION_CODES.index(EntryDecision.TRADE), DECISION_CODES.index(EntryDecision.WAIT)],
+            default=DECISION_CODES.index(EntryDecision.NO_TRADE),
+        ).astype(np.int8)
+
+    return {
+        "decision": decisions,
+        "reason": reasons,
+        "signal": signals,
+        "grade": grades,
+        "volume": volumes,
+    }
+
+
+def analyze_entry_frame(df: pd.DataFrame, **context) -> pd.DataFrame:
+    """
+    analyze_entries() on one OHLCV frame, decoded into categorical
+    columns aligned with df.index. context: the per-bar arguments of
+    analyze_entries() (trend, ema_weak, in_aoi, ema_score, ...).
+    """
+    codes = analyze_entries(
+        df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(),
+        df["close"].to_numpy(), df["volume"].to_numpy(),
+        **context
+    )
+    tables = {
+        "decision": [d.value for d in DECISION_CODES],
+        "reason": list(REASON_CODES),
+        "signal": [s.value for s in SIGNAL_CODES],
+        "grade": [g.value for g in GRADE_CODES],
+        "volume": [v.value for v in VOLUME_CODES],
+    }
+    return pd.DataFrame(
+        {
+            name: pd.Categorical.from_codes(codes[name], categories=tables[name])
+            for name in tables
+        },
+        index=df.index
+    )
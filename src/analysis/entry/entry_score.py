@@ -1,6 +1,8 @@
 # analysis/entry/entry_score.py
 from enum import Enum
 
+import numpy as np
+
 class EntryGrade(Enum):
     A_PLUS = "A+"
     A = "A"
@@ -30,3 +32,37 @@ def grade_entry(context: dict) -> EntryGrade:
         return EntryGrade.B
 
     return EntryGrade.SKIP
+
+# =========================
+# BATCH (EVERY BAR)
+# =========================
+
+# Index = code returned by grade_entries()
+GRADE_CODES = tuple(EntryGrade)
+
+def grade_entries(
+    trend_clear: np.ndarray,
+    ema_score: np.ndarray,
+    has_signal: np.ndarray,
+    volume_high: np.ndarray
+) -> np.ndarray:
+    """
+    grade_entry() for every bar (broadcastable masks / scores):
+    int8 codes into GRADE_CODES.
+    """
+    score = (
+        np.where(trend_clear, 20, 0)
+        + np.where(np.asarray(ema_score) >= 40, 20, 0)
+        + np.where(has_signal, 20, 0)
+        + np.where(volume_high, 10, 0)
+    )
+    grades = np.select(
+        [score >= 60, score >= 45, score >= 30],
+        [
+            GRADE_CODES.index(EntryGrade.A_PLUS),
+            GRADE_CODES.index(EntryGrade.A),
+            GRADE_CODES.index(EntryGrade.B),
+        ],
+        default=GRADE_CODES.index(EntryGrade.SKIP),
+    )
+    return grades.astype(np.int8)
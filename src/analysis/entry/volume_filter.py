@@ -1,13 +1,44 @@
 # analysis/entry/volume_filter.py
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+
+from .. import indicators
+from ..session import SESSION_CODES, SessionStats
+
+class VolumeState(Enum):
+    LOW = "low"
+    NORMAL = "normal"
+    HIGH = "high"
+
+# Index = code returned by volume_states()
+VOLUME_CODES = tuple(VolumeState)
 
 def evaluate_volume(
     df: pd.DataFrame,
     lookback: int = 20,
-    entry_type: str | None = None
+    entry_type: str | None = None,
+    session_stats: SessionStats | None = None
 ) -> VolumeState:
+    """
+    session_stats: precomputed session.session_stats() of this symbol.
+    When given, the current bar is compared with the typical volume of
+    ITS session (Asia volume is not judged against London volume);
+    otherwise with the rolling mean of the last `lookback` bars.
+    """
 
     vol_now = df["volume"].iloc[-1]
-    vol_avg = df["volume"].rolling(lookback).mean().iloc[-1]
+    vol_avg = None
+
+    if session_stats is not None:
+        code = session_stats.label(df.index[-1:])[0]
+        stats = session_stats.get(SESSION_CODES[code])
+        if stats is not None:
+            vol_avg = stats["volume"]
+
+    if vol_avg is None:
+        vol_avg = indicators.rolling_mean(df["volume"].iloc[-lookback:], lookback).iloc[-1]
 
     if entry_type and "momentum" in entry_type:
         if vol_now > vol_avg * 1.4:
@@ -18,3 +49,65 @@ def evaluate_volume(
         return VolumeState.NORMAL
 
     return VolumeState.LOW
+
+# =========================
+# BATCH (EVERY BAR)
+# =========================
+
+def volume_baseline(volume: np.ndarray, lookback: int = 20) -> np.ndarray:
+    """
+    Rolling mean of the last `lookback` bars along the LAST axis
+    (cumulative-sum difference, O(n)); NaN until the window is full,
+    like pandas rolling(lookback).mean().
+    """
+    volume = np.asarray(volume, dtype=float)
+    cumsum = np.cumsum(volume, axis=-1)
+
+    baseline = np.full_like(volume, np.nan)
+    if volume.shape[-1] < lookback:
+        return baseline
+
+    window_sum = cumsum[..., lookback - 1:].copy()
+    window_sum[..., 1:] -= cumsum[..., :-lookback]
+    baseline[..., lookback - 1:] = window_sum / lookback
+    return baseline
+
+
+def volume_states(
+    volume: np.ndarray,
+    baseline: np.ndarray,
+    momentum: np.ndarray | bool = False
+) -> np.ndarray:
+    """
+    evaluate_volume() for every bar: int8 codes into VOLUME_CODES.
+
+    baseline: volume_baseline() or per-bar session volume means.
+    momentum: mask of bars judged as momentum entries (stricter 1.4x
+    threshold, HIGH or LOW only).
+    """
+    volume = np.asarray(volume, dtype=float)
+    high = VOLUME_CODES.index(VolumeState.HIGH)
+    normal = VOLUME_CODES.index(VolumeState.NORMAL)
+    low = VOLUME_CODES.index(VolumeState.LOW)
+
+    states = np.where(
+        momentum,
+        np.where(volume > baseline * 1.4, high, low),
+        np.where(volume > baseline * 1.1, normal, low),
+    )
+    return states.astype(np.int8)
+
+
+def session_volume_baseline(
+    times: pd.DatetimeIndex,
+    session_stats: SessionStats,
+    fallback: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Per-bar typical volume of each bar's session (O(1) lookup per bar);
+    sessions without history take `fallback` (e.g. volume_baseline()).
+    """
+    baseline = session_stats.volume[session_stats.label(times)]
+    if fallback is not None:
+        baseline = np.where(np.isnan(baseline), fallback, baseline)
+    return baseline
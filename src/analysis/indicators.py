@@ -0,0 +1,212 @@
+"""
+indicators.py
+---------------------------------
+Indicator Backends (pandas / numpy / TA-Lib)
+
+Purpose:
+- One API for the indicator math used by ema.py, the volume filter and
+  scoring: ema(), atr(), rolling_mean()
+- Backend chosen by configuration, per call or process-wide:
+    pandas  reference implementation (ewm / rolling)
+    numpy   plain arrays, no intermediate DataFrames; the recursive
+            EMA runs in kernels.ema_recursive (Numba when installed)
+    talib   TA-Lib C functions
+
+Semantics (identical across backends unless noted):
+- ema:  ewm(span=period, adjust=False), seeded with the first close.
+        TA-Lib seeds with the SMA of the first `period` closes (NaN
+        before it); the difference decays as (1 - 2 / (period + 1))^n
+- atr:  smoothing="sma" (this repo's ATR): rolling mean of the true
+        range, first TR = high - low. TA-Lib's TRANGE has no first TR,
+        so its first valid value is one bar later.
+        smoothing="wilder": Wilder's RMA (TA-Lib ATR); the pandas /
+        numpy versions seed at the first TR, TA-Lib with an SMA -> same
+        convergence caveat as ema
+- rolling_mean: NaN until the window is full
+- NaN inputs: pandas / numpy skip them like pandas does (ewm keeps
+  decaying across a gap, a rolling window holding a NaN is NaN). TA-Lib
+  lets one NaN poison every later value, so the talib backend raises
+  ValueError on NaN after the first valid value (leading NaN is fine)
+
+Configuration:
+- TRADING_INDICATOR_BACKEND=pandas|numpy|talib (default pandas)
+- set_backend(name) at runtime, or backend=... on a single call
+
+Parity / speed:
+    python -m benchmarks.bench_hotpaths --parity
+    python -m benchmarks.bench_hotpaths --cases indicators_pandas indicators_numpy indicators_talib
+"""
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .kernels import ema_recursive
+
+try:
+    import talib
+except ImportError:
+    talib = None
+
+BACKENDS = ("pandas", "numpy", "talib")
+DEFAULT_BACKEND = "pandas"
+ATR_SMOOTHING = ("sma", "wilder")
+
+_backend = DEFAULT_BACKEND
+
+# =========================
+# CONFIGURATION
+# =========================
+
+def set_backend(name: str):
+    """Select the process-wide indicator backend."""
+    global _backend
+    _backend = _check_backend(name)
+
+
+def get_backend() -> str:
+    return _backend
+
+
+def _check_backend(name: str) -> str:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown indicator backend {name!r}, expected one of {BACKENDS}")
+    if name == "talib" and talib is None:
+        raise ImportError("Indicator backend 'talib' needs the TA-Lib package")
+    return name
+
+
+def _resolve(backend: Optional[str]) -> str:
+    return _backend if backend is None else _check_backend(backend)
+
+# =========================
+# INDICATORS
+# =========================
+
+def _values(series: pd.Series) -> np.ndarray:
+    return series.to_numpy(dtype=np.float64)
+
+
+def _talib_values(series: pd.Series) -> np.ndarray:
+    """Float array for TA-Lib; NaN is only allowed before the first value."""
+    values = _values(series)
+    valid = ~np.isnan(values)
+    if valid.any() and not valid[valid.argmax():].all():
+        raise ValueError(
+            f"Indicator backend 'talib' cannot handle NaN inside {series.name or 'a series'!r}; "
+            "use the pandas or numpy backend"
+        )
+    return values
+
+
+def ema(close: pd.Series, period: int = 50, backend: Optional[str] = None) -> pd.Series:
+    backend = _resolve(backend)
+
+    if backend == "pandas":
+        return close.ewm(span=period, adjust=False).mean()
+    if backend == "numpy":
+        values = ema_recursive(_values(close), 2.0 / (period + 1))
+    else:
+        values = talib.EMA(_talib_values(close), timeperiod=period)
+
+    return pd.Series(values, index=close.index, name=close.name)
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """Per-bar true range; the first bar (no previous close) is high - low."""
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    # fmax skips NaN like the pandas max(axis=1) it replaces
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(
+    high: pd.Series,
+    low: pd.Series,
+    close: pd.Series,
+    period: int = 14,
+    smoothing: str = "sma",
+    backend: Optional[str] = None
+) -> pd.Series:
+    backend = _resolve(backend)
+    if smoothing not in ATR_SMOOTHING:
+        raise ValueError(f"Unknown ATR smoothing {smoothing!r}, expected one of {ATR_SMOOTHING}")
+
+    if backend == "pandas":
+        prev_close = close.shift(1)
+        tr = pd.concat(
+            [
+                high - low,
+                (high - prev_close).abs(),
+                (low - prev_close).abs()
+            ],
+            axis=1
+        ).max(axis=1)
+        if smoothing == "sma":
+            return tr.rolling(period).mean()
+        return tr.ewm(alpha=1.0 / period, adjust=False).mean()
+
+    if backend == "numpy":
+        tr = true_range(_values(high), _values(low), _values(close))
+        if smoothing == "sma":
+            values = _rolling_mean(tr, period)
+        else:
+            values = ema_recursive(tr, 1.0 / period)
+    elif smoothing == "sma":
+        h, l, c = _talib_values(high), _talib_values(low), _talib_values(close)
+        values = talib.SMA(talib.TRANGE(h, l, c), timeperiod=period)
+    else:
+        h, l, c = _talib_values(high), _talib_values(low), _talib_values(close)
+        values = talib.ATR(h, l, c, timeperiod=period)
+
+    return pd.Series(values, index=close.index)
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Sum of every full window (len(values) - window + 1 of them)."""
+    cumsum = np.cumsum(values)
+    window_sum = cumsum[window - 1:].copy()
+    window_sum[1:] -= cumsum[:-window]
+    return window_sum
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Cumulative-sum window mean, NaN until the window is full and for
+    every window holding a NaN (pandas rolling(window).mean()).
+    """
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    missing = np.isnan(values)
+    out[window - 1:] = _window_sums(np.where(missing, 0.0, values), window) / window
+    if missing.any():
+        out[window - 1:][_window_sums(missing.astype(np.int64), window) > 0] = np.nan
+    return out
+
+
+def rolling_mean(values: pd.Series, window: int, backend: Optional[str] = None) -> pd.Series:
+    backend = _resolve(backend)
+
+    if backend == "pandas":
+        return values.rolling(window).mean()
+    if backend == "numpy":
+        result = _rolling_mean(_values(values), window)
+    else:
+        result = talib.SMA(_talib_values(values), timeperiod=window)
+
+    return pd.Series(result, index=values.index, name=values.name)
+
+# =========================
+# STARTUP CONFIG
+# =========================
+
+_configured = os.getenv("TRADING_INDICATOR_BACKEND")
+if _configured:
+    try:
+        set_backend(_configured)
+    except (ValueError, ImportError) as e:
+        print(f"[WARN] TRADING_INDICATOR_BACKEND ignored – {e}")
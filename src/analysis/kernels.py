@@ -0,0 +1,224 @@
+"""
+kernels.py
+---------------------------------
+Sequential Loop Kernels (optional Numba)
+
+Purpose:
+- The loops that cannot be written as numpy masks, on plain arrays:
+    zigzag          ZigZag cleanup of pivot candidates (detect_swings)
+    zone_touches    touch / reaction walk of AOI zones
+    resolve_trades  stop / target resolution of backtest entries
+    ema_recursive   exponential smoothing (indicators "numpy" backend)
+- Compiled with numba.njit when Numba is installed, otherwise the same
+  functions run as plain Python (identical results; the pure versions
+  stay importable as PY_KERNELS for parity checks)
+
+Environment:
+- TRADING_DISABLE_NUMBA=1         force the Python fallback
+- TRADING_NUMBA_CACHE_DIR=<dir>   where compiled kernels are cached
+                                  (default: Numba's __pycache__ next to
+                                  this file); workers load the cache
+                                  instead of re-compiling on every run
+
+Parity:
+    python -m benchmarks.bench_hotpaths --parity
+"""
+
+import os
+from typing import Tuple
+
+import numpy as np
+
+if os.getenv("TRADING_NUMBA_CACHE_DIR"):
+    # Must be set before numba is imported
+    os.environ.setdefault("NUMBA_CACHE_DIR", os.environ["TRADING_NUMBA_CACHE_DIR"])
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Trade outcome codes of resolve_trades()
+OUTCOME_OPEN = 0
+OUTCOME_TARGET = 1
+OUTCOME_STOP = -1
+
+# =========================
+# PURE KERNELS
+# =========================
+
+def _zigzag(prices: np.ndarray, is_high: np.ndarray) -> np.ndarray:
+    """
+    structure.clean_swings() on time-sorted candidate arrays: positions
+    of the kept candidates. Consecutive highs keep the higher one,
+    consecutive lows the lower one.
+    """
+    n = len(prices)
+    keep = np.empty(n, dtype=np.int64)
+    count = 0
+    for k in range(n):
+        if count > 0 and is_high[keep[count - 1]] == is_high[k]:
+            last = keep[count - 1]
+            if is_high[k]:
+                if prices[k] > prices[last]:
+                    keep[count - 1] = k
+            elif prices[k] < prices[last]:
+                keep[count - 1] = k
+        else:
+            keep[count] = k
+            count += 1
+    return keep[:count]
+
+
+def _zone_touches(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    zone_low: np.ndarray,
+    zone_high: np.ndarray,
+    zone_side: np.ndarray,
+    start: np.ndarray,
+    horizon: int,
+    strong_move: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Walk every zone forward from bar start[z].
+
+    A touch is a bar overlapping the zone after a bar that did not. Its
+    reaction is the best move away from the zone over the next `horizon`
+    bars (demand: highest high - zone high; supply: zone low - lowest
+    low); strong when >= strong_move[z]. A close through the far edge
+    breaks the zone and ends the walk.
+
+    zone_side: +1 demand / -1 supply.
+    Returns (touches, strong reactions, broken_at bar or -1).
+    """
+    n_bars = len(high)
+    n_zones = len(zone_low)
+    touches = np.zeros(n_zones, dtype=np.int32)
+    strong = np.zeros(n_zones, dtype=np.int32)
+    broken_at = np.full(n_zones, -1, dtype=np.int64)
+
+    for z in range(n_zones):
+        lo = zone_low[z]
+        hi = zone_high[z]
+        demand = zone_side[z] > 0
+        inside_prev = True  # the origin bar itself is in the zone
+
+        for i in range(start[z], n_bars):
+            if (demand and close[i] < lo) or (not demand and close[i] > hi):
+                broken_at[z] = i
+                break
+
+            inside = low[i] <= hi and high[i] >= lo
+            if inside and not inside_prev:
+                touches[z] += 1
+                best = 0.0
+                for j in range(i + 1, min(i + 1 + horizon, n_bars)):
+                    move = high[j] - hi if demand else lo - low[j]
+                    if move > best:
+                        best = move
+                if best >= strong_move[z]:
+                    strong[z] += 1
+            inside_prev = inside
+
+    return touches, strong, broken_at
+
+
+def _resolve_trades(
+    high: np.ndarray,
+    low: np.ndarray,
+    entry: np.ndarray,
+    direction: np.ndarray,
+    stop: np.ndarray,
+    target: np.ndarray,
+    max_bars: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First of stop / target hit after each entry bar (entry filled at
+    that bar's close), within max_bars. A bar touching both counts as
+    the stop. Returns (outcome codes, exit bar or -1).
+    """
+    n_bars = len(high)
+    n_trades = len(entry)
+    outcome = np.zeros(n_trades, dtype=np.int8)
+    exit_at = np.full(n_trades, -1, dtype=np.int64)
+
+    for t in range(n_trades):
+        long = direction[t] > 0
+        for i in range(entry[t] + 1, min(entry[t] + 1 + max_bars, n_bars)):
+            if (long and low[i] <= stop[t]) or (not long and high[i] >= stop[t]):
+                outcome[t] = -1
+                exit_at[t] = i
+                break
+            if (long and high[i] >= target[t]) or (not long and low[i] <= target[t]):
+                outcome[t] = 1
+                exit_at[t] = i
+                break
+
+    return outcome, exit_at
+
+
+def _ema_recursive(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    pandas ewm(alpha=alpha, adjust=False).mean() with pandas' exact
+    update (weights renormalized every step), so the results are
+    bit-identical. NaN as pandas (ignore_na=False): NaN until the first
+    value; a NaN repeats the previous mean while the weight of the older
+    values keeps decaying (with alpha = 0.5 pandas gives the new value
+    the remaining weight 1 - old weight instead; replicated).
+    """
+    n = len(values)
+    out = np.empty(n, dtype=np.float64)
+    old_wt_factor = 1.0 - alpha
+    old_wt = 1.0
+    new_wt = alpha
+    weighted = np.nan
+
+    for i in range(n):
+        cur = values[i]
+        if weighted == weighted:
+            old_wt *= old_wt_factor
+            if alpha == 0.5:
+                new_wt = 1.0 - old_wt
+            if cur == cur:
+                if weighted != cur:
+                    weighted = (old_wt * weighted + new_wt * cur) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif cur == cur:
+            weighted = cur
+        out[i] = weighted
+    return out
+
+
+PY_KERNELS = {
+    "zigzag": _zigzag,
+    "zone_touches": _zone_touches,
+    "resolve_trades": _resolve_trades,
+    "ema_recursive": _ema_recursive,
+}
+
+# =========================
+# BACKEND SELECTION
+# =========================
+
+if numba is not None and os.getenv("TRADING_DISABLE_NUMBA", "0") != "1":
+    BACKEND = "numba"
+    _jit = numba.njit(cache=True, nogil=True)
+    zigzag = _jit(_zigzag)
+    zone_touches = _jit(_zone_touches)
+    resolve_trades = _jit(_resolve_trades)
+    ema_recursive = _jit(_ema_recursive)
+else:
+    BACKEND = "python"
+    zigzag = _zigzag
+    zone_touches = _zone_touches
+    resolve_trades = _resolve_trades
+    ema_recursive = _ema_recursive
+
+KERNELS = {
+    "zigzag": zigzag,
+    "zone_touches": zone_touches,
+    "resolve_trades": resolve_trades,
+    "ema_recursive": ema_recursive,
+}
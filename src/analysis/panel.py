@@ -0,0 +1,353 @@
+"""
+panel.py
+---------------------------------
+Multi-Symbol OHLCV Panel
+
+Purpose:
+- One contiguous float64 array shaped symbol x time x field for a whole
+  watchlist (one timeframe), aligned on the union time axis, with a
+  mask of present bars
+- EMA, ATR, pivot detection and candle patterns for ALL symbols in one
+  vectorized call instead of one Python pass per symbol
+- watchlist_ema_state: EMA slope / position of every symbol and
+  timeframe, computed once per scan (orchestrator "watchlist" event)
+
+Layouts:
+- OHLCVPanel   aligned: column t is the same timestamp for every
+               symbol; missing bars are NaN (mask False)
+- CompactPanel left-justified: each symbol's own bars packed from
+               column 0, NaN padding at the end. Recursive / windowed
+               indicators (EMA, rolling ATR, pivots) on this layout are
+               identical to computing them on each symbol's DataFrame,
+               because no gap is ever inserted inside a series.
+               scatter() maps results back onto the aligned axis.
+
+Usage:
+    panel = OHLCVPanel.from_frames({"EURUSD": df1, "GBPUSD": df2})
+    compact = panel.compact()
+    state = latest_ema_state(compact)      # one row per symbol
+    states = watchlist_ema_state({symbol: tf_context, ...})   # per timeframe
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .ema import EmaPosition, EmaSlope
+from .entry.entry_candle import entry_candle_signals
+
+FIELDS: Tuple[str, ...] = ("open", "high", "low", "close", "volume")
+
+# Index = code in latest_ema_state() output
+SLOPE_CODES: Tuple[EmaSlope, ...] = tuple(EmaSlope)
+POSITION_CODES: Tuple[EmaPosition, ...] = tuple(EmaPosition)
+
+# =========================
+# ALIGNED PANEL
+# =========================
+
+class OHLCVPanel:
+    """
+    data:  (symbols, time, fields) float64, C-contiguous, NaN if missing
+    mask:  (symbols, time) bool, True where the symbol has a bar
+    times: (time,) int64 ns UTC, sorted union of all symbols' bars
+    """
+    __slots__ = ("symbols", "fields", "times", "data", "mask")
+
+    def __init__(
+        self,
+        symbols: List[str],
+        fields: Tuple[str, ...],
+        times: np.ndarray,
+        data: np.ndarray,
+        mask: np.ndarray
+    ):
+        self.symbols = symbols
+        self.fields = fields
+        self.times = times
+        self.data = data
+        self.mask = mask
+
+    @classmethod
+    def from_frames(
+        cls,
+        frames: Dict[str, pd.DataFrame],
+        fields: Sequence[str] = FIELDS
+    ) -> "OHLCVPanel":
+        """{symbol: standardized df} -> panel (one pass per symbol)."""
+        symbols = list(frames)
+        fields = tuple(fields)
+        stamps = {
+            symbol: df.index.as_unit("ns").asi8
+            for symbol, df in frames.items()
+        }
+        times = np.unique(np.concatenate(list(stamps.values()))) if stamps else np.empty(0, np.int64)
+
+        data = np.full((len(symbols), len(times), len(fields)), np.nan)
+        mask = np.zeros((len(symbols), len(times)), dtype=bool)
+
+        for s, symbol in enumerate(symbols):
+            positions = np.searchsorted(times, stamps[symbol])
+            data[s, positions] = frames[symbol][list(fields)].to_numpy(dtype=float)
+            mask[s, positions] = True
+
+        return cls(symbols, fields, times, data, mask)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return pd.DatetimeIndex(pd.to_datetime(self.times, unit="ns", utc=True), name="time")
+
+    def field(self, name: str) -> np.ndarray:
+        """(symbols, time) view of one field."""
+        return self.data[:, :, self.fields.index(name)]
+
+    def to_frame(self, symbol: str) -> pd.DataFrame:
+        """The symbol's present bars as a standardized DataFrame."""
+        s = self.symbols.index(symbol)
+        present = self.mask[s]
+        return pd.DataFrame(
+            self.data[s, present], columns=list(self.fields), index=self.index[present]
+        )
+
+    def compact(self) -> "CompactPanel":
+        """Left-justified copy (see module docstring)."""
+        lengths = self.mask.sum(axis=1)
+        # Stable sort puts each row's present columns first, in time order
+        order = np.argsort(~self.mask, axis=1, kind="stable")
+        valid = np.arange(self.mask.shape[1]) < lengths[:, None]
+
+        data = np.take_along_axis(self.data, order[:, :, None], axis=1)
+        data[~valid] = np.nan
+        positions = np.where(valid, order, -1)
+
+        return CompactPanel(self.symbols, self.fields, self.times, data, lengths, positions)
+
+# =========================
+# COMPACT PANEL
+# =========================
+
+class CompactPanel:
+    """
+    data:      (symbols, bars, fields), row s holds lengths[s] bars from
+               column 0, NaN afterwards
+    positions: (symbols, bars) column in the aligned time axis, -1 pad
+    """
+    __slots__ = ("symbols", "fields", "times", "data", "lengths", "positions")
+
+    def __init__(
+        self,
+        symbols: List[str],
+        fields: Tuple[str, ...],
+        times: np.ndarray,
+        data: np.ndarray,
+        lengths: np.ndarray,
+        positions: np.ndarray
+    ):
+        self.symbols = symbols
+        self.fields = fields
+        self.times = times
+        self.data = data
+        self.lengths = lengths
+        self.positions = positions
+
+    def field(self, name: str) -> np.ndarray:
+        return self.data[:, :, self.fields.index(name)]
+
+    @property
+    def valid(self) -> np.ndarray:
+        return self.positions >= 0
+
+    def at(self, values: np.ndarray, offset: int = 1) -> np.ndarray:
+        """
+        values[s, lengths[s] - offset] per symbol (offset=1: latest bar);
+        NaN where the symbol has fewer bars.
+        """
+        columns = self.lengths - offset
+        out = np.full(len(self.symbols), np.nan)
+        ok = columns >= 0
+        out[ok] = values[np.flatnonzero(ok), columns[ok]]
+        return out
+
+    def scatter(self, values: np.ndarray, fill=np.nan) -> np.ndarray:
+        """(symbols, bars) compact values -> (symbols, time) aligned."""
+        out = np.full((len(self.symbols), len(self.times)), fill, dtype=np.result_type(values, type(fill)))
+        rows, columns = np.nonzero(self.valid)
+        out[rows, self.positions[rows, columns]] = values[rows, columns]
+        return out
+
+# =========================
+# VECTORIZED INDICATORS
+# =========================
+
+def _by_column(values: np.ndarray) -> pd.DataFrame:
+    """(symbols, bars) -> bars x symbols frame for pandas' column-wise kernels."""
+    return pd.DataFrame(values.T)
+
+
+def panel_ema(panel: CompactPanel, period: int = 50, field: str = "close") -> np.ndarray:
+    """ema.calculate_ema() (pandas backend) for every symbol: (symbols, bars)."""
+    ema = _by_column(panel.field(field)).ewm(span=period, adjust=False).mean().to_numpy().T
+    return np.where(panel.valid, ema, np.nan)
+
+
+def panel_atr(panel: CompactPanel, period: int = 14) -> np.ndarray:
+    """ema.calculate_atr() (pandas backend) for every symbol: (symbols, bars)."""
+    high = panel.field("high")
+    low = panel.field("low")
+    prev_close = np.full_like(high, np.nan)
+    prev_close[:, 1:] = panel.field("close")[:, :-1]
+
+    # fmax skips NaN like DataFrame.max(axis=1)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    true_range = np.where(panel.valid, true_range, np.nan)
+    return _by_column(true_range).rolling(period).mean().to_numpy().T
+
+
+def panel_pivots(panel: CompactPanel, lookback: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    structure.detect_swing_candidates() masks for every symbol:
+    (is_pivot_high, is_pivot_low), each (symbols, bars).
+    """
+    high = panel.field("high")
+    low = panel.field("low")
+    bars = high.shape[1]
+
+    is_high = panel.valid.copy()
+    is_low = panel.valid.copy()
+
+    for i in range(1, lookback + 1):
+        if i >= bars:
+            is_high[:] = False
+            is_low[:] = False
+            break
+        # NaN neighbours (series edges / padding) compare False, like shift()
+        is_high[:, i:] &= high[:, i:] > high[:, :-i]
+        is_high[:, :i] = False
+        is_high[:, :-i] &= high[:, :-i] > high[:, i:]
+        is_low[:, i:] &= low[:, i:] < low[:, :-i]
+        is_low[:, :i] = False
+        is_low[:, :-i] &= low[:, :-i] < low[:, i:]
+
+    # Last `lookback` bars of each series have no right neighbours
+    edge = np.arange(bars) >= (panel.lengths[:, None] - lookback)
+    is_high &= ~edge
+    is_low &= ~edge
+    return is_high, is_low
+
+
+def panel_entry_signals(
+    panel: CompactPanel,
+    direction: np.ndarray,
+    at_key_level: np.ndarray | bool = False
+) -> np.ndarray:
+    """
+    Entry candle signal codes for every bar of every symbol.
+    direction: (symbols,) or (symbols, bars) of +1 / -1 / 0.
+    """
+    direction = np.asarray(direction)
+    if direction.ndim == 1:
+        direction = direction[:, None]
+    return entry_candle_signals(
+        panel.field("open"), panel.field("high"),
+        panel.field("low"), panel.field("close"),
+        direction, at_key_level
+    )
+
+# =========================
+# WATCHLIST BATCH
+# =========================
+
+def latest_ema_state(
+    panel: CompactPanel,
+    ema_period: int = 50,
+    slope_lookback: int = 3,
+    slope_factor: float = 0.15,
+    zone_atr_factor: float = 0.2,
+    ema: Optional[np.ndarray] = None,
+    atr: Optional[np.ndarray] = None
+) -> pd.DataFrame:
+    """
+    ema.detect_slope() / detect_position() at the latest bar of every
+    symbol in one call. One row per symbol; `valid` follows
+    analyze_ema()'s minimum history (ema_period + 20 bars).
+    """
+    if ema is None:
+        ema = panel_ema(panel, ema_period)
+    if atr is None:
+        atr = panel_atr(panel)
+    close = panel.field("close")
+
+    ema_now, ema_prev = panel.at(ema, 1), panel.at(ema, 2)
+    close_now, close_prev = panel.at(close, 1), panel.at(close, 2)
+    atr_now = panel.at(atr, 1)
+
+    # detect_slope: delta over ema[-1] - ema[-lookback], ATR-normalized
+    with np.errstate(invalid="ignore", divide="ignore"):
+        normalized = (ema_now - panel.at(ema, slope_lookback)) / atr_now
+    slope_ok = (panel.lengths >= slope_lookback + 1) & ~np.isnan(atr_now)
+    slope = np.select(
+        [slope_ok & (normalized > slope_factor), slope_ok & (normalized < -slope_factor)],
+        [SLOPE_CODES.index(EmaSlope.UP), SLOPE_CODES.index(EmaSlope.DOWN)],
+        default=SLOPE_CODES.index(EmaSlope.FLAT),
+    )
+
+    # detect_position: zone, then crosses, then side
+    position = np.select(
+        [
+            np.abs(close_now - ema_now) <= atr_now * zone_atr_factor,
+            (close_prev < ema_prev) & (close_now > ema_now),
+            (close_prev > ema_prev) & (close_now < ema_now),
+            close_now > ema_now,
+        ],
+        [
+            POSITION_CODES.index(EmaPosition.ON_ZONE),
+            POSITION_CODES.index(EmaPosition.CROSS_UP),
+            POSITION_CODES.index(EmaPosition.CROSS_DOWN),
+            POSITION_CODES.index(EmaPosition.ABOVE),
+        ],
+        default=POSITION_CODES.index(EmaPosition.BELOW),
+    )
+
+    return pd.DataFrame(
+        {
+            "valid": panel.lengths >= ema_period + 20,
+            "bars": panel.lengths,
+            "ema": ema_now,
+            "atr": atr_now,
+            "slope": pd.Categorical.from_codes(slope, [s.value for s in SLOPE_CODES]),
+            "position": pd.Categorical.from_codes(position, [p.value for p in POSITION_CODES]),
+        },
+        index=pd.Index(panel.symbols, name="symbol"),
+    )
+
+
+def panel_from_contexts(contexts: Dict[str, Dict], label: str) -> OHLCVPanel:
+    """
+    One timeframe of the whole watchlist's contexts -> panel of the
+    valid frames. contexts: {symbol: fetch_multi_timeframe() result}
+    or {symbol: build_market_context() result}.
+    """
+    frames = {}
+    for symbol, ctx in contexts.items():
+        info = ctx.get("timeframes", ctx).get(label)
+        if info is not None and info["valid"] and info["df"] is not None:
+            frames[symbol] = info["df"]
+    return OHLCVPanel.from_frames(frames)
+
+
+def watchlist_ema_state(contexts: Dict[str, Dict], **options) -> Dict[str, pd.DataFrame]:
+    """
+    {timeframe: latest_ema_state()} of the whole watchlist: one
+    vectorized pass per timeframe instead of one per symbol.
+    options: forwarded to latest_ema_state() (ema_period, ...).
+    """
+    labels = dict.fromkeys(
+        label for ctx in contexts.values() for label in ctx.get("timeframes", ctx)
+    )
+    states = {}
+    for label in labels:
+        panel = panel_from_contexts(contexts, label)
+        if panel.symbols:
+            states[label] = latest_ema_state(panel.compact(), **options)
+    return states
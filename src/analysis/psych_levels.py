@@ -4,44 +4,234 @@ psych_levels.py
 Psychological Price Levels Detector
 
 Purpose:
-- Detect round-number levels
+- Per-symbol round-number grid: big figure (100 pips), half (50 pips)
+  and quarter (25 pips), scaled by the symbol's pip size
+  (EURUSD 1.2000 / USDJPY 150.00 / XAUUSD 2010.0 / USOIL 75.00)
+- Nearest level + distance for a whole price series in one
+  np.searchsorted call (backtests, AOI scoring)
 - Evaluate proximity of price to key levels
 """
 
 from enum import Enum
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from ..symbol_registry import registry as symbol_registry
 
 class PsychLevelType(Enum):
     BIG = "big_round"     # 1.2000
     HALF = "half_round"   # 1.2050
     QUARTER = "quarter"   # 1.2025
 
-def detect_psych_levels(
-    price: float,
-    pip_size: float = 0.0001
-) -> List[Dict]:
+# Index = type code in the arrays below; lower code = stronger level
+LEVEL_TYPE_CODES: Tuple[PsychLevelType, ...] = (
+    PsychLevelType.BIG,
+    PsychLevelType.HALF,
+    PsychLevelType.QUARTER,
+)
+
+# =========================
+# SYMBOL METADATA
+# =========================
+
+DEFAULT_PIP_SIZE = 0.0001
+BIG_FIGURE_PIPS = 100
+
+# Prefix / substring -> pip size, checked before MT5 digits
+PIP_SIZE_OVERRIDES = (
+    ("XAU", 0.1),
+    ("XAG", 0.01),
+    ("OIL", 0.01),
+    ("WTI", 0.01),
+    ("BRENT", 0.01),
+    ("JPY", 0.01),
+)
+
+
+def pip_size_for(symbol: str, digits: Optional[int] = None) -> float:
     """
-    Return nearby psychological levels.
+    Pip size of a symbol: known instruments first, then MT5 `digits`
+    (5 / 3 digit quotes have a fractional pip, see symbol_registry),
+    then DEFAULT_PIP_SIZE.
     """
+    name = symbol.upper()
+    for pattern, pip_size in PIP_SIZE_OVERRIDES:
+        if pattern in name:
+            return pip_size
+    if digits is not None:
+        return 10.0 ** -(digits - 1 if digits in (3, 5) else digits)
+    return DEFAULT_PIP_SIZE
+
+
+class LevelGrid(NamedTuple):
+    pip_size: float
+    step: float        # quarter-figure spacing (finest level)
+    decimals: int      # price precision used to round level prices
+
+    @property
+    def big(self) -> float:
+        return self.step * 4
 
-    levels = []
 
-    base = round(price / pip_size) * pip_size
+def make_grid(pip_size: float) -> LevelGrid:
+    decimals = max(0, int(round(-np.log10(pip_size)))) + 1
+    return LevelGrid(pip_size, BIG_FIGURE_PIPS * pip_size / 4, decimals)
 
-    candidates = [
-        (PsychLevelType.BIG, round(base, 4)),
-        (PsychLevelType.HALF, round(base + 50 * pip_size, 4)),
-        (PsychLevelType.HALF, round(base - 50 * pip_size, 4)),
+
+def level_grid(symbol: str, digits: Optional[int] = None) -> LevelGrid:
+    """Grid of a symbol; digits default to its symbol_registry spec."""
+    if digits is None:
+        digits = symbol_registry.digits(symbol)
+    return _level_grid(symbol, digits)
+
+
+@lru_cache(maxsize=None)
+def _level_grid(symbol: str, digits: Optional[int]) -> LevelGrid:
+    return make_grid(pip_size_for(symbol, digits))
+
+# =========================
+# VECTORIZED GRID
+# =========================
+
+def grid_levels(
+    grid: LevelGrid,
+    low: float,
+    high: float,
+    max_type: PsychLevelType = PsychLevelType.QUARTER
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted level prices covering [low, high] (padded by one big figure
+    each side) and their type codes. max_type=HALF drops quarters, BIG keeps only
+    big figures.
+    """
+    k = np.arange(np.floor(low / grid.step) - 4, np.ceil(high / grid.step) + 5).astype(np.int64)
+    # k % 4 == 0 -> big, == 2 -> half, odd -> quarter
+    codes = np.where(k % 4 == 0, 0, np.where(k % 2 == 0, 1, 2)).astype(np.int8)
+
+    keep = codes <= LEVEL_TYPE_CODES.index(max_type)
+    return np.round(k[keep] * grid.step, grid.decimals), codes[keep]
+
+
+def nearest_levels(
+    prices: np.ndarray,
+    grid: LevelGrid,
+    max_type: PsychLevelType = PsychLevelType.QUARTER
+) -> Dict[str, np.ndarray]:
+    """
+    Nearest level for every price:
+    {"level": price, "type": type code, "distance_pips": abs distance}
+    """
+    prices = np.asarray(prices, dtype=float)
+    finite = prices[np.isfinite(prices)]
+    if len(finite) == 0:
+        nan = np.full(prices.shape, np.nan)
+        return {"level": nan, "type": np.full(prices.shape, -1, dtype=np.int8), "distance_pips": nan}
+
+    levels, codes = grid_levels(grid, finite.min(), finite.max(), max_type)
+
+    right = np.clip(np.searchsorted(levels, prices), 1, len(levels) - 1)
+    left = right - 1
+    pick = np.where(prices - levels[left] <= levels[right] - prices, left, right)
+
+    return {
+        "level": levels[pick],
+        "type": codes[pick],
+        "distance_pips": np.abs(prices - levels[pick]) / grid.pip_size,
+    }
+
+
+def band_level_distance(
+    lows: np.ndarray,
+    highs: np.ndarray,
+    grid: LevelGrid,
+    max_type: PsychLevelType = PsychLevelType.HALF
+) -> Dict[str, np.ndarray]:
+    """
+    Distance (pips) from each [low, high] band (e.g. AOI zones) to the
+    nearest level; 0 when a level lies inside the band.
+    """
+    lows = np.asarray(lows, dtype=float)
+    highs = np.asarray(highs, dtype=float)
+    if len(lows) == 0:
+        return {"level": lows, "type": np.empty(0, dtype=np.int8), "distance_pips": lows}
+
+    levels, codes = grid_levels(grid, lows.min(), highs.max(), max_type)
+
+    # First level >= low: inside the band if it is also <= high
+    above = np.clip(np.searchsorted(levels, lows), 1, len(levels) - 1)
+    below = above - 1
+    inside = levels[above] <= highs
+
+    dist_above = np.where(inside, 0.0, levels[above] - highs)
+    dist_below = lows - levels[below]
+    pick = np.where(inside | (dist_above <= dist_below), above, below)
+
+    return {
+        "level": levels[pick],
+        "type": codes[pick],
+        "distance_pips": np.minimum(dist_above, dist_below) / grid.pip_size,
+    }
+
+def aoi_level_proximity(
+    aois: List[Dict],
+    symbol: str,
+    max_type: PsychLevelType = PsychLevelType.HALF
+) -> List[Dict]:
+    """
+    Nearest big / half level of every AOI zone (aoi.build_aoi() dicts),
+    in input order – the `psych_level` argument of aoi_score.score_aoi().
+    """
+    proximity = band_level_distance(
+        [zone["low"] for zone in aois],
+        [zone["high"] for zone in aois],
+        level_grid(symbol),
+        max_type
+    )
+    return [
+        {
+            "type": LEVEL_TYPE_CODES[code].value,
+            "price": float(level),
+            "distance_pips": float(distance),
+        }
+        for level, code, distance in zip(
+            proximity["level"], proximity["type"], proximity["distance_pips"]
+        )
     ]
 
-    for level_type, level_price in candidates:
-        distance_pips = abs(price - level_price) / pip_size
+# =========================
+# SINGLE PRICE
+# =========================
+
+def detect_psych_levels(
+    price: float,
+    pip_size: Optional[float] = None,
+    symbol: Optional[str] = None,
+    max_distance_pips: float = 15
+) -> List[Dict]:
+    """
+    Return nearby psychological levels (closest first).
+
+    symbol: selects the grid (pip size) – preferred over pip_size.
+    """
+
+    if symbol is not None:
+        grid = level_grid(symbol)
+    else:
+        grid = make_grid(pip_size or DEFAULT_PIP_SIZE)
 
-        if distance_pips <= 15:
-            levels.append({
-                "type": level_type.value,
-                "price": level_price,
-                "distance_pips": distance_pips
-            })
+    levels, codes = grid_levels(grid, price, price)
+    distances = np.abs(price - levels) / grid.pip_size
 
-    return levels
+    return [
+        {
+            "type": LEVEL_TYPE_CODES[code].value,
+            "price": float(level),
+            "distance_pips": float(distance),
+        }
+        for level, code, distance in sorted(
+            zip(levels, codes, distances), key=lambda item: item[2]
+        )
+        if distance <= max_distance_pips
+    ]
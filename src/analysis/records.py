@@ -0,0 +1,300 @@
+"""
+records.py
+---------------------------------
+Compact Result Records & Binary Codec
+
+Purpose:
+- Typed, __slots__-based record for one confluence.run_analysis() result
+- Enums stored as small int codes, reason strings as a bitmask
+- Fixed-layout binary codec (struct) for whole scan results:
+  lossless round-trip, 17 bytes per timeframe result (+2 framing)
+- Records pickle as their packed bytes, so they cross the process pool
+  cheaply
+
+Layout (little-endian, 17 bytes per record):
+    timeframe u8 | bias u8 | bos u8 | swing_count u32 |
+    slope u8 | position u8 | rejection u8 | score i16 |
+    confidence u8 | reasons u32
+
+Scan layout:
+    b"TCR1" | n_symbols u16 |
+    per symbol: name_len u8 | name | n_tf u8 |
+        per timeframe: present u8 (0 -> timeframe u8 only, result None)
+                       record (17 bytes)
+"""
+
+import struct
+from typing import Dict, List, Optional, Tuple
+
+from .ema import EmaPosition, EmaRejection, EmaSlope
+from .ema_score import EmaConfidence
+from .structure import StructureBias
+
+# =========================
+# CODE TABLES
+# =========================
+
+# Index = code. Append only: codes are persisted.
+TIMEFRAME_CODES: Tuple[str, ...] = ("Weekly", "Daily", "4H", "1H", "30m", "3H", "2H", "45m")
+
+BIAS_CODES: Tuple[str, ...] = tuple(b.value for b in StructureBias)
+
+# 0 = "n/a" (EMA invalid)
+SLOPE_CODES: Tuple[str, ...] = ("n/a",) + tuple(s.value for s in EmaSlope)
+POSITION_CODES: Tuple[str, ...] = ("n/a",) + tuple(p.value for p in EmaPosition)
+REJECTION_CODES: Tuple[str, ...] = ("n/a",) + tuple(r.value for r in EmaRejection)
+
+# 0 = "none" (EMA invalid in confluence.py)
+CONFIDENCE_CODES: Tuple[object, ...] = ("none",) + tuple(EmaConfidence)
+
+# Bit i = REASON_CODES[i]. Ordered as score_ema / score_aoi emit them, so a
+# decoded mask reproduces the original list order. Append only.
+REASON_CODES: Tuple[str, ...] = (
+    # ema_score.score_ema
+    "ema_invalid",
+    "ema_slope_up",
+    "ema_slope_down",
+    "ema_flat",
+    "price_above_ema",
+    "price_below_ema",
+    "bullish_rejection",
+    "bearish_rejection",
+    "ema_aligned_with_bull_structure",
+    "ema_aligned_with_bear_structure",
+    "structure_not_clean",
+    "ema_structure_conflict",
+    "ema_inside_htf_aoi",
+    # aoi_score.score_aoi
+    "fresh_aoi",
+    "aoi_tested_once",
+    "aoi_over_tested",
+    "strong_reaction_from_aoi",
+    "weak_reaction_from_aoi",
+    "htf_aoi",
+    "ltf_aoi",
+    "range_structure_penalty",
+    "demand_aligned_with_bull_structure",
+    "supply_aligned_with_bear_structure",
+    "aoi_conflicts_with_structure",
+    "ema_rejection_inside_aoi",
+    "aoi_at_psych_level",
+)
+
+
+def _index(table: Tuple) -> Dict:
+    return {value: code for code, value in enumerate(table)}
+
+
+_TIMEFRAME = _index(TIMEFRAME_CODES)
+_BIAS = _index(BIAS_CODES)
+_SLOPE = _index(SLOPE_CODES)
+_POSITION = _index(POSITION_CODES)
+_REJECTION = _index(REJECTION_CODES)
+_CONFIDENCE = _index(CONFIDENCE_CODES)
+_REASON = _index(REASON_CODES)
+
+
+def encode_reasons(reasons: List[str]) -> int:
+    """
+    Reasons must appear in REASON_CODES order (as the scorers emit them),
+    otherwise the bitmask could not restore the list losslessly.
+    """
+    mask = 0
+    last = -1
+    for reason in reasons:
+        bit = _REASON[reason]
+        if bit <= last:
+            raise ValueError(f"Reasons not representable as a bitmask: {reasons}")
+        mask |= 1 << bit
+        last = bit
+    return mask
+
+
+def decode_reasons(mask: int) -> List[str]:
+    reasons = []
+    while mask:
+        low = mask & -mask
+        reasons.append(REASON_CODES[low.bit_length() - 1])
+        mask ^= low
+    return reasons
+
+# =========================
+# FIELD CONVERSION
+# =========================
+
+_RECORD = struct.Struct("<BBBIBBBhBI")
+
+
+def _codes(result: Dict) -> tuple:
+    """run_analysis() dict -> record field tuple (TimeframeRecord.__slots__ order)."""
+    structure = result["structure"]
+    ema = result["ema"]
+    confluence = result["confluence"]
+    return (
+        _TIMEFRAME[result["timeframe"]],
+        _BIAS[structure["bias"]],
+        bool(structure["bos"]),
+        structure["swing_count"],
+        _SLOPE[ema["slope"]],
+        _POSITION[ema["position"]],
+        _REJECTION[ema["rejection"]],
+        int(confluence["score_total"]),
+        _CONFIDENCE[confluence["confidence"]],
+        encode_reasons(confluence["reasons"]),
+    )
+
+
+def _result(fields: tuple) -> Dict:
+    """Record field tuple -> run_analysis()-shaped dict."""
+    (timeframe, bias, bos, swing_count, slope, position,
+     rejection, score, confidence, reasons) = fields
+    return {
+        "timeframe": TIMEFRAME_CODES[timeframe],
+        "structure": {
+            "bias": BIAS_CODES[bias],
+            "bos": bool(bos),
+            "swing_count": swing_count,
+        },
+        "ema": {
+            "slope": SLOPE_CODES[slope],
+            "position": POSITION_CODES[position],
+            "rejection": REJECTION_CODES[rejection],
+        },
+        "confluence": {
+            "score_total": score,
+            "confidence": CONFIDENCE_CODES[confidence],
+            "reasons": decode_reasons(reasons),
+        },
+    }
+
+# =========================
+# RECORD
+# =========================
+
+class TimeframeRecord:
+    """
+    One run_analysis() result in int-coded form.
+    """
+    __slots__ = (
+        "timeframe", "bias", "bos", "swing_count",
+        "slope", "position", "rejection",
+        "score", "confidence", "reasons",
+    )
+
+    def __init__(
+        self, timeframe: int, bias: int, bos: bool, swing_count: int,
+        slope: int, position: int, rejection: int,
+        score: int, confidence: int, reasons: int
+    ):
+        self.timeframe = timeframe
+        self.bias = bias
+        self.bos = bos
+        self.swing_count = swing_count
+        self.slope = slope
+        self.position = position
+        self.rejection = rejection
+        self.score = score
+        self.confidence = confidence
+        self.reasons = reasons
+
+    def _fields(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, TimeframeRecord) and self._fields() == other._fields()
+
+    def __repr__(self):
+        return (
+            f"TimeframeRecord({TIMEFRAME_CODES[self.timeframe]} "
+            f"{BIAS_CODES[self.bias]} score={self.score})"
+        )
+
+    # -------------------------
+    # dict <-> record
+    # -------------------------
+
+    @classmethod
+    def from_result(cls, result: Dict) -> "TimeframeRecord":
+        """Build from confluence.run_analysis() output."""
+        return cls(*_codes(result))
+
+    def to_result(self) -> Dict:
+        """Inverse of from_result(): same shape as run_analysis()."""
+        return _result(self._fields())
+
+    # -------------------------
+    # bytes <-> record
+    # -------------------------
+
+    def pack(self) -> bytes:
+        return _RECORD.pack(*self._fields())
+
+    @classmethod
+    def unpack(cls, data: bytes, offset: int = 0) -> "TimeframeRecord":
+        fields = _RECORD.unpack_from(data, offset)
+        record = cls(*fields)
+        record.bos = bool(record.bos)
+        return record
+
+    def __reduce__(self):
+        return (TimeframeRecord.unpack, (self.pack(),))
+
+# =========================
+# SCAN CODEC
+# =========================
+
+MAGIC = b"TCR1"
+_HEADER = struct.Struct("<4sH")
+_U8 = struct.Struct("<B")
+_TF_ENTRY = struct.Struct("<BB")  # timeframe, present
+
+
+def encode_scan(scan: Dict[str, Dict[str, Optional[Dict]]]) -> bytes:
+    """
+    {symbol: {timeframe: run_analysis() result | None}} -> bytes
+    """
+    parts = [_HEADER.pack(MAGIC, len(scan))]
+
+    for symbol, results in scan.items():
+        name = symbol.encode("ascii")
+        parts.append(_U8.pack(len(name)))
+        parts.append(name)
+        parts.append(_U8.pack(len(results)))
+
+        for label, result in results.items():
+            parts.append(_TF_ENTRY.pack(_TIMEFRAME[label], result is not None))
+            if result is not None:
+                parts.append(_RECORD.pack(*_codes(result)))
+
+    return b"".join(parts)
+
+
+def decode_scan(data: bytes) -> Dict[str, Dict[str, Optional[Dict]]]:
+    magic, n_symbols = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Not an encoded scan")
+
+    offset = _HEADER.size
+    size = _RECORD.size
+    scan = {}
+
+    for _ in range(n_symbols):
+        (name_len,) = _U8.unpack_from(data, offset)
+        offset += 1
+        symbol = data[offset:offset + name_len].decode("ascii")
+        offset += name_len
+        (n_tf,) = _U8.unpack_from(data, offset)
+        offset += 1
+
+        results = {}
+        for _ in range(n_tf):
+            code, present = _TF_ENTRY.unpack_from(data, offset)
+            offset += _TF_ENTRY.size
+            if present:
+                results[TIMEFRAME_CODES[code]] = _result(_RECORD.unpack_from(data, offset))
+                offset += size
+            else:
+                results[TIMEFRAME_CODES[code]] = None
+        scan[symbol] = results
+
+    return scan
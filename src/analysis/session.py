@@ -2,10 +2,27 @@
 session.py
 ---------------------------------
 Market Session Detection
+
+Purpose:
+- Label every bar of a history with its trading session in one
+  vectorized pass (DatetimeIndex or int64 epoch seconds)
+- Session hours are configured in each market's LOCAL time, so DST
+  shifts (London / New York) are handled by the timezone database
+- Per-session statistics (true range, range, tick volume) per symbol,
+  looked up in O(1) by the volume filter and scoring
+
+Default hours reproduce the historical UTC split in winter
+(Asia 00-07, London 07-13, New York 13-20 UTC) and move one hour
+earlier in UTC when London / New York are on summer time.
+Where sessions overlap, the later one in SESSION_WINDOWS wins.
 """
 
 from enum import Enum
 from datetime import datetime, time
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
 
 class TradingSession(Enum):
     ASIA = "asia"
@@ -13,16 +30,180 @@ class TradingSession(Enum):
     NEW_YORK = "new_york"
     DEAD = "dead_zone"
 
+# Index = label code returned by label_sessions()
+SESSION_CODES: Tuple[TradingSession, ...] = (
+    TradingSession.DEAD,
+    TradingSession.ASIA,
+    TradingSession.LONDON,
+    TradingSession.NEW_YORK,
+)
+_SESSION_CODE = {session: code for code, session in enumerate(SESSION_CODES)}
+
+# =========================
+# CONFIG
+# =========================
+
+class SessionWindow(NamedTuple):
+    session: TradingSession
+    tz: str
+    start: time      # local, inclusive
+    end: time        # local, exclusive (end < start wraps midnight)
+
+
+SESSION_WINDOWS: Tuple[SessionWindow, ...] = (
+    SessionWindow(TradingSession.ASIA, "Asia/Tokyo", time(9, 0), time(16, 0)),
+    SessionWindow(TradingSession.LONDON, "Europe/London", time(7, 0), time(13, 0)),
+    SessionWindow(TradingSession.NEW_YORK, "America/New_York", time(8, 0), time(15, 0)),
+)
+
+# =========================
+# LABELING
+# =========================
+
+TimeLike = Union[pd.DatetimeIndex, np.ndarray, Sequence[int]]
+
+
+def _as_utc_index(times: TimeLike, offset_seconds: int = 0) -> pd.DatetimeIndex:
+    """
+    DatetimeIndex (naive = UTC) or int64 epoch seconds -> UTC index.
+    offset_seconds: broker server offset to remove (see
+    data_engine.server_time_offset) when bar times are server-clock.
+    """
+    if isinstance(times, pd.DatetimeIndex):
+        index = times.tz_localize("UTC") if times.tz is None else times.tz_convert("UTC")
+    else:
+        index = pd.to_datetime(np.asarray(times, dtype=np.int64), unit="s", utc=True)
+    if offset_seconds:
+        index = index - pd.Timedelta(seconds=offset_seconds)
+    return pd.DatetimeIndex(index)
+
+
+def label_sessions(
+    times: TimeLike,
+    windows: Sequence[SessionWindow] = SESSION_WINDOWS,
+    offset_seconds: int = 0
+) -> np.ndarray:
+    """
+    Session code (index into SESSION_CODES) for every timestamp, int8.
+    Bars outside every window are DEAD (code 0).
+    """
+    index = _as_utc_index(times, offset_seconds)
+    codes = np.zeros(len(index), dtype=np.int8)
+    local_minutes = {}
+
+    for window in windows:
+        minutes = local_minutes.get(window.tz)
+        if minutes is None:
+            local = index.tz_convert(window.tz)
+            minutes = np.asarray(local.hour * 60 + local.minute)
+            local_minutes[window.tz] = minutes
+
+        start = window.start.hour * 60 + window.start.minute
+        end = window.end.hour * 60 + window.end.minute
+        if start <= end:
+            inside = (minutes >= start) & (minutes < end)
+        else:
+            inside = (minutes >= start) | (minutes < end)
+        codes[inside] = _SESSION_CODE[window.session]
+
+    return codes
+
+
 def detect_session(timestamp: datetime) -> TradingSession:
-    hour = timestamp.hour
+    """Single-timestamp convenience wrapper around label_sessions()."""
+    code = label_sessions(pd.DatetimeIndex([timestamp]))[0]
+    return SESSION_CODES[code]
+
+# =========================
+# SESSION STATISTICS
+# =========================
+
+class SessionStats:
+    """
+    Per-session means of one symbol / timeframe, indexed by session code.
+    offset_seconds: server offset the bars were labelled with; lookups
+    of new bars must label them the same way.
+    """
+    __slots__ = ("bars", "true_range", "range", "volume", "offset_seconds")
+
+    def __init__(
+        self,
+        bars: np.ndarray,
+        true_range: np.ndarray,
+        range_: np.ndarray,
+        volume: np.ndarray,
+        offset_seconds: int = 0
+    ):
+        self.bars = bars
+        self.true_range = true_range
+        self.range = range_
+        self.volume = volume
+        self.offset_seconds = offset_seconds
+
+    def label(self, times: TimeLike) -> np.ndarray:
+        """label_sessions() with the offset these stats were built with."""
+        return label_sessions(times, offset_seconds=self.offset_seconds)
+
+    def get(self, session: TradingSession) -> Optional[Dict]:
+        """Stats of one session, None when it has no bars."""
+        code = _SESSION_CODE[session]
+        if self.bars[code] == 0:
+            return None
+        return {
+            "bars": int(self.bars[code]),
+            "atr": float(self.true_range[code]),
+            "range": float(self.range[code]),
+            "volume": float(self.volume[code]),
+        }
+
+    def to_dict(self) -> Dict[str, Optional[Dict]]:
+        return {session.value: self.get(session) for session in SESSION_CODES}
+
+
+def session_stats(
+    df: pd.DataFrame,
+    labels: Optional[np.ndarray] = None,
+    offset_seconds: int = 0
+) -> SessionStats:
+    """
+    Mean true range, high-low range and tick volume per session
+    (bincount over session codes – one pass, no per-bar Python).
+    labels: precomputed label_sessions() codes, built with offset_seconds.
+    """
+    if labels is None:
+        labels = label_sessions(df.index, offset_seconds=offset_seconds)
+
+    high = df["high"].to_numpy(dtype=float)
+    low = df["low"].to_numpy(dtype=float)
+    close = df["close"].to_numpy(dtype=float)
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    range_ = high - low
+    volume = df["volume"].to_numpy(dtype=float) if "volume" in df else np.zeros(len(df))
+
+    size = len(SESSION_CODES)
+    bars = np.bincount(labels, minlength=size)
 
-    if 0 <= hour < 7:
-        return TradingSession.ASIA
+    def mean(values: np.ndarray) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.bincount(labels, weights=values, minlength=size) / bars
 
-    if 7 <= hour < 13:
-        return TradingSession.LONDON
+    return SessionStats(
+        bars=bars,
+        true_range=mean(true_range),
+        range_=mean(range_),
+        volume=mean(volume),
+        offset_seconds=offset_seconds,
+    )
 
-    if 13 <= hour < 20:
-        return TradingSession.NEW_YORK
 
-    return TradingSession.DEAD
+def build_session_stats(
+    frames: Dict[str, pd.DataFrame],
+    offset_seconds: int = 0
+) -> Dict[str, SessionStats]:
+    """{symbol: df} -> {symbol: SessionStats}, computed once per history."""
+    return {
+        symbol: session_stats(df, offset_seconds=offset_seconds)
+        for symbol, df in frames.items()
+    }
@@ -20,6 +20,8 @@ from enum import Enum
 import pandas as pd
 import numpy as np
 
+from .kernels import zigzag
+
 class StructureBias(Enum):
     BULLISH = "bullish"
     BEARISH = "bearish"
@@ -38,16 +40,15 @@ class SwingPoint:
     def __repr__(self):
         return f"{self.kind.upper()} @ {self.price:.5f}"
 
-def detect_swings(
+def swing_candidate_arrays(
     df: pd.DataFrame,
     lookback: int = 5
-) -> list[SwingPoint]:
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Detect swing highs and lows using vectorized rolling window logic.
-    Includes 'ZigZag' logic to ensure strictly alternating Highs and Lows.
+    Raw pivot highs / lows as time-sorted arrays:
+    (bar positions, prices, is_high). A bar that is both a pivot high
+    and a pivot low yields the high first.
     """
-    df = df.copy()
-    
     # 1. Vectorized ID of local Max/Min
     # Rolling max/min with center=True looks ahead and behind
     # But Pandas rolling(center=True) is tricky with lookahead in a live loop context.
@@ -64,28 +65,50 @@ def detect_swings(
         is_pivot_high &= (df['high'] > df['high'].shift(i)) & (df['high'] > df['high'].shift(-i))
         is_pivot_low &= (df['low'] < df['low'].shift(i)) & (df['low'] < df['low'].shift(-i))
 
-    # Extract potential points
-    high_indices = df.index[is_pivot_high]
-    low_indices = df.index[is_pivot_low]
-    
-    candidates = []
-    
-    for idx in high_indices:
-        candidates.append(SwingPoint(idx, df.loc[idx, 'high'], 'high'))
-        
-    for idx in low_indices:
-        candidates.append(SwingPoint(idx, df.loc[idx, 'low'], 'low'))
-        
-    # Sort by time
-    candidates.sort(key=lambda s: s.index)
-    
+    high_pos = np.flatnonzero(np.asarray(is_pivot_high))
+    low_pos = np.flatnonzero(np.asarray(is_pivot_low))
+
+    positions = np.concatenate([high_pos, low_pos])
+    is_high = np.concatenate([np.ones(len(high_pos), bool), np.zeros(len(low_pos), bool)])
+    prices = np.concatenate([
+        df['high'].to_numpy()[high_pos], df['low'].to_numpy()[low_pos]
+    ]).astype(float)
+
+    # Sort by time (stable: highs stay ahead of lows on the same bar)
+    order = np.argsort(positions, kind="stable")
+    return positions[order], prices[order], is_high[order]
+
+
+def _swing_points(index, positions, prices, is_high) -> list[SwingPoint]:
+    return [
+        SwingPoint(index[p], price, 'high' if high else 'low')
+        for p, price, high in zip(positions.tolist(), prices, is_high.tolist())
+    ]
+
+
+def detect_swing_candidates(
+    df: pd.DataFrame,
+    lookback: int = 5
+) -> list[SwingPoint]:
+    """
+    Detect raw pivot highs / lows (before ZigZag cleanup), sorted by time.
+
+    A pivot at bar i depends only on bars i-lookback .. i+lookback, so the
+    candidates of a prefix df.iloc[:n] are exactly the candidates of the
+    full frame whose position is < n - lookback. Callers that evaluate many
+    prefixes (walk-forward windows) compute this once and slice.
+    """
+    return _swing_points(df.index, *swing_candidate_arrays(df, lookback))
+
+def clean_swings(candidates: list[SwingPoint]) -> list[SwingPoint]:
+    """
+    Enforce alternating High/Low (ZigZag Logic) on time-sorted candidates.
+    If consecutive Highs: Keep the Higher one
+    If consecutive Lows: Keep the Lower one
+    """
     if not candidates:
         return []
 
-    # 2. Cleanup: Enforce Alternating High/Low (ZigZag Logic)
-    # If consecutive Highs: Keep the Higher one
-    # If consecutive Lows: Keep the Lower one
-    
     clean_swings = [candidates[0]]
     
     for current in candidates[1:]:
@@ -105,6 +128,19 @@ def detect_swings(
             
     return clean_swings
 
+def detect_swings(
+    df: pd.DataFrame,
+    lookback: int = 5
+) -> list[SwingPoint]:
+    """
+    Detect swing highs and lows using vectorized rolling window logic.
+    Includes 'ZigZag' logic to ensure strictly alternating Highs and Lows
+    (kernels.zigzag on the candidate arrays; same result as clean_swings).
+    """
+    positions, prices, is_high = swing_candidate_arrays(df, lookback)
+    keep = zigzag(prices, is_high)
+    return _swing_points(df.index, positions[keep], prices[keep], is_high[keep])
+
 def classify_structure_from_swings(swings: list[SwingPoint]) -> StructureBias:
     """
     Determine market structure from last swing sequence.
@@ -170,9 +206,15 @@ def detect_bos(
 
 def analyze_market_structure(
     df: pd.DataFrame,
-    lookback: int = 5
+    lookback: int = 5,
+    swings: list[SwingPoint] | None = None
 ) -> dict:
-    swings = detect_swings(df, lookback)
+    """
+    swings: optional precomputed detect_swings(df, lookback) output
+    (parameter sweeps reuse one swing set across grid points).
+    """
+    if swings is None:
+        swings = detect_swings(df, lookback)
     bias = classify_structure_from_swings(swings)
     bos = detect_bos(df, swings, bias)
 
@@ -1,24 +1,142 @@
-import streamlit as st
-from src.data_engine import fetch_all_watchlist, WATCHLIST
-from src.logic import calculate_ema, detect_aoi
+"""
+app.py
+---------------------------------
+Streamlit Dashboard (read-only consumer)
+
+- Reads the shared ResultStore written by scanner_daemon: any number of
+  sessions cost one scan, and the UI never talks to MT5
+- Overview sorted by score; refreshes itself while the daemon is
+  writing a snapshot
+- Setups that are the same currency move as a better-ranked one are
+  marked (return correlation of the last complete snapshot)
+- Per-symbol details (frames / charts) are loaded only when requested
+
+Run from the repo root:
+    python -m src.scanner_daemon          # once, in the background
+    python -m streamlit run src/app.py
+"""
+
+import time
+
 import pandas as pd
+import streamlit as st
+
+from src.charts import build_chart
+from src.result_store import COMPLETE, DEFAULT_PATH, RUNNING, ResultStore
+
+REFRESH_SECONDS = 2.0
+DEFAULT_VIEW_BARS = 300
+
+
+@st.cache_resource
+def get_store(path: str = DEFAULT_PATH) -> ResultStore:
+    """One read-only store handle per server process, shared by every session."""
+    return ResultStore(path, readonly=True)
+
+
+@st.cache_data(max_entries=4)
+def same_moves(snapshot_id: int) -> dict:
+    """Snapshots are immutable once complete: computed once per snapshot."""
+    return get_store().correlated_moves(snapshot_id)
+
+
+store = get_store()
 
 st.title('Forex Trading Checklist Tool')
+
+if not store.exists():
+    st.info('No scan yet – start the daemon: `python -m src.scanner_daemon`')
+    st.stop()
+
+# =========================
+# SIDEBAR
+# =========================
 st.sidebar.header('Watchlist')
-symbols = st.sidebar.multiselect('Symbols', WATCHLIST, default=WATCHLIST[:5])
-days_back = st.sidebar.slider('Days Back:', 30, 120, 60)
-
-if st.button('Fetch Data'):
-    with st.spinner('Fetching data, please wait...'):
-        all_data = fetch_all_watchlist(symbols, days_back)
-    for symbol, (tf_dict, errors) in all_data.items():
-        st.subheader(f'Symbol: {symbol}')
-        for tf, df in tf_dict.items():
-            st.write(f'{tf} - Last 5 rows:')
+rows = store.overview()
+symbols = st.sidebar.multiselect(
+    'Symbols', sorted(row["symbol"] for row in rows),
+    placeholder='All scanned symbols'
+)
+
+# =========================
+# OVERVIEW
+# =========================
+@st.fragment(run_every=REFRESH_SECONDS)
+def overview():
+    progress = store.progress()
+    if progress is None:
+        st.info('Waiting for the first snapshot…')
+        return
+
+    if progress["status"] == RUNNING:
+        st.progress(
+            progress["finished"] / max(progress["total"], 1),
+            text=f'Snapshot {progress["id"]}: scanning… {progress["finished"]}/{progress["total"]} symbols'
+        )
+    else:
+        age = time.time() - progress["started_at"]
+        st.caption(f'Snapshot {progress["id"]} ({progress["status"]}), started {age / 60:.0f} min ago')
+
+    table = pd.DataFrame(store.overview())
+    complete = store.latest_snapshot(COMPLETE)
+    if complete is not None and not table.empty:
+        moves = same_moves(complete["id"])
+        table.insert(3, "same move as", table["symbol"].map(moves).fillna(""))
+    if symbols and not table.empty:
+        table = table[table["symbol"].isin(symbols)]
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+
+overview()
+
+# =========================
+# DETAILS (lazy)
+# =========================
+def render_detail(symbol: str):
+    detail = store.detail(symbol)
+    if detail is None:
+        return
+
+    if detail["ai"]:
+        st.markdown(f'**AI:** {detail["ai"]}')
+    for error in detail["errors"]:
+        st.error(error)
+
+    tf_context = detail["tf_context"]
+    analysis = detail["analysis"] or {}
+    tabs = st.tabs(list(tf_context))
+
+    for tab, (label, info) in zip(tabs, tf_context.items()):
+        with tab:
+            if not info["valid"]:
+                reason = info["error"] or f'only {info["bars"]} bars'
+                st.warning(f'{label}: {reason}')
+                continue
+
+            result = analysis.get(label)
+            if result:
+                st.json(result, expanded=False)
+
+            df = info["df"]
+            first, last = df.index[0].to_pydatetime(), df.index[-1].to_pydatetime()
+            default_start = df.index[max(0, len(df) - DEFAULT_VIEW_BARS)].to_pydatetime()
+            start, end = st.slider(
+                'Visible range', min_value=first, max_value=last,
+                value=(default_start, last), key=f'range_{symbol}_{label}'
+            )
+            # Decimated server-side: payload bounded whatever the range
+            st.plotly_chart(
+                build_chart(df, label, start=start, end=end),
+                use_container_width=True
+            )
             st.dataframe(df.tail(5))
-            df = calculate_ema(df)
-            st.line_chart(df['EMA_20'])
-        if errors:
-            st.error(f'Errors: {errors}')
 
 
+st.subheader('Details')
+for row in rows:
+    if row["status"] != "done" or (symbols and row["symbol"] not in symbols):
+        continue
+    symbol = row["symbol"]
+    with st.expander(f'{symbol}  (score {row["score"]})'):
+        if st.toggle('Load details', key=f'detail_{symbol}'):
+            render_detail(symbol)
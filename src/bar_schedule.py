@@ -0,0 +1,171 @@
+"""
+bar_schedule.py
+---------------------------------
+Broker Bar-Close Schedule & Bar-Close-Aware Cache
+
+Purpose:
+- When does the forming bar of a timeframe close on the broker's
+  trading calendar? Cached closed bars expire exactly then
+  (data_engine.fetch_multi_timeframe) and live.py polls exactly then
+- Weekends and daily session breaks are skipped: a Weekly frame fetched
+  on Tuesday stays cached until Sunday, a 30m frame until the next
+  :00 / :30, and nothing expires while the market is closed
+- BarCloseCache: in-process {key: value} with a per-entry expiry time
+
+Trading calendar (MT5 server clock, as in data_quality):
+- Open Monday 00:00 -> Saturday 00:00, shifted by week_open_seconds
+  for brokers whose week opens elsewhere (e.g. -7200 for Sunday 22:00)
+- Daily breaks per instrument in SESSION_BREAKS (seconds of the day)
+- Bars are aligned to midnight; Weekly bars open on Sunday (MT5 W1)
+- Holidays are not modelled: the first expiry inside one simply
+  refetches an unchanged frame
+
+Usage:
+    schedule = schedule_for("XAUUSD", TIMEFRAME_SECONDS["1H"])
+    schedule.next_close(server_now)    # epoch seconds, server clock
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Hashable, Optional, Tuple
+
+from src.data_quality import DAY, EPOCH_TO_MONDAY, TRADING_DAYS, WEEK
+
+EPOCH_TO_SUNDAY = 3 * DAY  # 1970-01-04, open of the MT5 W1 bars
+CLOSE_GRACE = 1.0          # seconds after a close before an entry expires
+
+# Prefix / substring -> daily breaks (start, end) in server seconds of the
+# day; metals and oil pause for the CME settlement on most MT5 brokers
+SESSION_BREAKS = (
+    ("XAU", ((0, 3600),)),
+    ("XAG", ((0, 3600),)),
+    ("OIL", ((0, 3600),)),
+    ("WTI", ((0, 3600),)),
+    ("BRENT", ((0, 3600),)),
+)
+
+Breaks = Tuple[Tuple[int, int], ...]
+
+# =========================
+# SCHEDULE
+# =========================
+
+class BarSchedule:
+    """
+    Bar opens / closes of one timeframe on one instrument's calendar.
+    Times are epoch seconds on the broker server clock.
+    """
+    __slots__ = ("seconds", "breaks", "week_open", "anchor")
+
+    def __init__(self, seconds: int, breaks: Breaks = (), week_open_seconds: int = 0):
+        if sum(end - start for start, end in breaks) >= DAY:
+            raise ValueError("Session breaks cover the whole day")
+        self.seconds = seconds
+        self.breaks = tuple(breaks)
+        self.week_open = week_open_seconds
+        self.anchor = EPOCH_TO_SUNDAY if seconds == WEEK else 0
+
+    def bar_open(self, t: float) -> int:
+        """Open time of the bar containing t."""
+        t = int(t)
+        return t - (t - self.anchor) % self.seconds
+
+    def is_open(self, t: float) -> bool:
+        if (t + EPOCH_TO_MONDAY - self.week_open) % WEEK >= TRADING_DAYS * DAY:
+            return False
+        second = t % DAY
+        return not any(start <= second < end for start, end in self.breaks)
+
+    def next_open(self, t: float) -> float:
+        """First trading instant >= t (t itself while the market is open)."""
+        for _ in range(len(self.breaks) + 3):
+            into_week = (t + EPOCH_TO_MONDAY - self.week_open) % WEEK
+            if into_week >= TRADING_DAYS * DAY:
+                t += WEEK - into_week
+                continue
+            second = t % DAY
+            for start, end in self.breaks:
+                if start <= second < end:
+                    t += end - second
+                    break
+            else:
+                return t
+        return t
+
+    def next_close(self, t: float) -> int:
+        """
+        Close of the next bar that can change after t: the forming bar
+        while the market is open, otherwise the first bar after the
+        reopen (weekend / session break).
+        """
+        return self.bar_open(self.next_open(t)) + self.seconds
+
+
+def session_breaks(symbol: str) -> Breaks:
+    name = symbol.upper()
+    for pattern, breaks in SESSION_BREAKS:
+        if pattern in name:
+            return breaks
+    return ()
+
+
+@lru_cache(maxsize=None)
+def schedule_for(symbol: str, seconds: int, week_open_seconds: int = 0) -> BarSchedule:
+    return BarSchedule(seconds, session_breaks(symbol), week_open_seconds)
+
+# =========================
+# CACHE
+# =========================
+
+class BarCloseCache:
+    """
+    Thread-safe in-process cache whose entries expire at an absolute
+    epoch time (local clock), e.g. the next bar close of their frame.
+    Values are shared, not copied: treat them as read-only.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, object]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, now: Optional[float] = None):
+        """Cached value, or None when missing / expired."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def expiry(self, key: Hashable) -> Optional[float]:
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def put(self, key: Hashable, value, expires_at: float):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires_at, value)
+            if len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        """Drop expired entries, then the oldest inserted ones."""
+        now = time.time()
+        for key in [k for k, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            del self._entries[next(iter(self._entries))]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
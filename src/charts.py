@@ -0,0 +1,254 @@
+"""
+charts.py
+---------------------------------
+Server-side Decimated Charts
+
+Purpose:
+- Candlestick + EMA + swing points + AOI zones (plotly)
+- Decimate on the server so the browser payload is bounded by
+  `max_points`, whatever the history length:
+    * candles: OHLC-preserving bucket aggregation
+      (open=first, high=max, low=min, close=last) – no wick is lost
+    * EMA line: LTTB (Largest-Triangle-Three-Buckets)
+- Decimation is driven by the visible range: zooming into a shorter
+  window means fewer bars per bucket, down to raw bars
+- Overlays are clipped to the visible range and capped
+  (MAX_MARKERS swings, MAX_ZONES AOIs)
+
+Usage:
+    fig = build_chart(df, "4H", start=..., end=...)
+    st.plotly_chart(fig)
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from src.analysis import aoi, ema, structure
+
+# =========================
+# CONFIG
+# =========================
+
+MAX_POINTS = 1_500     # candles / line points per chart
+MAX_MARKERS = 400      # swing markers
+MAX_ZONES = 30         # AOI rectangles (most recent first)
+SWING_PAD = 200        # bars of history before the view used for swing detection
+
+# =========================
+# VISIBLE RANGE
+# =========================
+
+def _as_index_tz(ts, index: pd.DatetimeIndex) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    if index.tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(index.tz)
+    return ts
+
+
+def visible_bounds(
+    index: pd.DatetimeIndex,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None
+) -> Tuple[int, int]:
+    """
+    Positional [lo, hi) of the bars inside [start, end] (sorted index).
+    Naive bounds (e.g. from a UI slider) are read in the index timezone.
+    """
+    lo = 0 if start is None else int(index.searchsorted(_as_index_tz(start, index), side="left"))
+    hi = len(index) if end is None else int(index.searchsorted(_as_index_tz(end, index), side="right"))
+    return lo, max(lo, hi)
+
+# =========================
+# DECIMATION
+# =========================
+
+def bucket_size(n: int, max_points: int = MAX_POINTS) -> int:
+    """Bars per candle so that at most max_points candles remain."""
+    return max(1, -(-n // max_points))
+
+
+def ohlc_buckets(df: pd.DataFrame, max_points: int = MAX_POINTS) -> pd.DataFrame:
+    """
+    Aggregate consecutive bars into at most max_points OHLC candles.
+    Each candle is stamped with the open time of its first bar.
+    """
+    n = len(df)
+    step = bucket_size(n, max_points)
+    if step == 1:
+        return df
+
+    starts = np.arange(0, n, step)
+    ends = np.minimum(starts + step, n) - 1
+
+    out = {
+        "open": df["open"].to_numpy()[starts],
+        "high": np.maximum.reduceat(df["high"].to_numpy(), starts),
+        "low": np.minimum.reduceat(df["low"].to_numpy(), starts),
+        "close": df["close"].to_numpy()[ends],
+    }
+    if "volume" in df:
+        out["volume"] = np.add.reduceat(df["volume"].to_numpy(), starts)
+
+    return pd.DataFrame(out, index=df.index[starts])
+
+
+def lttb(y: np.ndarray, n_out: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the sorted positions of the kept points (first and last
+    always kept). NaNs in y are skipped.
+    """
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n_out >= n or n_out < 3:
+        return valid
+
+    xs = valid.astype(float) if x is None else np.asarray(x, dtype=float)[valid]
+    ys = y[valid]
+
+    # n_out - 2 buckets between the fixed first and last point
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket (or the last point)
+        nlo, nhi = (edges[b + 1], edges[b + 2]) if b + 2 < len(edges) else (n - 1, n)
+        avg_x = xs[nlo:nhi].mean()
+        avg_y = ys[nlo:nhi].mean()
+
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[lo:hi] - ys[a])
+            - (xs[a] - xs[lo:hi]) * (avg_y - ys[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[b + 1] = a
+
+    return valid[keep]
+
+# =========================
+# OVERLAYS
+# =========================
+
+def swing_markers(
+    swings: List[structure.SwingPoint],
+    start: pd.Timestamp,
+    end: pd.Timestamp,
+    max_markers: int = MAX_MARKERS
+) -> Dict[str, Tuple[list, list]]:
+    """
+    {"high": (times, prices), "low": (times, prices)} inside the view,
+    most recent max_markers only.
+    """
+    visible = [s for s in swings if start <= s.index <= end][-max_markers:]
+    out = {"high": ([], []), "low": ([], [])}
+    for swing in visible:
+        times, prices = out[swing.kind]
+        times.append(swing.index)
+        prices.append(swing.price)
+    return out
+
+
+def visible_zones(
+    aois: List[Dict],
+    hi: int,
+    price_low: float,
+    price_high: float,
+    max_zones: int = MAX_ZONES
+) -> List[Dict]:
+    """
+    AOIs born before the view end whose band intersects the visible
+    price range, most recent max_zones only.
+    """
+    zones = [
+        zone for zone in aois
+        if zone["origin_index"] < hi
+        and zone["low"] <= price_high and zone["high"] >= price_low
+    ]
+    zones.sort(key=lambda zone: zone["origin_index"])
+    return zones[-max_zones:]
+
+# =========================
+# FIGURE
+# =========================
+
+def build_chart(
+    df: pd.DataFrame,
+    timeframe: str,
+    start: Optional[pd.Timestamp] = None,
+    end: Optional[pd.Timestamp] = None,
+    max_points: int = MAX_POINTS,
+    ema_period: int = 50,
+    swings: Optional[List[structure.SwingPoint]] = None,
+    aois: Optional[List[Dict]] = None
+) -> go.Figure:
+    """
+    Decimated candlestick chart of df[start:end].
+
+    The EMA and AOIs are computed on the FULL history (correct warm-up)
+    and then clipped to the view; swings are detected on the view plus
+    SWING_PAD bars so their cost follows the visible range. Pass
+    precomputed swings / aois to skip detection.
+    """
+    lo, hi = visible_bounds(df.index, start, end)
+    view = df.iloc[lo:hi]
+    fig = go.Figure()
+    if view.empty:
+        return fig
+
+    candles = ohlc_buckets(view, max_points)
+    step = bucket_size(len(view), max_points)
+    fig.add_trace(go.Candlestick(
+        x=candles.index,
+        open=candles["open"], high=candles["high"],
+        low=candles["low"], close=candles["close"],
+        name=timeframe,
+    ))
+
+    ema_line = ema.calculate_ema(df, ema_period).iloc[lo:hi]
+    keep = lttb(ema_line.to_numpy(), max_points)
+    fig.add_trace(go.Scatter(
+        x=ema_line.index[keep], y=ema_line.to_numpy()[keep],
+        mode="lines", name=f"EMA {ema_period}", line={"width": 1.5},
+    ))
+
+    if swings is None:
+        swings = structure.detect_swings(df.iloc[max(0, lo - SWING_PAD):hi])
+    markers = swing_markers(swings, view.index[0], view.index[-1])
+    for kind, symbol in (("high", "triangle-down"), ("low", "triangle-up")):
+        times, prices = markers[kind]
+        fig.add_trace(go.Scatter(
+            x=times, y=prices, mode="markers", name=f"swing {kind}",
+            marker={"symbol": symbol, "size": 8},
+        ))
+
+    if aois is None:
+        aois = aoi.detect_htf_aoi(df, timeframe)
+    price_low = float(candles["low"].min())
+    price_high = float(candles["high"].max())
+    for zone in visible_zones(aois, hi, price_low, price_high):
+        color = "green" if zone["type"] == aoi.AOIType.DEMAND else "red"
+        fig.add_shape(
+            type="rect",
+            x0=df.index[max(zone["origin_index"], lo)], x1=view.index[-1],
+            y0=zone["low"], y1=zone["high"],
+            fillcolor=color, opacity=0.12, line={"width": 0}, layer="below",
+        )
+
+    title = f"{timeframe} – {len(view):,} bars"
+    if step > 1:
+        title += f" ({step} bars / candle)"
+    fig.update_layout(
+        title=title,
+        xaxis_rangeslider_visible=False,  # the range slider would re-ship every point
+        margin={"l": 10, "r": 10, "t": 40, "b": 10},
+        height=480,
+    )
+    return fig
@@ -0,0 +1,246 @@
+"""
+compact.py
+---------------------------------
+Opt-in Compact Memory Mode
+
+Purpose:
+- float32 OHLC where the symbol's quote precision survives the
+  round-trip (per-symbol digits check, falls back to float64)
+- int32 volume
+- Columnar AOI zones: detect_htf_aoi / detect_ltf_aoi lists of dicts as
+  one struct-of-arrays frame (int8 categorical type / source, float32
+  bands, int32 bar positions, touch counts instead of reaction lists)
+- Categorical enums (biases, zone types): int8 codes + category table
+- Memory report per symbol context (CLI); with TRADING_METRICS=1 every
+  fetched frame's size is exported as the trading_frame_bytes gauge
+
+Size per bar (OHLCV + int64 time index):
+    default  4 x 8 + 8 + 8 = 48 bytes
+    compact  4 x 4 + 4 + 8 = 28 bytes
+One year of M1 (~372k bars) x 22 symbols: ~390 MB -> ~230 MB.
+
+Usage:
+    tf_context = fetch_multi_timeframe(symbol, compact=True)
+    zones = zone_columns(aoi.detect_htf_aoi(df, "4H"))
+    python -m src.compact EURUSD          # report default vs compact
+"""
+
+import sys
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Type
+
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ("open", "high", "low", "close")
+MAX_DIGITS = 8
+
+# =========================
+# PRICES
+# =========================
+
+def infer_digits(prices: np.ndarray, max_digits: int = MAX_DIGITS) -> int:
+    """Smallest number of decimals that represents every price exactly."""
+    values = np.asarray(prices, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    tolerance = 1e-9 * np.maximum(1.0, np.abs(values))
+    for digits in range(max_digits + 1):
+        if np.all(np.abs(np.round(values, digits) - values) <= tolerance):
+            return digits
+    return max_digits
+
+
+def float32_safe(prices: np.ndarray, digits: int) -> bool:
+    """True when every price rounds back to itself at `digits` decimals from float32."""
+    values = np.asarray(prices, dtype=np.float64)
+    values = values[np.isfinite(values)]
+    restored = values.astype(np.float32).astype(np.float64)
+    return bool(np.array_equal(np.round(restored, digits), np.round(values, digits)))
+
+
+def compact_frame(df: pd.DataFrame, digits: Optional[int] = None) -> pd.DataFrame:
+    """
+    Standardized OHLCV frame in compact dtypes. digits: the symbol's
+    quote precision (MT5 symbol_info.digits); inferred when None.
+    df.attrs records the digits and the price dtype chosen.
+    """
+    prices = df[list(PRICE_COLUMNS)].to_numpy()
+    if digits is None:
+        digits = infer_digits(prices)
+
+    price_dtype = np.float32 if float32_safe(prices, digits) else np.float64
+    out = df.astype({column: price_dtype for column in PRICE_COLUMNS})
+
+    if "volume" in out:
+        volume = out["volume"].to_numpy()
+        if len(volume) == 0 or (volume.min() >= 0 and volume.max() <= np.iinfo(np.int32).max):
+            out["volume"] = volume.astype(np.int32)
+
+    out.attrs.update(digits=digits, price_dtype=np.dtype(price_dtype).name)
+    return out
+
+
+def compact_context(tf_context: Dict, digits: Optional[int] = None) -> Dict:
+    """data_engine tf_context with every frame compacted (frames replaced in place)."""
+    for info in tf_context.values():
+        if info.get("df") is not None:
+            info["df"] = compact_frame(info["df"], digits)
+    return tf_context
+
+# =========================
+# CATEGORICAL ENUMS
+# =========================
+
+def categorical(values: Iterable, enum_cls: Type[Enum]) -> pd.Categorical:
+    """
+    Enum members (or their values) as a Categorical over every member of
+    enum_cls in definition order: int8 codes, one copy of each label.
+    """
+    categories = [member.value for member in enum_cls]
+    labels = [value.value if isinstance(value, Enum) else value for value in values]
+    return pd.Categorical(labels, categories=categories)
+
+# =========================
+# COLUMNAR ZONES
+# =========================
+
+ZONE_COLUMNS = ("type", "source", "timeframe", "low", "high", "origin_index", "touches", "strong", "broken_at")
+
+
+def zone_columns(zones: List[Dict], digits: Optional[int] = None) -> pd.DataFrame:
+    """
+    aoi.py zones (list of dicts) as one struct-of-arrays frame, row i =
+    zones[i]. Reactions are kept as counts (touches / strong), broken_at
+    is -1 when the zone is unbroken. Bands are float32 when the symbol's
+    digits survive it (inferred when None), like compact_frame prices.
+    """
+    from src.analysis.aoi import AOISource, AOIType
+
+    bands = np.array([[zone["low"], zone["high"]] for zone in zones], dtype=np.float64).reshape(-1, 2)
+    if digits is None:
+        digits = infer_digits(bands)
+    band_dtype = np.float32 if float32_safe(bands, digits) else np.float64
+
+    broken = [zone.get("broken_at") for zone in zones]
+    table = pd.DataFrame({
+        "type": categorical((zone["type"] for zone in zones), AOIType),
+        "source": categorical((zone["source"] for zone in zones), AOISource),
+        "timeframe": pd.Categorical([zone["timeframe"] for zone in zones]),
+        "low": bands[:, 0].astype(band_dtype),
+        "high": bands[:, 1].astype(band_dtype),
+        "origin_index": np.array([zone["origin_index"] for zone in zones], dtype=np.int32),
+        "touches": np.array([zone["touches"] for zone in zones], dtype=np.int16),
+        "strong": np.array([
+            sum(reaction.get("strength") == "strong" for reaction in zone["reactions"])
+            for zone in zones
+        ], dtype=np.int16),
+        "broken_at": np.array([-1 if b is None else b for b in broken], dtype=np.int32),
+    }, columns=list(ZONE_COLUMNS))
+    table.attrs.update(digits=digits, price_dtype=np.dtype(band_dtype).name)
+    return table
+
+
+def zones_from_columns(table: pd.DataFrame) -> List[Dict]:
+    """Inverse of zone_columns(): the aoi.py dicts, prices rounded to table.attrs digits."""
+    from src.analysis.aoi import AOISource, AOIType, build_aoi
+
+    digits = table.attrs.get("digits", MAX_DIGITS)
+    zones = []
+    for row in table.itertuples(index=False):
+        zone = build_aoi(
+            aoi_type=AOIType(row.type),
+            source=AOISource(row.source),
+            high=round(float(row.high), digits),
+            low=round(float(row.low), digits),
+            timeframe=row.timeframe,
+            origin_index=int(row.origin_index),
+        )
+        zone["touches"] = int(row.touches)
+        zone["reactions"] = (
+            [{"strength": "strong"}] * int(row.strong)
+            + [{"strength": "weak"}] * int(row.touches - row.strong)
+        )
+        zone["broken_at"] = None if row.broken_at < 0 else int(row.broken_at)
+        zones.append(zone)
+    return zones
+
+
+def zones_bytes(zones: List[Dict]) -> int:
+    """Approximate bytes held by a list of aoi.py zone dicts (containers + floats/ints)."""
+    size = sys.getsizeof(zones)
+    for zone in zones:
+        size += sys.getsizeof(zone) + sys.getsizeof(zone["reactions"])
+        size += sum(sys.getsizeof(zone[key]) for key in ("high", "low", "origin_index", "touches"))
+    return size
+
+# =========================
+# MEMORY REPORT
+# =========================
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def memory_report(context: Dict) -> pd.DataFrame:
+    """
+    Bytes held per timeframe of one symbol context
+    (data_engine.build_market_context() result or its "timeframes").
+    """
+    tf_context = context.get("timeframes", context)
+    rows = []
+    for label, info in tf_context.items():
+        df = info.get("df")
+        if df is None:
+            rows.append({"timeframe": label, "bars": 0, "bytes": 0, "bytes_per_bar": 0.0, "dtypes": ""})
+            continue
+        size = frame_bytes(df)
+        rows.append({
+            "timeframe": label,
+            "bars": len(df),
+            "bytes": size,
+            "bytes_per_bar": size / max(len(df), 1),
+            "dtypes": ", ".join(f"{c}:{t}" for c, t in df.dtypes.astype(str).items()),
+        })
+
+    report = pd.DataFrame(rows)
+    total = pd.DataFrame([{
+        "timeframe": "total",
+        "bars": report["bars"].sum(),
+        "bytes": report["bytes"].sum(),
+        "bytes_per_bar": report["bytes"].sum() / max(report["bars"].sum(), 1),
+        "dtypes": "",
+    }])
+    return pd.concat([report, total], ignore_index=True)
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    from src.data_engine import connect_mt5, fetch_multi_timeframe, shutdown_mt5
+
+    symbol = sys.argv[1] if len(sys.argv) > 1 else "EURUSD"
+    try:
+        connect_mt5()
+        tf_context = fetch_multi_timeframe(symbol)
+    finally:
+        shutdown_mt5()
+
+    default = memory_report(tf_context)
+    compact = memory_report(compact_context(tf_context))
+    print(f"\n💾 {symbol} default")
+    print(default.to_string(index=False))
+    print(f"\n💾 {symbol} compact")
+    print(compact.to_string(index=False))
+    saved = 1 - compact["bytes"].iloc[-1] / max(default["bytes"].iloc[-1], 1)
+    print(f"\nsaved {saved:.0%}")
+
+    from src.analysis import aoi
+
+    print(f"\n💾 {symbol} HTF zones (dicts -> columns)")
+    for label in ("Daily", "4H"):
+        df = tf_context.get(label, {}).get("df")
+        if df is None:
+            continue
+        zones = aoi.detect_htf_aoi(df, label)
+        print(f"{label:>6} {len(zones):5d} zones  {zones_bytes(zones):9d} -> {frame_bytes(zone_columns(zones)):9d} bytes")
@@ -2,12 +2,19 @@ import MetaTrader5 as mt5
 import pandas as pd
 from datetime import datetime, timedelta
 import pytz
+import threading
 import time
 import os
 import sys
 import yaml
-import streamlit as st
-import streamlit as st
+
+from src import metrics
+from src.bar_schedule import CLOSE_GRACE, BarCloseCache, schedule_for
+from src.bar_builder import StoredBars
+from src.compact import compact_frame, frame_bytes
+from src.data_quality import quality_summary, validate_frame
+from src.symbol_registry import SymbolSpec, registry as symbol_registry
+from src.tick_store import TickStore
 # =========================
 # CONFIG
 # =========================
@@ -22,13 +29,40 @@ TIMEFRAMES = {
     "30m": mt5.TIMEFRAME_M30
 }
 
+# No MT5 constant: built from stored ticks (src/bar_builder.py)
+CUSTOM_TIMEFRAMES = {
+    "3H": 3 * 3600,
+    "2H": 2 * 3600,
+    "45m": 45 * 60
+}
+
+# Bar duration per timeframe (used to derive bar close times)
+TIMEFRAME_SECONDS = {
+    "Weekly": 7 * 86400,
+    "Daily": 86400,
+    "4H": 4 * 3600,
+    "1H": 3600,
+    "30m": 1800,
+    **CUSTOM_TIMEFRAMES
+}
+
 MIN_BARS = {
     "Weekly": 80,
     "Daily": 120,
     "4H": 200,
     "1H": 300,
-    "30m": 500
+    "30m": 500,
+    "3H": 200,
+    "2H": 250,
+    "45m": 400
 }
+TICK_CHUNK = timedelta(days=1)  # copy_ticks_range request size
+FRESH_TICK_SECONDS = 120  # max tick age trusted when measuring the server offset
+WEEK_CLOSE_TOLERANCE = 15 * 60  # last M1 bar of the week may be a few minutes early
+NEW_YORK = pytz.timezone("America/New_York")  # FX week closes Friday 17:00 New York
+
+# Closed bars of fetched timeframes, each valid until its forming bar closes
+_frame_cache = BarCloseCache()
 
 # =========================
 # MT5 CONNECTION
@@ -52,6 +86,8 @@ def connect_mt5():
 def reconnect_mt5():
     print("[INFO] Reconnecting MT5...")
     mt5.shutdown()
+    _selected.clear()  # a new terminal session has its own Market Watch
+    _unknown.clear()   # ... and maybe another broker account
     time.sleep(1)
     connect_mt5()
 
@@ -65,12 +101,63 @@ def standardize_dataframe(df: pd.DataFrame) -> pd.DataFrame:
     df.sort_index(inplace=True)
     return df
 
+# =========================
+# SYMBOLS
+# =========================
+_selected = set()  # symbols selected in Market Watch by this process
+_unknown = {}      # symbol -> time the broker did not know it (re-checked after the registry refresh interval)
+
+def resolve_symbols(symbols, force=False):
+    """
+    Resolve symbols in bulk: ONE symbols_get() call refreshes their
+    specs in the symbol registry (when missing / stale, or force) and
+    tells which still need symbol_select(). Returns {symbol: SymbolSpec}
+    of the symbols the broker knows. Symbols the broker does not know
+    are skipped (no lookup, no warning) until the registry refresh
+    interval has passed, or force.
+    """
+    wanted = list(dict.fromkeys(symbols))
+    now = time.time()
+    lookup = [
+        s for s in wanted
+        if force or now - _unknown.get(s, float("-inf")) > symbol_registry.refresh_seconds
+    ]
+    pending = [s for s in lookup if s not in _selected]
+    stale = force or symbol_registry.stale(lookup, now)
+
+    if pending or stale:
+        infos = {info.name: info for info in (mt5.symbols_get(group=",".join(lookup)) or ())}
+        if stale:
+            symbol_registry.update(SymbolSpec.from_info(infos[s]) for s in lookup if s in infos)
+            symbol_registry.save()
+
+        for symbol in lookup:
+            if symbol not in infos:
+                print(f"[WARN] {symbol} unknown to the broker")
+                _unknown[symbol] = now
+                continue
+            _unknown.pop(symbol, None)
+            if symbol in _selected:
+                continue
+            if infos[symbol].visible or mt5.symbol_select(symbol, True):
+                _selected.add(symbol)
+            else:
+                print(f"[WARN] {symbol} could not be selected – {mt5.last_error()}")
+
+    return {s: symbol_registry.get(s) for s in wanted if symbol_registry.get(s) is not None}
+
+def ensure_symbol(symbol):
+    """O(1) once resolved; a symbol outside the resolved set is resolved alone."""
+    if symbol not in _selected:
+        resolve_symbols([symbol])
+        if symbol not in _selected:
+            raise ValueError(f"Symbol {symbol} not tradable")
+
 # =========================
 # FETCH RAW DATA
 # =========================
 def fetch_rates(symbol, timeframe, from_date, to_date):
-    if not mt5.symbol_select(symbol, True):
-        raise ValueError(f"Symbol {symbol} not tradable")
+    ensure_symbol(symbol)
 
     rates = mt5.copy_rates_range(symbol, timeframe, from_date, to_date)
     if rates is None or len(rates) == 0:
@@ -80,6 +167,162 @@ def fetch_rates(symbol, timeframe, from_date, to_date):
     df["time"] = pd.to_datetime(df["time"], unit="s").dt.tz_localize("UTC")
     return df.set_index("time")
 
+def fetch_closed_bars(symbol, timeframe, count):
+    """
+    Last `count` CLOSED bars (position 0 = forming bar is skipped).
+    """
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 1, count)
+    if rates is None or len(rates) == 0:
+        raise ValueError("No data returned")
+
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s").dt.tz_localize("UTC")
+    return df.set_index("time")
+
+def fetch_forming_bar(symbol, timeframe):
+    """The bar at position 0: forming while the market is open, else the last one."""
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, 1)
+    if rates is None or len(rates) == 0:
+        raise ValueError("No data returned")
+
+    df = pd.DataFrame(rates)
+    df["time"] = pd.to_datetime(df["time"], unit="s").dt.tz_localize("UTC")
+    return df.set_index("time")
+
+def last_closed_bar_time(symbol, timeframe):
+    """
+    Open time (epoch seconds, server clock) of the last closed bar.
+    Single-bar request: cheap enough to poll.
+    """
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 1, 1)
+    if rates is None or len(rates) == 0:
+        return None
+    return int(rates[0]["time"])
+
+def measure_server_offset(symbol="EURUSD"):
+    """
+    Broker server clock minus UTC from a FRESH tick, rounded to the
+    hour. None while the symbol is not ticking (weekend, session break,
+    stale feed): a stale tick's age cannot be told apart from the offset.
+    """
+    tick = mt5.symbol_info_tick(symbol)
+    if tick is None:
+        return None
+
+    diff = tick.time - time.time()
+    offset = round(diff / 3600) * 3600
+    if abs(diff) > 14 * 3600 or abs(diff - offset) > FRESH_TICK_SECONDS:
+        return None
+    return offset
+
+def estimate_server_offset(symbol="EURUSD"):
+    """
+    Broker server clock minus UTC while the market is closed: the last
+    M1 bar of the week opens one minute before the FX week close
+    (Friday 17:00 New York), so its server time minus that instant is
+    the offset. None when the last bar is not at a week close (session
+    break, stale feed mid-week).
+    """
+    rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 0, 1)
+    if rates is None or len(rates) == 0:
+        return None
+
+    now_ny = datetime.now(NEW_YORK)
+    friday = (now_ny - timedelta(days=(now_ny.weekday() - 4) % 7)).date()
+    week_close = NEW_YORK.localize(datetime.combine(friday, datetime.min.time()) + timedelta(hours=17))
+    if week_close > now_ny:
+        week_close = NEW_YORK.localize(week_close.replace(tzinfo=None) - timedelta(days=7))
+
+    diff = int(rates[0]["time"]) + 60 - week_close.timestamp()
+    offset = round(diff / 3600) * 3600
+    if abs(diff) > 14 * 3600 or abs(diff - offset) > WEEK_CLOSE_TOLERANCE:
+        return None
+    return offset
+
+_last_offset = None  # last measured / estimated offset, broker-wide
+
+def server_time_offset(symbol="EURUSD"):
+    """
+    Broker server clock minus UTC. MT5 bar times are server-clock
+    seconds labelled as UTC. Measured from a fresh tick; while nothing
+    ticks, the last known offset, else estimated from the week's last
+    bar (estimate_server_offset); 0 when none of them is available.
+    """
+    global _last_offset
+    offset = measure_server_offset(symbol)
+    if offset is None and _last_offset is None:
+        offset = estimate_server_offset(symbol)
+    if offset is not None:
+        _last_offset = offset
+    return 0 if _last_offset is None else _last_offset
+
+# =========================
+# TICKS
+# =========================
+def fetch_ticks_range(symbol, from_date, to_date):
+    ensure_symbol(symbol)
+
+    ticks = mt5.copy_ticks_range(symbol, from_date, to_date, mt5.COPY_TICKS_ALL)
+    if ticks is None:
+        raise ValueError(f"No ticks returned – {mt5.last_error()}")
+    return ticks
+
+def fetch_ticks_from(symbol, from_date, count):
+    """Up to `count` ticks starting at from_date."""
+    ticks = mt5.copy_ticks_from(symbol, from_date, count, mt5.COPY_TICKS_ALL)
+    if ticks is None:
+        raise ValueError(f"No ticks returned – {mt5.last_error()}")
+    return ticks
+
+def ingest_ticks(store, symbol, days_back=7):
+    """
+    Download ticks newer than the store's last one (or the last
+    `days_back` days for an empty store) in TICK_CHUNK requests.
+    Returns ticks written.
+    """
+    to_date = datetime.utcnow().replace(tzinfo=pytz.UTC) + timedelta(seconds=server_time_offset(symbol))
+    last = store.last_time_msc(symbol)
+    if last is None:
+        from_date = to_date - timedelta(days=days_back)
+    else:
+        from_date = datetime.fromtimestamp((last + 1) / 1000, tz=pytz.UTC)
+
+    written = 0
+    while from_date < to_date:
+        chunk_end = min(from_date + TICK_CHUNK, to_date)
+        written += store.append(symbol, fetch_ticks_range(symbol, from_date, chunk_end))
+        from_date = chunk_end
+    return written
+
+# (store root, symbol, label, days_back) -> StoredBars, fed incrementally
+_custom_bars = {}
+_custom_lock = threading.Lock()
+
+def fetch_custom_timeframe(symbol, label, days_back=60, store=None, ingest=True):
+    """
+    Standardized OHLCV frame of a CUSTOM_TIMEFRAMES label, built from
+    the tick store after topping it up from MT5 (ingest=False: the
+    caller already did, e.g. once per symbol). Only ticks stored since
+    the previous call are aggregated. The last bar may still be
+    forming, like copy_rates_range().
+    """
+    if label not in CUSTOM_TIMEFRAMES:
+        raise ValueError(f"Unknown custom timeframe {label}")
+    store = store or TickStore()
+    if ingest:
+        ingest_ticks(store, symbol, days_back)
+
+    from_date = datetime.utcnow().replace(tzinfo=pytz.UTC) - timedelta(days=days_back)
+    key = (str(store.root), symbol, label, days_back)
+    with _custom_lock:
+        series = _custom_bars.get(key)
+        if series is None:
+            series = _custom_bars[key] = StoredBars(CUSTOM_TIMEFRAMES[label], days_back)
+        df = series.frame(store, symbol, from_date)
+    if df.empty:
+        raise ValueError("No ticks stored")
+    return df
+
 # =========================
 # RETRY WRAPPER (TASK 1.7 CORE)
 # =========================
@@ -107,28 +350,112 @@ def fetch_with_retry(symbol, tf_label, tf, from_date, to_date):
 # =========================
 # MULTI TIMEFRAME FETCH
 # =========================
-def fetch_multi_timeframe(symbol, days_back=60):
+def last_price(df, column):
+    """Last value as a plain float, rounded to the digits of compact frames."""
+    value = float(df[column].iloc[-1])
+    digits = df.attrs.get("digits")
+    return value if digits is None else round(value, digits)
+
+def symbol_digits(symbol):
+    """Quote precision of a symbol (None when the broker does not know it)."""
+    if symbol_registry.get(symbol) is None:
+        resolve_symbols([symbol])
+    return symbol_registry.digits(symbol)
+
+def frame_expiry(symbol, label, server_offset=None):
+    """
+    Local epoch time at which a frame of `label` fetched now is stale:
+    the close of its forming bar on the symbol's trading calendar
+    (weekends / session breaks skipped, see src/bar_schedule.py).
+    """
+    offset = server_time_offset(symbol) if server_offset is None else server_offset
+    schedule = schedule_for(symbol, TIMEFRAME_SECONDS[label])
+    return schedule.next_close(time.time() + offset) - offset + CLOSE_GRACE
+
+def with_forming_bar(history, forming):
+    """
+    Cached closed bars + the freshly fetched forming bar, or None when
+    the forming bar is not the one the history was cut before (a bar
+    closed in between: the history is stale).
+    """
+    if forming.index[0] != history["forming_open"]:
+        return None
+    closed = history["closed"]
+    df = pd.concat([closed, forming.astype(closed.dtypes.to_dict())])
+    df.attrs = dict(closed.attrs)
+    return df
+
+def fetch_multi_timeframe(symbol, days_back=60, compact=False, custom=(), cached=False):
+    """
+    compact=True: frames in compact dtypes (float32 prices when the
+    symbol's digits allow it, int32 volume; see src/compact.py)
+    custom: CUSTOM_TIMEFRAMES labels to build from ticks as well
+    cached=True: the CLOSED bars of each MT5 timeframe are reused until
+    its next bar close (frame_expiry), so a Weekly history is fetched
+    once a week and a 30m one right after every close; the forming bar
+    (and "price") is re-fetched on every call; the quality report is
+    the one of the full fetch. Custom timeframes are incremental already
+    (fetch_custom_timeframe) and always fresh.
+    """
     to_date = datetime.utcnow().replace(tzinfo=pytz.UTC)
     from_date = to_date - timedelta(days=days_back)
     tf_context = {}
+    digits = symbol_digits(symbol) if compact else None
+    server_offset = None
+    ingested = False  # ticks are topped up once per symbol, not per custom label
+
+    for label in [*TIMEFRAMES, *custom]:
+        key = (symbol, label, days_back, compact)
+        history = _frame_cache.get(key) if cached and label in TIMEFRAMES else None
 
-    for label, tf in TIMEFRAMES.items():
         try:
-            raw_df = fetch_with_retry(symbol, label, tf, from_date, to_date)
-            df = standardize_dataframe(raw_df)
+            with metrics.scope(symbol=symbol, timeframe=label):
+                df = None
+                if history is not None:
+                    with metrics.stage("fetch"):
+                        forming = fetch_forming_bar(symbol, TIMEFRAMES[label])
+                    with metrics.stage("standardize"):
+                        df = with_forming_bar(history, standardize_dataframe(forming))
+                    quality = history["quality"]
+
+                if df is None:
+                    if label in TIMEFRAMES:
+                        with metrics.stage("fetch"):
+                            raw_df = fetch_with_retry(symbol, label, TIMEFRAMES[label], from_date, to_date)
+                    else:
+                        with metrics.stage("fetch"):
+                            raw_df = fetch_custom_timeframe(symbol, label, days_back, ingest=not ingested)
+                        ingested = True
+                    # Before standardize: its sort would hide out-of-order bars
+                    with metrics.stage("validate"):
+                        quality = validate_frame(raw_df, TIMEFRAME_SECONDS[label])
+                    with metrics.stage("standardize"):
+                        df = standardize_dataframe(raw_df) if label in TIMEFRAMES else raw_df
+                        if compact:
+                            df = compact_frame(df, digits)
+
+                    if cached and label in TIMEFRAMES and len(df) > 1:
+                        if server_offset is None:
+                            server_offset = server_time_offset(symbol)
+                        history = {"closed": df.iloc[:-1], "forming_open": df.index[-1], "quality": quality}
+                        _frame_cache.put(key, history, frame_expiry(symbol, label, server_offset))
 
             bars = len(df)
             valid = bars >= MIN_BARS[label]
+            if metrics.registry.enabled:
+                # Compact vs default footprint, per frame (src/compact.py)
+                metrics.registry.set_gauge("trading_frame_bytes", frame_bytes(df), symbol=symbol, timeframe=label)
 
             tf_context[label] = {
                 "df": df,
                 "bars": bars,
                 "valid": valid,
-                "suitable": valid,
+                "suitable": valid and quality["clean"],
+                "quality": quality,
                 "price": {
-                    "close": df["close"].iloc[-1],
-                    "high": df["high"].iloc[-1],
-                    "low": df["low"].iloc[-1],
+                    "close": last_price(df, "close"),
+                    "high": last_price(df, "high"),
+                    "low": last_price(df, "low"),
                 },
                 "error": None
             }
@@ -139,6 +466,7 @@ def fetch_multi_timeframe(symbol, days_back=60):
                 "bars": 0,
                 "valid": False,
                 "suitable": False,
+                "quality": None,
                 "price": None,
                 "error": str(e)
             }
@@ -148,16 +476,29 @@ def fetch_multi_timeframe(symbol, days_back=60):
 # =========================
 # MARKET CONTEXT
 # =========================
-@st.cache_data(ttl=300, show_spinner="📡 Fetching market data...")
-def build_market_context(symbol, days_back=60):
+def build_market_context(symbol, days_back=60, compact=False, custom=()):
+    """
+    Market context of every timeframe: closed bars cached until each
+    timeframe's own next bar close (not one flat TTL), forming bar and
+    prices fresh on every call.
+    """
+    timeframes = fetch_multi_timeframe(symbol, days_back, compact, tuple(custom), cached=True)
+    expiries = [
+        _frame_cache.expiry((symbol, label, days_back, compact))
+        for label, info in timeframes.items() if info["error"] is None
+    ]
+    next_refresh = min((e for e in expiries if e is not None), default=None)
     return {
         "symbol": symbol,
         "last_update": datetime.utcnow(),
-        "timeframes": fetch_multi_timeframe(symbol, days_back),
+        "timeframes": timeframes,
         "meta": {
             "source": "MetaTrader5",
             "timezone": "UTC",
-            "cached": True
+            "cached": True,
+            "next_refresh": None if next_refresh is None else datetime.utcfromtimestamp(next_refresh),
+            "compact": compact,
+            "quality": quality_summary(timeframes)
         }
     }
 
@@ -168,24 +509,29 @@ def load_watchlist_from_yaml(file_path="watchlist.yaml"):
     with open(file_path, encoding="utf-8") as f:
         y = yaml.safe_load(f)
 
-    symbols = []
-    for group in y.values():
-        symbols.extend(
-            [s.upper().replace("/", "").replace("-", "") for s in group]
-        )
+    symbols = {}
+    for name, group in y.items():
+        for s in group:
+            symbol = s.upper().replace("/", "").replace("-", "")
+            if symbol in symbols:
+                print(f"[WARN] {file_path}: {symbol} listed twice ({symbols[symbol]}, {name})")
+                continue
+            symbols[symbol] = name
 
-    return sorted(set(symbols))
+    return sorted(symbols)
 
 WATCHLIST = load_watchlist_from_yaml()
 
 def fetch_all_watchlist(watchlist, days_back=60):
     results = {}
+    resolve_symbols(watchlist)
 
-    for symbol in watchlist:
-        try:
-            results[symbol] = build_market_context(symbol, days_back)
-        except Exception as e:
-            print(f"[ERROR] {symbol} skipped – {e}")
+    with metrics.profile_scan("watchlist_scan"):
+        for symbol in watchlist:
+            try:
+                results[symbol] = build_market_context(symbol, days_back)
+            except Exception as e:
+                print(f"[ERROR] {symbol} skipped – {e}")
 
     return results
 
@@ -194,6 +540,8 @@ def fetch_all_watchlist(watchlist, days_back=60):
 # =========================
 def shutdown_mt5():
     mt5.shutdown()
+    _selected.clear()
+    _unknown.clear()
     print("🛑 MT5 shutdown")
 
 # =========================
@@ -214,6 +562,11 @@ if __name__ == "__main__":
                 f"bars={info['bars']}, "
                 f"error={info['error']}"
             )
+            if info["quality"] and not info["quality"]["clean"]:
+                print(f"   ⚠️ quality: {info['quality']}")
+
+        if metrics.registry.enabled:
+            print(metrics.registry.to_prometheus())
 
     except Exception as e:
         print("❌ Fatal error:", e)
@@ -0,0 +1,150 @@
+"""
+data_quality.py
+---------------------------------
+Vectorized Bar Data-Quality Validation
+
+Purpose:
+- One pass per fetched frame, before swing / AOI detection sees it:
+    missing       bars absent against the trading calendar
+    duplicates    repeated timestamps
+    unordered     timestamps going backwards (raw MT5 order)
+    ohlc_errors   high < max(open, close), low > min(open, close),
+                  non-positive or non-finite prices
+    zero_range    high == low (frozen feed / no ticks)
+    spikes        true range > SPIKE_ATR x the ATR of the bars before
+                  (bad broker ticks -> phantom pivots and zones);
+                  reported only: news bars (NFP, rate decisions)
+                  reach the same size, so spikes cannot block a frame
+- Plain numpy on the raw arrays: ~0.2 ms for a 500-bar frame, half
+  of it pandas column access
+
+Trading calendar:
+- Bars are expected Monday 00:00 -> Saturday 00:00 in the frame's
+  clock (MT5 server time), shifted by week_open_seconds for brokers
+  whose week opens elsewhere (e.g. -7200 for Sunday 22:00)
+- Holidays are not modelled: they show up as missing bars, which are
+  reported but do not make a frame unsuitable
+
+Usage:
+    report = validate_frame(raw_df, TIMEFRAME_SECONDS[label])
+    report["clean"]   # False -> duplicates / order / OHLC errors found
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.indicators import true_range
+
+DAY = 86400
+WEEK = 7 * DAY
+TRADING_DAYS = 5
+EPOCH_TO_MONDAY = 3 * DAY  # 1970-01-01 was a Thursday
+TICKS_PER_SECOND = {"s": 1, "ms": 10**3, "us": 10**6, "ns": 10**9}
+
+SPIKE_ATR = 8.0
+SPIKE_PERIOD = 14
+
+# Counts that make a frame unsuitable for analysis. Not "spikes": a real
+# news bar is indistinguishable from a bad tick by range alone
+BLOCKING = ("duplicates", "unordered", "ohlc_errors")
+
+# =========================
+# CALENDAR
+# =========================
+
+def _trading_slots_before(times: np.ndarray, seconds: int, week_open: int) -> np.ndarray:
+    """Number of trading-calendar bar slots opening in [epoch, t) for each t."""
+    shifted = times + EPOCH_TO_MONDAY - week_open
+    weeks, into_week = np.divmod(shifted, WEEK)
+    slots_per_week = TRADING_DAYS * DAY // seconds
+    open_part = np.minimum(into_week, TRADING_DAYS * DAY)
+    return weeks * slots_per_week - (-open_part // seconds)  # ceil division
+
+
+def missing_bars(times: np.ndarray, seconds: int, week_open_seconds: int = 0) -> np.ndarray:
+    """
+    Bars missing between each pair of consecutive (sorted, epoch-second)
+    bar opens. Intraday / daily: trading-calendar slots only; weekly
+    and longer: plain duration steps.
+    """
+    if len(times) < 2:
+        return np.zeros(0, dtype=np.int64)
+
+    if seconds >= WEEK or DAY % seconds:
+        steps = np.round(np.diff(times) / seconds).astype(np.int64)
+        return np.maximum(steps - 1, 0)
+
+    slots = _trading_slots_before(times, seconds, week_open_seconds)
+    in_session = _trading_slots_before(times + 1, seconds, week_open_seconds) > slots
+    return np.maximum(np.diff(slots) - in_session[:-1], 0)
+
+# =========================
+# VALIDATION
+# =========================
+
+def validate_frame(
+    df: pd.DataFrame,
+    seconds: int,
+    week_open_seconds: int = 0,
+    spike_atr: float = SPIKE_ATR,
+    spike_period: int = SPIKE_PERIOD
+) -> Dict:
+    """
+    Quality report of one OHLC frame (raw MT5 order or standardized),
+    indexed by bar open time. Counts per check, the largest gap, the
+    first spike time and "clean" (no BLOCKING issue).
+    """
+    times = df.index.asi8 // TICKS_PER_SECOND[df.index.unit]
+    o, h, l, c = (df[column].to_numpy(dtype=np.float64) for column in ("open", "high", "low", "close"))
+
+    unordered = int(np.count_nonzero(np.diff(times) < 0))
+    ordered = np.sort(times) if unordered else times
+    duplicates = int(np.count_nonzero(np.diff(ordered) == 0))
+
+    gaps = missing_bars(np.unique(ordered) if duplicates else ordered, seconds, week_open_seconds)
+
+    with np.errstate(invalid="ignore"):
+        ohlc_errors = int(np.count_nonzero(
+            ~np.isfinite(o + h + l + c)
+            | (np.minimum.reduce([o, h, l, c]) <= 0)
+            | (h < np.maximum(o, c))
+            | (l > np.minimum(o, c))
+        ))
+        zero_range = int(np.count_nonzero(h == l))
+
+        # ATR of the spike_period bars BEFORE each bar, so a spike does not
+        # inflate its own yardstick
+        tr = true_range(h, l, c)
+        spike_count, first_spike = 0, None
+        if len(tr) > spike_period:
+            cumsum = np.concatenate(([0.0], np.cumsum(np.where(np.isnan(tr), 0.0, tr))))
+            prior_atr = (cumsum[spike_period:-1] - cumsum[:-spike_period - 1]) / spike_period
+            spikes = np.flatnonzero(tr[spike_period:] > spike_atr * prior_atr) + spike_period
+            spike_count = len(spikes)
+            if spike_count:
+                first_spike = df.index[spikes[0]]
+
+    report = {
+        "bars": len(df),
+        "missing": int(gaps.sum()),
+        "largest_gap": int(gaps.max()) if len(gaps) else 0,
+        "duplicates": duplicates,
+        "unordered": unordered,
+        "ohlc_errors": ohlc_errors,
+        "zero_range": zero_range,
+        "spikes": spike_count,
+        "first_spike": first_spike,
+    }
+    report["clean"] = not any(report[key] for key in BLOCKING)
+    return report
+
+
+def quality_summary(tf_context: Dict) -> Dict[str, Dict]:
+    """{timeframe: report} of a data_engine tf_context (for context meta)."""
+    return {
+        label: info["quality"]
+        for label, info in tf_context.items()
+        if info.get("quality") is not None
+    }
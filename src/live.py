@@ -0,0 +1,298 @@
+"""
+live.py
+---------------------------------
+Bar-Close-Driven Live Mode
+
+Purpose:
+- Poll cheaply (one bar) for newly CLOSED bars per (symbol, timeframe)
+- Re-run analysis only for the symbol-timeframes whose bar closed
+- Keep every other result (Weekly / Daily / 4H) cached until its own
+  next close
+- Expose bar-close -> result latency
+- Bounded memory: each slot keeps its bars in a fixed-capacity
+  BarRing; after priming only the newly closed bars are fetched and
+  appended (O(1) per bar), and analysis reads a zero-copy window
+
+Scheduling:
+- Each (symbol, timeframe) slot knows when its forming bar closes on
+  the broker calendar (src/bar_schedule.py: weekends and session breaks
+  skipped) and is not polled before.
+- If the new bar is not there yet (broker lag, holiday) the slot backs
+  off from POLL_RETRY up to POLL_RETRY_MAX.
+- The loop sleeps until the earliest due slot, so between M30 closes
+  the process is idle.
+
+Usage:
+    python -m src.live EURUSD GBPUSD
+"""
+
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src import metrics
+from src.analysis.confluence import run_analysis
+from src.bar_schedule import BarSchedule, schedule_for
+from src.ring_buffer import BarRing
+from src.data_engine import (
+    MIN_BARS,
+    TIMEFRAMES,
+    TIMEFRAME_SECONDS,
+    fetch_closed_bars,
+    last_closed_bar_time,
+    measure_server_offset,
+    server_time_offset,
+    standardize_dataframe,
+)
+
+# =========================
+# CONFIG
+# =========================
+
+POLL_GRACE = 1.0       # seconds after a scheduled close before the first poll
+POLL_RETRY = 2.0       # first back-off when the closed bar is not there yet
+POLL_RETRY_MAX = 300.0
+OFFSET_RECHECK = 60.0  # seconds between server-offset checks while ticks are stale
+
+# Bars each analysis stage reads back beyond MIN_BARS
+STAGE_HISTORY = {
+    "ema": 50 * 4,      # EMA 50 seed weight < 0.1% after 4 x 50 bars
+    "atr": 14 + 1,
+    "volume": 20,
+    "structure": 2 * 5 + 1,  # pivot lookback both sides
+}
+
+# Ring capacity per timeframe = closed bars kept per analysis
+HISTORY_BARS = {
+    label: bars + max(STAGE_HISTORY.values())
+    for label, bars in MIN_BARS.items()
+}
+
+LATENCY_METRIC = "trading_bar_close_to_result_seconds"
+
+# =========================
+# SLOT STATE
+# =========================
+
+class LiveSlot:
+    """
+    Cached state of one (symbol, timeframe).
+    Times are epoch seconds on the broker server clock.
+    """
+    __slots__ = (
+        "symbol", "label", "schedule", "last_open", "next_due", "retry",
+        "ring", "df", "result", "latency", "error",
+    )
+
+    def __init__(self, symbol: str, label: str):
+        self.symbol = symbol
+        self.label = label
+        self.schedule: BarSchedule = schedule_for(symbol, TIMEFRAME_SECONDS[label])
+        self.last_open: Optional[int] = None
+        self.next_due = 0.0
+        self.retry = POLL_RETRY
+        self.ring = BarRing(HISTORY_BARS[label])
+        self.df = None  # window analyzed last (view into ring)
+        self.result: Optional[Dict] = None
+        self.latency: Optional[float] = None
+        self.error: Optional[str] = None
+
+    @property
+    def closed_at(self) -> Optional[int]:
+        if self.last_open is None:
+            return None
+        return self.last_open + TIMEFRAME_SECONDS[self.label]
+
+# =========================
+# LIVE SCANNER
+# =========================
+
+class LiveScanner:
+    """
+    Incremental scanner: one analysis per closed bar, nothing in between.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        timeframes: Optional[List[str]] = None,
+        on_result: Optional[Callable[[LiveSlot], None]] = None
+    ):
+        labels = timeframes or list(TIMEFRAMES)
+        self.slots: Dict[Tuple[str, str], LiveSlot] = {
+            (symbol, label): LiveSlot(symbol, label)
+            for symbol in symbols
+            for label in labels
+        }
+        self.on_result = on_result
+        self.clock_symbol = symbols[0] if symbols else "EURUSD"
+        self.server_offset = 0
+        self.offset_live = False  # measured from a fresh tick
+
+    def now(self) -> float:
+        """Current time on the broker server clock."""
+        return time.time() + self.server_offset
+
+    def _update_offset(self):
+        """
+        Re-measure the server offset from a fresh tick. Started while the
+        market is closed, the scanner runs on the fallback offset and
+        keeps re-checking (OFFSET_RECHECK) until ticks are live again.
+        """
+        offset = measure_server_offset(self.clock_symbol)
+        if offset is None:
+            return
+        self.server_offset = offset
+        self.offset_live = True
+
+    # -------------------------
+    # Refresh
+    # -------------------------
+
+    def _fetch_count(self, slot: LiveSlot, last_open: int) -> int:
+        """
+        Closed bars to fetch: everything on the first fill, otherwise
+        the bars closed since the ring's newest one (+1 overlap; gaps
+        such as weekends only make this an over-estimate).
+        """
+        if slot.last_open is None or not len(slot.ring):
+            return slot.ring.capacity
+        missed = (last_open - slot.last_open) // TIMEFRAME_SECONDS[slot.label]
+        return int(min(max(missed, 1) + 1, slot.ring.capacity))
+
+    def _refresh(self, slot: LiveSlot, last_open: int, record_latency: bool = True):
+        label = slot.label
+
+        try:
+            with metrics.scope(symbol=slot.symbol, timeframe=label):
+                with metrics.stage("fetch"):
+                    raw = fetch_closed_bars(
+                        slot.symbol, TIMEFRAMES[label], self._fetch_count(slot, last_open)
+                    )
+                with metrics.stage("standardize"):
+                    slot.ring.extend_frame(standardize_dataframe(raw))
+                    df = slot.ring.frame()
+
+                result = run_analysis(df, label, slot.symbol) if len(df) >= MIN_BARS[label] else None
+
+        except Exception as e:
+            slot.error = str(e)
+            slot.next_due = self.now() + slot.retry
+            slot.retry = min(slot.retry * 2, POLL_RETRY_MAX)
+            print(f"[WARN] live {slot.symbol} {label} – {e}")
+            return False
+
+        slot.last_open = last_open
+        slot.df = df
+        slot.result = result
+        slot.error = None
+        slot.retry = POLL_RETRY
+        # Forming bar: the first one trading at / after the last close
+        slot.next_due = slot.schedule.next_close(slot.closed_at) + POLL_GRACE
+
+        if record_latency:
+            slot.latency = self.now() - slot.closed_at
+            metrics.registry.observe(
+                LATENCY_METRIC, slot.latency,
+                symbol=slot.symbol, timeframe=label
+            )
+
+        if self.on_result:
+            self.on_result(slot)
+        return True
+
+    def prime(self):
+        """Initial full analysis of every slot (no latency recorded)."""
+        self._update_offset()
+        if not self.offset_live:
+            self.server_offset = server_time_offset(self.clock_symbol)
+            print(f"[WARN] live: no fresh {self.clock_symbol} tick, server offset {self.server_offset}s until one arrives")
+
+        for slot in self.slots.values():
+            last_open = last_closed_bar_time(slot.symbol, TIMEFRAMES[slot.label])
+            if last_open is None:
+                slot.next_due = self.now() + POLL_RETRY
+                continue
+            self._refresh(slot, last_open, record_latency=False)
+
+    # -------------------------
+    # Loop
+    # -------------------------
+
+    def step(self) -> List[Tuple[str, str]]:
+        """
+        Poll every due slot once; re-analyze those with a new closed bar.
+        Returns the (symbol, timeframe) keys that were updated.
+        """
+        if not self.offset_live:
+            self._update_offset()
+        now = self.now()
+        updated = []
+
+        for key, slot in self.slots.items():
+            if slot.next_due > now:
+                continue
+
+            last_open = last_closed_bar_time(slot.symbol, TIMEFRAMES[slot.label])
+
+            if last_open is None or last_open == slot.last_open:
+                # Not closed yet on the broker side (lag / weekend / break)
+                slot.next_due = now + slot.retry
+                slot.retry = min(slot.retry * 2, POLL_RETRY_MAX)
+                continue
+
+            if self._refresh(slot, last_open):
+                updated.append(key)
+
+        return updated
+
+    def seconds_until_due(self) -> float:
+        next_due = min(slot.next_due for slot in self.slots.values())
+        wait = max(0.0, next_due - self.now())
+        return wait if self.offset_live else min(wait, OFFSET_RECHECK)
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        stop_event = stop_event or threading.Event()
+        self.prime()
+
+        while not stop_event.is_set():
+            self.step()
+            stop_event.wait(self.seconds_until_due())
+
+    # -------------------------
+    # Read access
+    # -------------------------
+
+    def results(self) -> Dict[str, Dict[str, Optional[Dict]]]:
+        out: Dict[str, Dict[str, Optional[Dict]]] = {}
+        for (symbol, label), slot in self.slots.items():
+            out.setdefault(symbol, {})[label] = slot.result
+        return out
+
+    def latencies(self) -> Dict[Tuple[str, str], Optional[float]]:
+        return {key: slot.latency for key, slot in self.slots.items()}
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    from src.data_engine import WATCHLIST, connect_mt5, resolve_symbols, shutdown_mt5
+
+    def _print_update(slot: LiveSlot):
+        score = slot.result["confluence"]["score_total"] if slot.result else "n/a"
+        latency = f"{slot.latency:.2f}s" if slot.latency is not None else "-"
+        print(f"🕯️ {slot.symbol} {slot.label}: score={score} latency={latency}")
+
+    symbols = sys.argv[1:] or WATCHLIST
+    scanner = LiveScanner(symbols, on_result=_print_update)
+
+    try:
+        connect_mt5()
+        resolve_symbols(symbols)
+        scanner.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_mt5()
@@ -1,11 +1,12 @@
 import pandas as pd
-import talib
+
+from src.analysis import indicators
 
 def calculate_ema(df, period=20):
     """
-    Add EMA column to DataFrame.
+    Add EMA column to DataFrame (TA-Lib EMA: SMA-seeded, NaN warm-up).
     """
-    df[f'EMA_{period}'] = talib.EMA(df['close'], timeperiod=period)
+    df[f'EMA_{period}'] = indicators.ema(df['close'], period, backend="talib")
     return df
 
 def detect_aoi(df, window=50, threshold=0.01):
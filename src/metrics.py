@@ -0,0 +1,372 @@
+"""
+metrics.py
+---------------------------------
+Per-stage Timing & Metrics Instrumentation
+
+Purpose:
+- Low-overhead timing hooks around pipeline stages:
+    fetch / standardize / structure / ema / aoi / scoring / entry
+- Histograms per (stage, symbol, timeframe) + generic counters
+- Export as Prometheus text format or JSON
+- Opt-in sampled cProfile capture for slow scans
+
+Disabled by default. When disabled, stage() / scope() return a shared
+no-op context manager: one attribute check per call, no clock reads,
+no allocations.
+
+Usage:
+    from src import metrics
+
+    metrics.registry.enable()
+    with metrics.scope(symbol="EURUSD", timeframe="4H"):
+        with metrics.stage("structure"):
+            ...
+    print(metrics.registry.to_prometheus())
+
+Environment (read once at import):
+- TRADING_METRICS=1                  enable instrumentation
+- TRADING_PROFILE_SAMPLE=0.1         fraction of scans run under cProfile
+- TRADING_PROFILE_SLOW_SECONDS=30    only keep profiles of scans slower than this
+- TRADING_PROFILE_DIR=profiles       where .prof files are written
+"""
+
+import bisect
+import contextvars
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+# =========================
+# CONFIG
+# =========================
+
+STAGES = ("fetch", "standardize", "structure", "ema", "aoi", "scoring", "entry")
+
+STAGE_METRIC = "trading_stage_seconds"
+
+# Seconds; spans a cached 30m scoring call up to a slow MT5 fetch
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+HELP = {
+    STAGE_METRIC: "Wall time per pipeline stage",
+}
+
+_NULL = nullcontext()
+
+# Current labels, propagated through threads (copy_context) and asyncio tasks
+_symbol = contextvars.ContextVar("metrics_symbol", default="")
+_timeframe = contextvars.ContextVar("metrics_timeframe", default="")
+
+# =========================
+# HISTOGRAM
+# =========================
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def copy(self) -> "Histogram":
+        clone = Histogram(self.buckets)
+        clone.counts = list(self.counts)
+        clone.sum = self.sum
+        clone.count = self.count
+        return clone
+
+    def merge(self, other: "Histogram"):
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.sum += other.sum
+        self.count += other.count
+
+    def cumulative(self):
+        total = 0
+        for le, n in zip(self.buckets + (float("inf"),), self.counts):
+            total += n
+            yield le, total
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "buckets": {_format_le(le): n for le, n in self.cumulative()},
+        }
+
+# =========================
+# REGISTRY
+# =========================
+
+class MetricsRegistry:
+    """
+    Process-wide metrics store.
+    Keys are (metric_name, ((label, value), ...)) so every label
+    combination gets its own series.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.enabled = False
+        self.buckets = buckets
+        self.profile_sample_rate = 0.0
+        self.slow_scan_seconds: Optional[float] = None
+        self.profile_dir = Path("profiles")
+        self._histograms: Dict[Tuple, Histogram] = {}
+        self._counters: Dict[Tuple, float] = {}
+        self._gauges: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Switches
+    # -------------------------
+
+    def enable(
+        self,
+        profile_sample_rate: float = 0.0,
+        slow_scan_seconds: Optional[float] = None,
+        profile_dir: Optional[str] = None
+    ):
+        self.enabled = True
+        self.profile_sample_rate = profile_sample_rate
+        self.slow_scan_seconds = slow_scan_seconds
+        if profile_dir:
+            self.profile_dir = Path(profile_dir)
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._gauges.clear()
+
+    # -------------------------
+    # Recording
+    # -------------------------
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._gauges[key] = value
+
+    def stage(self, name: str, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Time a pipeline stage. Labels default to the current scope().
+        """
+        if not self.enabled:
+            return _NULL
+        return self._timed(name, symbol, timeframe)
+
+    @contextmanager
+    def _timed(self, name, symbol, timeframe):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(
+                STAGE_METRIC,
+                time.perf_counter() - start,
+                stage=name,
+                symbol=_symbol.get() if symbol is None else symbol,
+                timeframe=_timeframe.get() if timeframe is None else timeframe,
+            )
+
+    def scope(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """
+        Set default symbol / timeframe labels for nested stage() calls.
+        """
+        if not self.enabled:
+            return _NULL
+        return self._scoped(symbol, timeframe)
+
+    @contextmanager
+    def _scoped(self, symbol, timeframe):
+        tokens = []
+        if symbol is not None:
+            tokens.append((_symbol, _symbol.set(symbol)))
+        if timeframe is not None:
+            tokens.append((_timeframe, _timeframe.set(timeframe)))
+        try:
+            yield
+        finally:
+            for var, token in reversed(tokens):
+                var.reset(token)
+
+    # -------------------------
+    # Sampled profiling
+    # -------------------------
+
+    def profile_scan(self, label: str = "scan"):
+        """
+        Run a whole scan under cProfile for a sampled fraction of calls.
+        The profile is written only if the scan was slower than
+        slow_scan_seconds (or always, when no threshold is set).
+        """
+        if (
+            not self.enabled
+            or self.profile_sample_rate <= 0
+            or random.random() >= self.profile_sample_rate
+        ):
+            return _NULL
+        return self._profiled(label)
+
+    @contextmanager
+    def _profiled(self, label):
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - start
+            if self.slow_scan_seconds is None or elapsed >= self.slow_scan_seconds:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                stamp = time.strftime("%Y%m%d-%H%M%S")
+                path = self.profile_dir / f"{label}-{stamp}-{elapsed:.1f}s.prof"
+                profiler.dump_stats(str(path))
+                self.inc("trading_profiles_written_total", scan=label)
+
+    # -------------------------
+    # Export
+    # -------------------------
+
+    def snapshot(self) -> Tuple[Dict, Dict, Dict]:
+        with self._lock:
+            histograms = {key: hist.copy() for key, hist in self._histograms.items()}
+            return histograms, dict(self._counters), dict(self._gauges)
+
+    def drain(self) -> Tuple[Dict, Dict, Dict]:
+        """snapshot() and reset() in one step (pool workers ship their series home)."""
+        with self._lock:
+            state = self._histograms, self._counters, self._gauges
+            self._histograms, self._counters, self._gauges = {}, {}, {}
+            return state
+
+    def merge(self, histograms: Dict, counters: Dict, gauges: Dict):
+        """Add series recorded elsewhere (drain() of a pool worker)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, hist in histograms.items():
+                own = self._histograms.get(key)
+                if own is None:
+                    self._histograms[key] = hist.copy()
+                else:
+                    own.merge(hist)
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            self._gauges.update(gauges)
+
+    def to_prometheus(self) -> str:
+        histograms, counters, gauges = self.snapshot()
+        lines = []
+
+        for kind, series in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({key[0] for key in series}):
+                lines.append(f"# TYPE {name} {kind}")
+                for (metric, labels), value in sorted(series.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for name in sorted({key[0] for key in histograms}):
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for le, total in hist.cumulative():
+                    bucket_labels = labels + (("le", _format_le(le)),)
+                    lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {total}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def to_json(self) -> str:
+        histograms, counters, gauges = self.snapshot()
+
+        def rows(series, convert=lambda v: v):
+            return [
+                {"name": name, "labels": dict(labels), "value": convert(value)}
+                for (name, labels), value in sorted(series.items())
+            ]
+
+        return json.dumps({
+            "histograms": rows(histograms, Histogram.to_dict),
+            "counters": rows(counters),
+            "gauges": rows(gauges),
+        }, indent=2)
+
+# =========================
+# FORMATTING
+# =========================
+
+def _format_le(le: float) -> str:
+    return "+Inf" if le == float("inf") else repr(le)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + body + "}"
+
+# =========================
+# MODULE SINGLETON
+# =========================
+
+registry = MetricsRegistry()
+
+if os.getenv("TRADING_METRICS") == "1":
+    slow = os.getenv("TRADING_PROFILE_SLOW_SECONDS")
+    registry.enable(
+        profile_sample_rate=float(os.getenv("TRADING_PROFILE_SAMPLE", "0")),
+        slow_scan_seconds=float(slow) if slow else None,
+        profile_dir=os.getenv("TRADING_PROFILE_DIR"),
+    )
+
+stage = registry.stage
+scope = registry.scope
+profile_scan = registry.profile_scan
@@ -0,0 +1,636 @@
+"""
+optimizer.py
+---------------------------------
+Parameter Sweep & Walk-Forward Optimizer (Phase 5.5)
+
+Purpose:
+- Evaluate grids of analysis parameters over walk-forward windows
+- Compute shared intermediates ONCE per (symbol, timeframe) and reuse
+  them for every grid point that depends on them:
+    - swing candidates per structure_lookback
+    - EMA per ema_period
+    - ATR (single series)
+    - impulse origins per impulse_factor
+- Fan (symbol, timeframe) jobs out across a process pool
+- Return a compact long table + walk-forward parameter selection
+
+Swept parameters:
+- structure_lookback  -> structure.detect_swings
+- ema_period          -> ema.calculate_ema
+- slope_factor        -> ema.detect_slope
+- zone_atr_factor     -> ema.detect_position
+- impulse_factor      -> aoi.detect_htf_aoi
+
+Objective:
+- Signal: structure bias at the window's last bar (bullish / bearish)
+- Score: ema_score.score_ema with in_aoi wired to the HTF AOI zones
+  (any zone holding the price; confluence.py also skips zones already
+  broken and adds aoi_score on top)
+- Outcome: forward close-to-close move over `horizon` bars, in ATR units;
+  with --exits, a bracket trade instead (stop stop_atr x ATR away,
+  target reward x that distance, closed at the horizon otherwise),
+  resolved by kernels.resolve_trades
+- HTF agreement: structure bias of the last CLOSED higher-timeframe bar
+  at the window's last bar (analysis/alignment.py, no lookahead);
+  --htf-filter only counts signals that agree with it
+
+Usage:
+    python -m src.optimizer --days 365 --timeframes 4H 1H \\
+        --lookback 3 5 8 --ema-period 34 50 89 --out sweep.csv.gz
+"""
+
+import hashlib
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import alignment, aoi, ema, ema_score, kernels, structure
+from src.analysis.confluence import engine
+from src.result_cache import cache_key, default_cache, prefix_fingerprints
+
+# =========================
+# CONFIG
+# =========================
+
+DEFAULT_PARAMS = {
+    "structure_lookback": 5,
+    "ema_period": 50,
+    "slope_factor": 0.15,
+    "zone_atr_factor": 0.2,
+    "impulse_factor": aoi.HTF_IMPULSE_FACTOR,
+}
+
+PARAM_DTYPES = {
+    "structure_lookback": "int16",
+    "ema_period": "int16",
+}
+
+DIRECTION = {
+    ema_score.MarketBias.BULLISH: 1,
+    ema_score.MarketBias.BEARISH: -1,
+}
+
+# Higher timeframe whose closed-bar bias is recorded for each timeframe
+HTF_FOR = {
+    "30m": "4H",
+    "1H": "4H",
+    "4H": "Daily",
+    "Daily": "Weekly",
+}
+
+# STRUCTURE_CODES index -> +1 / -1 / 0
+HTF_DIRECTION = np.array([
+    {"bullish": 1, "bearish": -1}.get(bias.value, 0) for bias in alignment.STRUCTURE_CODES
+], dtype=np.int8)
+
+# =========================
+# GRID
+# =========================
+
+def build_grid(**axes: List) -> pd.DataFrame:
+    """
+    Cartesian product of parameter axes.
+    Missing axes fall back to DEFAULT_PARAMS.
+    Index = grid point id (referenced by the result table).
+    """
+    unknown = set(axes) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    values = [
+        list(axes.get(name) or [default])
+        for name, default in DEFAULT_PARAMS.items()
+    ]
+    grid = pd.DataFrame(
+        list(itertools.product(*values)),
+        columns=list(DEFAULT_PARAMS)
+    ).astype(PARAM_DTYPES)
+    grid.index.name = "point"
+    return grid
+
+
+def window_ends(n_bars: int, min_bars: int, step: int, horizon: int) -> List[int]:
+    """
+    Anchored walk-forward window ends (exclusive bar positions).
+    Anchored at the most recent bar so window ids line up across symbols:
+    window 0 = latest, 1 = one step back, ...
+    """
+    last = n_bars - horizon
+    if last < min_bars:
+        return []
+    return list(range(last, min_bars - 1, -step))
+
+# =========================
+# SINGLE FRAME SWEEP
+# =========================
+
+def sweep_frame(
+    symbol: str,
+    timeframe: str,
+    df: pd.DataFrame,
+    grid: pd.DataFrame,
+    min_bars: int = 300,
+    step: int = 20,
+    horizon: int = 10,
+    use_cache: bool = False,
+    htf_df: Optional[pd.DataFrame] = None,
+    stop_atr: float = 1.0,
+    reward: float = 2.0
+) -> pd.DataFrame:
+    """
+    Evaluate every grid point on every walk-forward window of one frame.
+    Runs inside a pool worker; everything expensive is computed once here.
+    use_cache: windows whose bars (df.iloc[:end]) and grid were swept
+    before are read from result_cache; only the others are evaluated.
+    htf_df: higher-timeframe frame of the same symbol; its structure
+    bias at the last HTF close before each window's last bar close is
+    recorded as htf_direction (0 without it).
+    stop_atr / reward: bracket of the exit_atr / outcome columns
+    (see bracket_exits()).
+    """
+    ends = window_ends(len(df), min_bars, step, horizon)
+    if not ends:
+        return _empty_table()
+
+    htf_direction = np.zeros(len(ends), dtype=np.int8)
+    if htf_df is not None and len(htf_df) >= 2:
+        closed = alignment.align_timeframes(df.index, htf_df.index).closed
+        codes = alignment.structure_bias_codes(htf_df, DEFAULT_PARAMS["structure_lookback"])
+        last_closed = closed[np.array(ends) - 1]
+        htf_direction = np.where(last_closed >= 0, HTF_DIRECTION[codes[last_closed]], 0).astype(np.int8)
+
+    close = df["close"].to_numpy()
+    high = df["high"].to_numpy()
+    low = df["low"].to_numpy()
+
+    atr = ema.calculate_atr(df)
+    atr_values = atr.to_numpy()
+
+    points = list(zip(*(grid[name].tolist() for name in DEFAULT_PARAMS)))
+    n_points = len(points)
+    direction = np.zeros((len(ends), n_points), dtype=np.int8)
+    score = np.zeros((len(ends), n_points), dtype=np.int16)
+    forward = np.empty(len(ends), dtype=np.float32)
+    for w, end in enumerate(ends):
+        last = end - 1
+        forward[w] = (close[last + horizon] - close[last]) / atr_values[last]
+    exits = bracket_exits(high, low, close, atr_values, ends, horizon, stop_atr, reward)
+
+    # -------------------------
+    # Cached windows
+    # -------------------------
+    todo = list(range(len(ends)))
+    if use_cache:
+        cache = default_cache()
+        grid_digest = hashlib.blake2b(
+            grid[list(DEFAULT_PARAMS)].to_json(orient="values").encode(), digest_size=16
+        ).hexdigest()
+        prefixes = prefix_fingerprints(df, ends)
+        keys = [cache_key("sweep_window", prefixes[end], {"grid": grid_digest}) for end in ends]
+
+        todo = []
+        for w, key in enumerate(keys):
+            data = cache.get(key)
+            if data is None:
+                todo.append(w)
+                continue
+            direction[w] = np.frombuffer(data, dtype=np.int8, count=n_points)
+            score[w] = np.frombuffer(data, dtype=np.int16, offset=n_points)
+
+    if not todo:
+        return _sweep_table(symbol, timeframe, direction, score, forward, htf_direction, exits)
+
+    # -------------------------
+    # Shared intermediates
+    # -------------------------
+    candidates = {}
+    candidate_pos = {}
+    for lookback in grid["structure_lookback"].unique().tolist():
+        swing_points = structure.detect_swing_candidates(df, lookback)
+        candidates[lookback] = swing_points
+        candidate_pos[lookback] = df.index.get_indexer([s.index for s in swing_points])
+
+    emas = {
+        period: ema.calculate_ema(df, period)
+        for period in grid["ema_period"].unique().tolist()
+    }
+
+    impulse = {}
+    for factor in grid["impulse_factor"].unique().tolist():
+        demand, supply = aoi.impulse_origin_masks(
+            df["open"].to_numpy(), close, factor
+        )
+        impulse[factor] = demand | supply
+
+    for w in todo:
+        end = ends[w]
+        window = df.iloc[:end]
+        last = end - 1
+
+        # Per-window memo tables: each depends on a subset of the params
+        bias = {}
+        for lookback, points_lb in candidates.items():
+            # Prefix candidates = full-frame candidates confirmed before `end`
+            k = np.searchsorted(candidate_pos[lookback], end - lookback)
+            swings = structure.clean_swings(points_lb[:k])
+            bias[lookback] = engine._convert_bias(
+                structure.classify_structure_from_swings(swings)
+            )
+
+        in_aoi = {}
+        price = close[last]
+        zone_slice = slice(3, max(end - 3, 3))  # detect_htf_aoi scan range
+        inside = (low[zone_slice] <= price) & (high[zone_slice] >= price)
+        for factor, origins in impulse.items():
+            in_aoi[factor] = bool(np.any(origins[zone_slice] & inside))
+
+        atr_w = atr.iloc[:end]
+        ema_w = {period: series.iloc[:end] for period, series in emas.items()}
+        slope_memo = {}
+        position_memo = {}
+        rejection_memo = {}
+        score_memo = {}
+
+        for g, (lookback, period, slope_f, zone_f, factor) in enumerate(points):
+            market_bias = bias[lookback]
+            direction[w, g] = DIRECTION.get(market_bias, 0)
+
+            if end < period + 20:  # ema.analyze_ema validity rule
+                continue
+
+            key = (period, slope_f)
+            if key not in slope_memo:
+                slope_memo[key] = ema.detect_slope(
+                    ema_w[period], atr_w, slope_factor=slope_f
+                )
+            slope = slope_memo[key]
+
+            key = (period, zone_f)
+            if key not in position_memo:
+                position_memo[key] = ema.detect_position(
+                    window, ema_w[period], zone_f, atr=atr_w
+                )
+            position = position_memo[key]
+
+            key = (period, slope, market_bias)
+            if key not in rejection_memo:
+                rejection_memo[key] = ema.detect_rejection(
+                    window, ema_w[period], atr_w, slope, market_bias
+                )
+            rejection = rejection_memo[key]
+
+            key = (slope, position, rejection, market_bias, in_aoi[factor])
+            if key not in score_memo:
+                score_memo[key] = ema_score.score_ema(
+                    ema_state={
+                        "valid": True,
+                        "slope": slope,
+                        "position": position,
+                        "rejection": rejection,
+                    },
+                    structure_bias=market_bias,
+                    in_aoi=in_aoi[factor],
+                )["ema_score"]
+            score[w, g] = score_memo[key]
+
+        if use_cache:
+            cache.put(keys[w], direction[w].tobytes() + score[w].tobytes())
+
+    return _sweep_table(symbol, timeframe, direction, score, forward, htf_direction, exits)
+
+
+def bracket_exits(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr: np.ndarray,
+    ends: List[int],
+    horizon: int,
+    stop_atr: float = 1.0,
+    reward: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A long and a short trade opened at each window's last close: stop
+    stop_atr x ATR away, target reward x that distance, closed at the
+    horizon bar otherwise. Returns (outcome codes (kernels.OUTCOME_*),
+    result in ATR units), each (windows, 2): column 0 long, 1 short.
+    """
+    last = np.asarray(ends, dtype=np.int64) - 1
+    entry = np.repeat(last, 2)
+    side = np.tile(np.array([1, -1], dtype=np.int64), len(last))
+    risk = atr[entry] * stop_atr
+
+    outcome, _ = kernels.resolve_trades(
+        high, low, entry, side,
+        close[entry] - side * risk,
+        close[entry] + side * risk * reward,
+        horizon
+    )
+    held = side * (close[entry + horizon] - close[entry]) / atr[entry]
+    result = np.select(
+        [outcome == kernels.OUTCOME_TARGET, outcome == kernels.OUTCOME_STOP],
+        [stop_atr * reward, -stop_atr],
+        default=held,
+    )
+    return outcome.reshape(-1, 2), result.astype(np.float32).reshape(-1, 2)
+
+
+def _sweep_table(
+    symbol: str,
+    timeframe: str,
+    direction: np.ndarray,
+    score: np.ndarray,
+    forward: np.ndarray,
+    htf_direction: np.ndarray,
+    exits: Tuple[np.ndarray, np.ndarray]
+) -> pd.DataFrame:
+    n_windows, n_points = direction.shape
+    # Bracket of each row's own direction (column 1 = short); none if flat
+    side = (direction < 0).astype(np.int64)
+    flat = direction == 0
+    outcome = np.where(flat, 0, np.take_along_axis(exits[0], side, axis=1))
+    exit_atr = np.where(flat, 0.0, np.take_along_axis(exits[1], side, axis=1))
+    return pd.DataFrame({
+        "symbol": symbol,
+        "timeframe": timeframe,
+        "window": np.repeat(np.arange(n_windows, dtype=np.int16), n_points),
+        "point": np.tile(np.arange(n_points, dtype=np.int32), n_windows),
+        "direction": direction.ravel(),
+        "score": score.ravel(),
+        "forward_atr": np.repeat(forward, n_points),
+        "htf_direction": np.repeat(htf_direction, n_points),
+        "outcome": outcome.ravel().astype(np.int8),
+        "exit_atr": exit_atr.ravel().astype(np.float32),
+    })
+
+
+def _empty_table() -> pd.DataFrame:
+    return pd.DataFrame({
+        "symbol": pd.Series(dtype="object"),
+        "timeframe": pd.Series(dtype="object"),
+        "window": pd.Series(dtype="int16"),
+        "point": pd.Series(dtype="int32"),
+        "direction": pd.Series(dtype="int8"),
+        "score": pd.Series(dtype="int16"),
+        "forward_atr": pd.Series(dtype="float32"),
+        "htf_direction": pd.Series(dtype="int8"),
+        "outcome": pd.Series(dtype="int8"),
+        "exit_atr": pd.Series(dtype="float32"),
+    })
+
+# =========================
+# POOL ORCHESTRATION
+# =========================
+
+def frames_from_contexts(contexts: Dict[str, Dict]) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Extract {symbol: {timeframe: df}} from data_engine market contexts,
+    skipping invalid timeframes.
+    """
+    return {
+        symbol: {
+            label: info["df"]
+            for label, info in ctx["timeframes"].items()
+            if info["valid"]
+        }
+        for symbol, ctx in contexts.items()
+    }
+
+
+def run_sweep(
+    frames: Dict[str, Dict[str, pd.DataFrame]],
+    grid: pd.DataFrame,
+    min_bars: int = 300,
+    step: int = 20,
+    horizon: int = 10,
+    max_workers: Optional[int] = None,
+    use_cache: bool = False,
+    htf_frames: Optional[Dict[str, Dict[str, pd.DataFrame]]] = None,
+    stop_atr: float = 1.0,
+    reward: float = 2.0
+) -> pd.DataFrame:
+    """
+    Sweep every (symbol, timeframe) frame across a process pool.
+    use_cache: reuse windows swept before (see sweep_frame()).
+    htf_frames: {symbol: {timeframe: df}} holding the HTF_FOR frames
+    (default: frames itself).
+    stop_atr / reward: exit bracket (see bracket_exits()).
+
+    Returns the compact long table:
+        symbol, timeframe (category), window (int16), point (int32),
+        direction (int8), score (int16), forward_atr (float32),
+        htf_direction (int8), outcome (int8), exit_atr (float32)
+    Join `point` back to `grid` for parameter values.
+    """
+    if htf_frames is None:
+        htf_frames = frames
+    parts = []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(
+                sweep_frame, symbol, label, df, grid, min_bars, step, horizon, use_cache,
+                htf_frames.get(symbol, {}).get(HTF_FOR.get(label)), stop_atr, reward
+            ): (symbol, label)
+            for symbol, tf_frames in frames.items()
+            for label, df in tf_frames.items()
+        }
+
+        for future in as_completed(futures):
+            symbol, label = futures[future]
+            try:
+                parts.append(future.result())
+            except Exception as e:
+                print(f"[WARN] sweep {symbol} {label} failed – {e}")
+
+    table = pd.concat(parts or [_empty_table()], ignore_index=True)
+    table["symbol"] = table["symbol"].astype("category")
+    table["timeframe"] = table["timeframe"].astype("category")
+    return table
+
+# =========================
+# EVALUATION
+# =========================
+
+def traded(table: pd.DataFrame, min_score: int = 20, htf_filter: bool = False) -> pd.Series:
+    """
+    Rows that take a trade: directional bias and score >= min_score;
+    htf_filter: also in the direction of the higher timeframe.
+    """
+    take = (table["direction"] != 0) & (table["score"] >= min_score)
+    if htf_filter:
+        take &= table["direction"] == table["htf_direction"]
+    return take
+
+
+def signed_returns(
+    table: pd.DataFrame,
+    min_score: int = 20,
+    htf_filter: bool = False,
+    exits: bool = False
+) -> pd.Series:
+    """
+    Per-row trade result in ATR units, 0 on rows without a trade
+    (see traded()). exits: the bracket trade's result (exit_atr)
+    instead of the close-to-close move over the horizon.
+    """
+    take = traded(table, min_score, htf_filter)
+    result = table["exit_atr"] if exits else table["direction"] * table["forward_atr"]
+    return result.where(take, 0.0)
+
+
+def summarize_sweep(
+    table: pd.DataFrame,
+    grid: pd.DataFrame,
+    min_score: int = 20,
+    htf_filter: bool = False,
+    exits: bool = False
+) -> pd.DataFrame:
+    """
+    Aggregate each grid point per timeframe:
+    trades, hit_rate, mean_atr (per trade), total_atr.
+    """
+    result = signed_returns(table, min_score, htf_filter, exits)
+    take = traded(table, min_score, htf_filter)
+
+    frame = pd.DataFrame({
+        "timeframe": table["timeframe"],
+        "point": table["point"],
+        "trade": take,
+        "win": take & (result > 0),
+        "result": result,
+    })
+    summary = frame.groupby(["timeframe", "point"], observed=True).agg(
+        trades=("trade", "sum"),
+        wins=("win", "sum"),
+        total_atr=("result", "sum"),
+    )
+    summary["hit_rate"] = summary["wins"] / summary["trades"].where(summary["trades"] > 0)
+    summary["mean_atr"] = summary["total_atr"] / summary["trades"].where(summary["trades"] > 0)
+    summary = summary.drop(columns="wins").reset_index()
+
+    return summary.join(grid, on="point").sort_values(
+        ["timeframe", "total_atr"], ascending=[True, False]
+    )
+
+
+def walk_forward(
+    table: pd.DataFrame,
+    train_windows: int = 4,
+    min_score: int = 20,
+    htf_filter: bool = False,
+    exits: bool = False
+) -> pd.DataFrame:
+    """
+    Walk-forward selection per timeframe.
+
+    For each window k (oldest -> latest), pick the grid point with the best
+    mean result over the `train_windows` preceding windows, then record
+    its out-of-sample result on window k.
+    """
+    result = signed_returns(table, min_score, htf_filter, exits)
+    frame = table[["timeframe", "window", "point"]].assign(result=result)
+    rows = []
+
+    for timeframe, group in frame.groupby("timeframe", observed=True):
+        # windows x points matrix, mean across symbols; oldest window first
+        matrix = group.pivot_table(
+            index="window", columns="point", values="result", aggfunc="mean"
+        ).sort_index(ascending=False)
+        values = matrix.to_numpy()
+
+        for k in range(train_windows, len(matrix)):
+            train = np.nanmean(values[k - train_windows:k], axis=0)
+            best = int(np.nanargmax(train))
+            rows.append({
+                "timeframe": timeframe,
+                "window": int(matrix.index[k]),
+                "point": int(matrix.columns[best]),
+                "train_atr": float(train[best]),
+                "oos_atr": float(values[k, best]),
+            })
+
+    return pd.DataFrame(rows)
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.data_engine import (
+        WATCHLIST, connect_mt5, fetch_multi_timeframe, shutdown_mt5
+    )
+
+    parser = argparse.ArgumentParser(description="Parameter sweep / walk-forward")
+    parser.add_argument("--symbols", nargs="*", default=WATCHLIST)
+    parser.add_argument("--timeframes", nargs="*", default=["4H", "1H"])
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--lookback", nargs="*", type=int)
+    parser.add_argument("--ema-period", nargs="*", type=int)
+    parser.add_argument("--slope-factor", nargs="*", type=float)
+    parser.add_argument("--zone-atr-factor", nargs="*", type=float)
+    parser.add_argument("--impulse-factor", nargs="*", type=float)
+    parser.add_argument("--min-bars", type=int, default=300)
+    parser.add_argument("--step", type=int, default=20)
+    parser.add_argument("--horizon", type=int, default=10)
+    parser.add_argument("--train-windows", type=int, default=4)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="sweep.csv.gz")
+    parser.add_argument("--result-cache", action="store_true", help="reuse windows swept in earlier runs")
+    parser.add_argument("--htf-filter", action="store_true", help="only count signals agreeing with the higher timeframe")
+    parser.add_argument("--exits", action="store_true", help="score bracket trades (stop / target) instead of the horizon move")
+    parser.add_argument("--stop-atr", type=float, default=1.0)
+    parser.add_argument("--reward", type=float, default=2.0)
+    args = parser.parse_args()
+
+    grid = build_grid(
+        structure_lookback=args.lookback,
+        ema_period=args.ema_period,
+        slope_factor=args.slope_factor,
+        zone_atr_factor=args.zone_atr_factor,
+        impulse_factor=args.impulse_factor,
+    )
+    print(f"📐 Grid: {len(grid)} points")
+
+    try:
+        connect_mt5()
+        frames, htf_frames = {}, {}
+        for symbol in args.symbols:
+            tf_context = fetch_multi_timeframe(symbol, args.days)
+            htf_frames[symbol] = {
+                label: info["df"]
+                for label, info in tf_context.items()
+                if info["valid"]
+            }
+            frames[symbol] = {
+                label: df
+                for label, df in htf_frames[symbol].items()
+                if label in args.timeframes
+            }
+    finally:
+        shutdown_mt5()
+
+    table = run_sweep(
+        frames, grid,
+        min_bars=args.min_bars,
+        step=args.step,
+        horizon=args.horizon,
+        max_workers=args.workers,
+        use_cache=args.result_cache,
+        htf_frames=htf_frames,
+        stop_atr=args.stop_atr,
+        reward=args.reward
+    )
+    table.to_csv(args.out, index=False)
+    print(f"💾 {len(table)} rows -> {args.out}")
+
+    summary = summarize_sweep(table, grid, htf_filter=args.htf_filter, exits=args.exits)
+    print(summary.groupby("timeframe", observed=True).head(5))
+    wf = walk_forward(table, args.train_windows, htf_filter=args.htf_filter, exits=args.exits)
+    if not wf.empty:
+        print(wf.groupby("timeframe")["oos_atr"].agg(["count", "mean", "sum"]))
@@ -0,0 +1,292 @@
+"""
+orchestrator.py
+---------------------------------
+Asyncio Scan Orchestration (Data -> Analysis -> AI)
+
+Purpose:
+- Blocking MT5 calls on ONE dedicated thread (the MT5 API is not
+  thread-safe, so fetches are serialized but never block the loop)
+- CPU-bound analysis on a process pool
+- AI validation as async tasks through ai_service.AIOpinionService
+  (prompt cache, coalescing, rate limit, bounded concurrency)
+
+Results are streamed as events the moment they are ready:
+- ("context", symbol, tf_context)           after fetch (emit_context=True)
+- ("analysis", symbol, {timeframe: result})  after fetch + analysis
+- ("ai", symbol, opinion)                    whenever the AI answers
+- ("watchlist", "", {timeframe: ema state})  once every symbol is fetched
+                                             (watchlist_state=True)
+- ("error", symbol, message)
+A slow AI opinion for one symbol never delays analysis events of others.
+
+Usage:
+    async with ScanOrchestrator(api_key=..., cache_path="ai_cache.json") as orch:
+        async for event in orch.scan(WATCHLIST):
+            ...
+
+    results = run_scan(WATCHLIST)          # blocking helper
+"""
+
+import asyncio
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+import pandas as pd
+
+from src import metrics
+from src.ai_integration import build_ai_prompt
+from src.ai_service import AIOpinionService
+from src.analysis.confluence import run_analysis
+from src.analysis.panel import watchlist_ema_state
+from src.analysis.records import decode_scan, encode_scan
+from src.data_engine import fetch_multi_timeframe, resolve_symbols
+from src.result_cache import cached_analysis
+
+# =========================
+# EVENTS
+# =========================
+
+class ScanEvent(NamedTuple):
+    kind: str      # "context" | "analysis" | "ai" | "watchlist" | "error"
+    symbol: str
+    payload: object
+
+# =========================
+# WORKER (process pool)
+# =========================
+
+def analyze_frames(
+    symbol: str,
+    frames: Dict[str, pd.DataFrame],
+    use_cache: bool = False,
+    collect_metrics: bool = False
+) -> Tuple[bytes, Optional[tuple]]:
+    """
+    Run the confluence stack on every timeframe of one symbol.
+    Top-level so it pickles into pool workers; the result travels back
+    as a compact records.encode_scan() payload instead of nested dicts.
+    use_cache: unchanged frames are answered from result_cache.
+    collect_metrics: inside a pool worker, record the stage timings and
+    return them (metrics.registry.drain()) for the parent to merge;
+    None otherwise.
+    """
+    in_worker = multiprocessing.parent_process() is not None
+    if collect_metrics and in_worker:
+        metrics.registry.enable()
+
+    analyze = cached_analysis if use_cache else run_analysis
+    with metrics.scope(symbol=symbol):
+        results = {label: analyze(df, label, symbol) for label, df in frames.items()}
+
+    worker_metrics = metrics.registry.drain() if collect_metrics and in_worker else None
+    return encode_scan({symbol: results}), worker_metrics
+
+# =========================
+# ORCHESTRATOR
+# =========================
+
+class ScanOrchestrator:
+
+    def __init__(
+        self,
+        days_back: int = 60,
+        analysis_workers: Optional[int] = None,
+        ai_enabled: bool = True,
+        emit_context: bool = False,
+        ai_service: Optional[AIOpinionService] = None,
+        compact: bool = False,
+        custom_timeframes: Tuple[str, ...] = (),
+        result_cache: bool = False,
+        watchlist_state: bool = False,
+        **ai_options
+    ):
+        """
+        emit_context: also stream the fetched tf_context (with DataFrames)
+        for consumers that render charts.
+        ai_service: shared service (cache survives across scans);
+        otherwise one is built from ai_options (api_key, base_url, model,
+        timeout, cache_path, concurrency, rate_per_second, ...).
+        compact: fetch frames in compact dtypes (smaller pickles to the
+        pool and smaller stored blobs; see src/compact.py).
+        custom_timeframes: data_engine.CUSTOM_TIMEFRAMES labels built
+        from ticks (2H, 3H, 45m).
+        result_cache: answer unchanged frames from the on-disk
+        result_cache (also across restarts).
+        watchlist_state: once every symbol is fetched, emit the EMA
+        slope / position of the whole watchlist per timeframe
+        (panel.watchlist_ema_state(): one vectorized pass per timeframe).
+        """
+        self.days_back = days_back
+        self.compact = compact
+        self.custom_timeframes = tuple(custom_timeframes)
+        self.result_cache = result_cache
+        self.watchlist_state = watchlist_state
+        self.ai_enabled = ai_enabled
+        self.emit_context = emit_context
+        self._owns_ai_service = ai_service is None
+        self.ai_service = ai_service or AIOpinionService(**ai_options)
+
+        self._mt5_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+        self._analysis_pool = ProcessPoolExecutor(max_workers=analysis_workers)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        if self._owns_ai_service:
+            await self.ai_service.close()
+        self._mt5_executor.shutdown(wait=False, cancel_futures=True)
+        self._analysis_pool.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------
+    # Stages
+    # -------------------------
+
+    async def fetch(self, symbol: str) -> Dict:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._mt5_executor,
+            functools.partial(
+                fetch_multi_timeframe, symbol, self.days_back, self.compact, self.custom_timeframes,
+                cached=True  # closed bars reused until each timeframe's next close
+            )
+        )
+
+    async def analyze(self, symbol: str, tf_context: Dict) -> Dict[str, Optional[Dict]]:
+        frames = {
+            label: info["df"]
+            for label, info in tf_context.items()
+            if info["valid"]
+        }
+        loop = asyncio.get_running_loop()
+        payload, worker_metrics = await loop.run_in_executor(
+            self._analysis_pool, analyze_frames, symbol, frames, self.result_cache,
+            metrics.registry.enabled
+        )
+        if worker_metrics is not None:
+            metrics.registry.merge(*worker_metrics)
+        results = decode_scan(payload)[symbol]
+        # Keep every timeframe key; invalid ones map to None
+        return {label: results.get(label) for label in tf_context}
+
+    async def ai_opinion(self, symbol: str, analysis: Dict[str, Optional[Dict]]) -> str:
+        return await self.ai_service.opinion(build_ai_prompt(symbol, analysis))
+
+    # -------------------------
+    # Scan
+    # -------------------------
+
+    async def scan(self, symbols: List[str]) -> AsyncIterator[ScanEvent]:
+        """
+        Stream ScanEvents for every symbol as soon as each is ready.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+
+        async def ai_task(symbol, analysis):
+            try:
+                opinion = await self.ai_opinion(symbol, analysis)
+                await queue.put(ScanEvent("ai", symbol, opinion))
+            except Exception as e:
+                await queue.put(ScanEvent("error", symbol, f"ai: {e!r}"))
+
+        contexts: Dict[str, Dict] = {}
+        unfetched = len(symbols)
+
+        async def fetch_done(symbol, tf_context):
+            nonlocal unfetched
+            unfetched -= 1
+            if tf_context is not None:
+                contexts[symbol] = tf_context
+            if not self.watchlist_state or unfetched or not contexts:
+                return
+            # Vectorized over the watchlist: cheap enough for the loop thread
+            try:
+                states = watchlist_ema_state(contexts)
+            except Exception as e:
+                print(f"[WARN] watchlist state failed – {e}")
+                return
+            await queue.put(ScanEvent("watchlist", "", states))
+
+        async def symbol_task(symbol):
+            tf_context = None
+            try:
+                tf_context = await self.fetch(symbol)
+                if self.emit_context:
+                    await queue.put(ScanEvent("context", symbol, tf_context))
+            except Exception as e:
+                await queue.put(ScanEvent("error", symbol, str(e)))
+            finally:
+                await fetch_done(symbol, tf_context)
+            if tf_context is None:
+                return
+
+            try:
+                analysis = await self.analyze(symbol, tf_context)
+            except Exception as e:
+                await queue.put(ScanEvent("error", symbol, str(e)))
+                return
+
+            await queue.put(ScanEvent("analysis", symbol, analysis))
+            if self.ai_enabled:
+                spawn(ai_task(symbol, analysis))
+
+        def spawn(coro):
+            task = asyncio.create_task(coro)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        # One bulk symbol resolve / select before the per-symbol fetches;
+        # on failure each fetch resolves its own symbol
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._mt5_executor, resolve_symbols, symbols
+            )
+        except Exception as e:
+            print(f"[WARN] symbol resolve failed – {e}")
+        for symbol in symbols:
+            spawn(symbol_task(symbol))
+
+        try:
+            while tasks or not queue.empty():
+                getter = asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait(
+                    tasks | {getter}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    yield getter.result()
+                else:
+                    getter.cancel()
+        finally:
+            for task in list(tasks):
+                task.cancel()
+
+# =========================
+# BLOCKING HELPER
+# =========================
+
+def run_scan(symbols: List[str], **kwargs) -> Dict[str, Dict]:
+    """
+    Collect a full scan: {symbol: {"analysis": ..., "ai": ..., "errors": [...]}}
+    """
+    async def _collect():
+        results: Dict[str, Dict] = {
+            symbol: {"analysis": None, "ai": None, "errors": []}
+            for symbol in symbols
+        }
+        async with ScanOrchestrator(**kwargs) as orch:
+            async for event in orch.scan(symbols):
+                if event.kind == "watchlist":
+                    continue
+                if event.kind == "error":
+                    results[event.symbol]["errors"].append(event.payload)
+                else:
+                    results[event.symbol][event.kind] = event.payload
+        return results
+
+    return asyncio.run(_collect())
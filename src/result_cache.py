@@ -0,0 +1,245 @@
+"""
+result_cache.py
+---------------------------------
+Content-Addressed Analysis Result Cache (on disk, SQLite)
+
+Purpose:
+- Skip re-analyzing frames that did not change: results are stored
+  under a hash of (kind, ANALYSIS_VERSION, indicator backend, frame
+  fingerprint, params) in ONE SQLite file (WAL), shared by the pool
+  workers of a scan
+- Survives restarts: a restarted scanner / optimizer answers unchanged
+  HTF frames and backtest windows from disk
+- Size-bounded: entries are counted as payload + key + ENTRY_OVERHEAD
+  (row and index cost), least recently used ones are evicted once the
+  total grows past max_bytes. A 17-byte record costs ~150 bytes instead
+  of a file-system block, and the file stays within ~10% of max_bytes
+
+Fingerprints:
+- frame_fingerprint(df): every bar (time + OHLCV) -> exact
+- prefix_fingerprints(df, ends): exact fingerprints of df.iloc[:end]
+  for many windows in ONE pass (incremental hash)
+Frames fetched with their forming bar change on every tick, so they
+only hit while that bar is unchanged (market closed, re-runs).
+
+Payloads:
+- run_analysis() results: records.TimeframeRecord (17 bytes)
+- optimizer sweep windows: int8 directions + int16 scores per grid point
+
+Environment:
+- TRADING_RESULT_CACHE_PATH=<file>  default ./result_cache.sqlite
+- TRADING_RESULT_CACHE_MB=<MB>      default 256
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import indicators
+from src.analysis.confluence import ANALYSIS_VERSION, run_analysis
+from src.analysis.records import TimeframeRecord
+
+DEFAULT_PATH = os.getenv("TRADING_RESULT_CACHE_PATH", "result_cache.sqlite")
+DEFAULT_MAX_BYTES = int(float(os.getenv("TRADING_RESULT_CACHE_MB", 256)) * 2**20)
+EVICT_TO = 0.8        # fraction of max_bytes kept after an eviction pass
+ENTRY_OVERHEAD = 96   # bytes per entry on top of key + payload (row, key + LRU indexes)
+
+FINGERPRINT_COLUMNS = ("open", "high", "low", "close", "volume")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key   TEXT PRIMARY KEY,
+    data  BLOB NOT NULL,
+    size  INTEGER NOT NULL,
+    used  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used ON entries (used);
+"""
+
+# =========================
+# FINGERPRINTS / KEYS
+# =========================
+
+def _rows(df: pd.DataFrame) -> np.ndarray:
+    """(n, 6) float64 rows: time (int64 ns bits) + OHLCV, row-major."""
+    rows = np.empty((len(df), 1 + len(FINGERPRINT_COLUMNS)), dtype=np.float64)
+    rows[:, 0] = df.index.as_unit("ns").asi8.view(np.float64)
+    for k, column in enumerate(FINGERPRINT_COLUMNS, start=1):
+        rows[:, k] = df[column].to_numpy(dtype=np.float64)
+    return rows
+
+
+def _hasher():
+    return hashlib.blake2b(digest_size=16)
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    h = _hasher()
+    h.update(_rows(df).tobytes())
+    return h.hexdigest()
+
+
+def prefix_fingerprints(df: pd.DataFrame, ends: Iterable[int]) -> Dict[int, str]:
+    """{end: frame_fingerprint(df.iloc[:end])} with one incremental pass."""
+    rows = _rows(df)
+    h = _hasher()
+    done = 0
+    fingerprints = {}
+    for end in sorted(set(ends)):
+        h.update(rows[done:end].tobytes())
+        done = end
+        fingerprints[end] = h.copy().hexdigest()
+    return fingerprints
+
+
+def cache_key(kind: str, fingerprint: str, params: Optional[Dict] = None) -> str:
+    """
+    Everything that changes a result is part of the key: the analysis
+    code version, the indicator backend (TA-Lib seeds EMA / ATR
+    differently) and the caller's params.
+    """
+    payload = json.dumps(
+        [kind, ANALYSIS_VERSION, indicators.get_backend(), fingerprint, params or {}],
+        sort_keys=True, default=str
+    )
+    h = _hasher()
+    h.update(payload.encode())
+    return h.hexdigest()
+
+# =========================
+# STORE
+# =========================
+
+class ResultCache:
+    """
+    Thread-safe handle on the cache file: one SQLite connection per
+    thread (and per process: pool workers reopen after fork).
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local.conn = None
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def nbytes(self) -> int:
+        """Accounted size of all entries (see ENTRY_OVERHEAD)."""
+        return self._conn().execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._conn() as conn:
+            row = conn.execute("SELECT data FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))  # LRU clock
+        self.hits += 1
+        return row[0]
+
+    def put(self, key: str, data: bytes):
+        size = len(data) + len(key) + ENTRY_OVERHEAD
+        with self._conn() as conn:
+            # A replaced entry only adds its size difference
+            old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (key, data, size, time.time())
+            )
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.nbytes
+            else:
+                self._size += size - (old[0] if old else 0)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries down to EVICT_TO x max_bytes."""
+        with self._conn() as conn:
+            conn.execute(
+                """
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY used DESC, key) AS kept
+                        FROM entries
+                    ) WHERE kept > ?
+                )
+                """,
+                (self.max_bytes * EVICT_TO,)
+            )
+        # Other processes write too: re-count instead of trusting _size
+        self._size = self.nbytes
+
+    def clear(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM entries")
+        self._size = 0
+
+
+_default_cache: Optional[ResultCache] = None
+
+
+def default_cache() -> ResultCache:
+    """Process-wide cache from the environment (one per pool worker)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResultCache()
+    return _default_cache
+
+# =========================
+# CACHED ANALYSIS
+# =========================
+
+def cached_analysis(
+    df: pd.DataFrame,
+    timeframe: str,
+    symbol: Optional[str] = None,
+    cache: Optional[ResultCache] = None
+) -> Dict:
+    """confluence.run_analysis() through the cache."""
+    cache = default_cache() if cache is None else cache
+    key = cache_key("analysis", frame_fingerprint(df), {"timeframe": timeframe, "symbol": symbol})
+
+    data = cache.get(key)
+    if data is not None:
+        return TimeframeRecord.unpack(data).to_result()
+
+    result = run_analysis(df, timeframe, symbol)
+    cache.put(key, TimeframeRecord.from_result(result).pack())
+    return result
+
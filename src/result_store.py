@@ -0,0 +1,488 @@
+"""
+result_store.py
+---------------------------------
+Shared Local Result Store (SQLite, WAL)
+
+Purpose:
+- One writer (scanner_daemon) stores market frames and confluence
+  results; any number of readers (dashboard sessions, CLI) read them
+- Versioned snapshots: every scan is a new snapshot, readers never see
+  a half-overwritten scan; the last KEEP_SNAPSHOTS are retained
+- WAL journal: readers never block the writer and vice versa
+
+Encoding:
+- analysis: records.encode_scan() payload (~20 bytes / timeframe)
+- frames:   np.savez of the OHLCV columns + int64 UTC index
+- ema_state: one row per timeframe / symbol from the scan's watchlist
+  batch (panel.watchlist_ema_state)
+
+Usage:
+    python -m src.result_store                 # print latest overview
+"""
+
+import io
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.correlation import (
+    BIAS_DIRECTION, CORRELATION_THRESHOLD, DEFAULT_WINDOW,
+    collapse_correlated, correlation_matrix, log_returns
+)
+from src.analysis.panel import OHLCVPanel
+from src.analysis.records import TIMEFRAME_CODES, decode_scan, encode_scan
+
+# =========================
+# CONFIG
+# =========================
+
+DEFAULT_PATH = "scan_store.sqlite"
+KEEP_SNAPSHOTS = 5
+SCHEMA_VERSION = 1
+CORRELATION_TIMEFRAME = "1H"  # returns used to collapse same-move setups
+
+RUNNING = "running"
+COMPLETE = "complete"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at  REAL NOT NULL,
+    finished_at REAL,
+    status      TEXT NOT NULL,
+    days_back   INTEGER,
+    symbols     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    snapshot_id INTEGER NOT NULL,
+    symbol      TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    score       INTEGER,
+    analysis    BLOB,
+    ai          TEXT,
+    errors      TEXT NOT NULL DEFAULT '[]',
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (snapshot_id, symbol)
+);
+CREATE TABLE IF NOT EXISTS frames (
+    snapshot_id INTEGER NOT NULL,
+    symbol      TEXT NOT NULL,
+    timeframe   TEXT NOT NULL,
+    bars        INTEGER NOT NULL,
+    valid       INTEGER NOT NULL,
+    error       TEXT,
+    data        BLOB,
+    PRIMARY KEY (snapshot_id, symbol, timeframe)
+);
+CREATE TABLE IF NOT EXISTS ema_state (
+    snapshot_id INTEGER NOT NULL,
+    timeframe   TEXT NOT NULL,
+    symbol      TEXT NOT NULL,
+    valid       INTEGER NOT NULL,
+    slope       TEXT NOT NULL,
+    position    TEXT NOT NULL,
+    ema         REAL,
+    atr         REAL,
+    PRIMARY KEY (snapshot_id, timeframe, symbol)
+);
+"""
+
+# =========================
+# FRAME ENCODING
+# =========================
+
+FRAME_COLUMNS = ("open", "high", "low", "close", "volume")
+
+
+def frame_to_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        time=df.index.as_unit("ns").asi8,
+        **{column: df[column].to_numpy() for column in FRAME_COLUMNS}
+    )
+    return buffer.getvalue()
+
+
+def frame_from_bytes(data: bytes) -> pd.DataFrame:
+    with np.load(io.BytesIO(data)) as arrays:
+        index = pd.to_datetime(arrays["time"], unit="ns").tz_localize("UTC")
+        return pd.DataFrame(
+            {column: arrays[column] for column in FRAME_COLUMNS},
+            index=pd.DatetimeIndex(index, name="time")
+        )
+
+
+def total_score(analysis: Dict[str, Optional[Dict]]) -> int:
+    """Sum of score_total over the analyzed timeframes."""
+    return sum(
+        result["confluence"]["score_total"]
+        for result in analysis.values()
+        if result
+    )
+
+# =========================
+# STORE
+# =========================
+
+class ResultStore:
+    """
+    Thread-safe handle on the store: one SQLite connection per thread.
+    readonly=True opens the file read-only (dashboard / CLI consumers).
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, readonly: bool = False):
+        self.path = Path(path)
+        self.readonly = readonly
+        self._local = threading.local()
+
+        if not readonly:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self._conn() as conn:
+                conn.executescript(_SCHEMA)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.readonly:
+                conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            else:
+                conn = sqlite3.connect(self.path)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def exists(self) -> bool:
+        """False until the daemon has created the store."""
+        return self.path.exists()
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # -------------------------
+    # Writer
+    # -------------------------
+
+    def begin_snapshot(self, symbols: List[str], days_back: int) -> int:
+        with self._conn() as conn:
+            cursor = conn.execute(
+                "INSERT INTO snapshots (started_at, status, days_back, symbols) VALUES (?, ?, ?, ?)",
+                (time.time(), RUNNING, days_back, json.dumps(list(symbols)))
+            )
+            return cursor.lastrowid
+
+    def finish_snapshot(self, snapshot_id: int, status: str = COMPLETE):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE snapshots SET finished_at = ?, status = ? WHERE id = ?",
+                (time.time(), status, snapshot_id)
+            )
+
+    def put_context(self, snapshot_id: int, symbol: str, tf_context: Dict):
+        rows = [
+            (
+                snapshot_id, symbol, label, info["bars"], int(info["valid"]), info["error"],
+                frame_to_bytes(info["df"]) if info["df"] is not None else None
+            )
+            for label, info in tf_context.items()
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO frames VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def put_analysis(self, snapshot_id: int, symbol: str, analysis: Dict[str, Optional[Dict]]):
+        with self._conn() as conn:
+            conn.execute(
+                """
+                INSERT INTO results (snapshot_id, symbol, status, score, analysis, updated_at)
+                VALUES (?, ?, 'done', ?, ?, ?)
+                ON CONFLICT (snapshot_id, symbol) DO UPDATE SET
+                    status = 'done', score = excluded.score,
+                    analysis = excluded.analysis, updated_at = excluded.updated_at
+                """,
+                (snapshot_id, symbol, total_score(analysis),
+                 encode_scan({symbol: analysis}), time.time())
+            )
+
+    def put_ai(self, snapshot_id: int, symbol: str, opinion: str):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE results SET ai = ?, updated_at = ? WHERE snapshot_id = ? AND symbol = ?",
+                (opinion, time.time(), snapshot_id, symbol)
+            )
+
+    def put_error(self, snapshot_id: int, symbol: str, message: str):
+        with self._conn() as conn:
+            row = conn.execute(
+                "SELECT errors FROM results WHERE snapshot_id = ? AND symbol = ?",
+                (snapshot_id, symbol)
+            ).fetchone()
+            errors = json.loads(row["errors"]) if row else []
+            errors.append(message)
+            conn.execute(
+                """
+                INSERT INTO results (snapshot_id, symbol, status, errors, updated_at)
+                VALUES (?, ?, 'error', ?, ?)
+                ON CONFLICT (snapshot_id, symbol) DO UPDATE SET
+                    errors = excluded.errors, updated_at = excluded.updated_at
+                """,
+                (snapshot_id, symbol, json.dumps(errors), time.time())
+            )
+
+    def put_ema_state(self, snapshot_id: int, states: Dict[str, pd.DataFrame]):
+        """{timeframe: panel.latest_ema_state()} of the whole watchlist."""
+        rows = [
+            (
+                snapshot_id, label, row.Index, int(row.valid), row.slope, row.position,
+                None if np.isnan(row.ema) else float(row.ema),
+                None if np.isnan(row.atr) else float(row.atr)
+            )
+            for label, state in states.items()
+            for row in state.itertuples()
+        ]
+        with self._conn() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ema_state VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def prune(self, keep: int = KEEP_SNAPSHOTS):
+        """Drop all but the `keep` newest snapshots."""
+        with self._conn() as conn:
+            old = [
+                row["id"] for row in conn.execute(
+                    "SELECT id FROM snapshots ORDER BY id DESC LIMIT -1 OFFSET ?", (keep,)
+                )
+            ]
+            tables = (
+                ("frames", "snapshot_id"), ("results", "snapshot_id"),
+                ("ema_state", "snapshot_id"), ("snapshots", "id")
+            )
+            for table, column in tables:
+                conn.executemany(f"DELETE FROM {table} WHERE {column} = ?", [(i,) for i in old])
+
+    # -------------------------
+    # Reader
+    # -------------------------
+
+    def snapshots(self, limit: int = KEEP_SNAPSHOTS) -> List[Dict]:
+        rows = self._conn().execute(
+            "SELECT * FROM snapshots ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [
+            {**dict(row), "symbols": json.loads(row["symbols"])}
+            for row in rows
+        ]
+
+    def latest_snapshot(self, status: Optional[str] = None) -> Optional[Dict]:
+        query = "SELECT * FROM snapshots"
+        params = ()
+        if status is not None:
+            query += " WHERE status = ?"
+            params = (status,)
+        row = self._conn().execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+        if row is None:
+            return None
+        return {**dict(row), "symbols": json.loads(row["symbols"])}
+
+    def progress(self) -> Optional[Dict]:
+        """
+        Latest snapshot with its finished symbol count.
+        """
+        snapshot = self.latest_snapshot()
+        if snapshot is None:
+            return None
+        (finished,) = self._conn().execute(
+            "SELECT COUNT(*) FROM results WHERE snapshot_id = ?", (snapshot["id"],)
+        ).fetchone()
+        return {**snapshot, "finished": finished, "total": len(snapshot["symbols"])}
+
+    def overview(self) -> List[Dict]:
+        """
+        One row per symbol, best score first. Rows of a running scan
+        replace those of the last complete snapshot as they arrive.
+        """
+        latest = self.latest_snapshot()
+        if latest is None:
+            return []
+        complete = self.latest_snapshot(COMPLETE)
+        ids = [latest["id"]]
+        if complete is not None and complete["id"] != latest["id"]:
+            ids.append(complete["id"])
+
+        rows = {}
+        for snapshot_id in ids:  # newest first: first row per symbol wins
+            for row in self._conn().execute(
+                "SELECT * FROM results WHERE snapshot_id = ?", (snapshot_id,)
+            ):
+                rows.setdefault(row["symbol"], row)
+
+        return sorted(
+            (self._overview_row(row) for row in rows.values()),
+            key=lambda row: (row["score"] is None, -(row["score"] or 0), row["symbol"])
+        )
+
+    def _overview_row(self, row: sqlite3.Row) -> Dict:
+        out = {
+            "symbol": row["symbol"],
+            "status": row["status"],
+            "score": row["score"],
+        }
+        if row["analysis"] is not None:
+            for label, result in decode_scan(row["analysis"])[row["symbol"]].items():
+                out[label] = (
+                    f"{result['structure']['bias']} / {result['confluence']['score_total']}"
+                    if result else "n/a"
+                )
+        out["ai"] = "✓" if row["ai"] else ""
+        out["errors"] = "; ".join(json.loads(row["errors"]))
+        out["snapshot"] = row["snapshot_id"]
+        return out
+
+    def detail(self, symbol: str, snapshot_id: Optional[int] = None) -> Optional[Dict]:
+        """
+        Analysis, AI opinion and frames of one symbol (newest snapshot
+        that has it unless snapshot_id is given). Frames are only
+        decoded here, never for the overview.
+        """
+        query = "SELECT * FROM results WHERE symbol = ?"
+        params = [symbol]
+        if snapshot_id is not None:
+            query += " AND snapshot_id = ?"
+            params.append(snapshot_id)
+        row = self._conn().execute(
+            query + " ORDER BY snapshot_id DESC LIMIT 1", params
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "symbol": symbol,
+            "snapshot": row["snapshot_id"],
+            "status": row["status"],
+            "analysis": decode_scan(row["analysis"])[symbol] if row["analysis"] else None,
+            "ai": row["ai"],
+            "errors": json.loads(row["errors"]),
+            "tf_context": self.load_context(row["snapshot_id"], symbol),
+        }
+
+    def correlated_moves(
+        self,
+        snapshot_id: int,
+        timeframe: str = CORRELATION_TIMEFRAME,
+        window: int = DEFAULT_WINDOW,
+        threshold: float = CORRELATION_THRESHOLD
+    ) -> Dict[str, Optional[str]]:
+        """
+        {symbol: best-ranked symbol it duplicates, or None} for the
+        snapshot's results: setups in the same direction-adjusted
+        currency move (correlation of `timeframe` returns) collapse
+        behind the highest score.
+        """
+        conn = self._conn()
+        ranked, directions = [], {}
+        for row in conn.execute(
+            "SELECT symbol, analysis FROM results WHERE snapshot_id = ? "
+            "AND analysis IS NOT NULL ORDER BY score DESC, symbol",
+            (snapshot_id,)
+        ):
+            result = decode_scan(row["analysis"])[row["symbol"]].get(timeframe)
+            ranked.append(row["symbol"])
+            directions[row["symbol"]] = BIAS_DIRECTION.get(result["structure"]["bias"], 0) if result else 0
+
+        frames = {
+            row["symbol"]: frame_from_bytes(row["data"])
+            for row in conn.execute(
+                "SELECT symbol, data FROM frames WHERE snapshot_id = ? "
+                "AND timeframe = ? AND data IS NOT NULL",
+                (snapshot_id, timeframe)
+            )
+        }
+        if not frames:
+            return {symbol: None for symbol in ranked}
+
+        panel = OHLCVPanel.from_frames(frames, fields=("close",))
+        correlation = pd.DataFrame(
+            correlation_matrix(log_returns(panel.field("close")), window),
+            index=panel.symbols, columns=panel.symbols
+        )
+        return collapse_correlated(ranked, directions, correlation, threshold)
+
+    def ema_state(self, snapshot_id: int) -> pd.DataFrame:
+        """
+        EMA slope / position of every symbol and timeframe of the
+        snapshot (watchlist batch), indexed by (timeframe, symbol).
+        """
+        rows = self._conn().execute(
+            "SELECT timeframe, symbol, valid, slope, position, ema, atr FROM ema_state "
+            "WHERE snapshot_id = ? ORDER BY timeframe, symbol",
+            (snapshot_id,)
+        ).fetchall()
+        state = pd.DataFrame(
+            [dict(row) for row in rows],
+            columns=["timeframe", "symbol", "valid", "slope", "position", "ema", "atr"]
+        )
+        state["valid"] = state["valid"].astype(bool)
+        return state.set_index(["timeframe", "symbol"])
+
+    def load_context(self, snapshot_id: int, symbol: str) -> Dict:
+        """Rebuild the data_engine tf_context shape from stored frames."""
+        tf_context = {}
+        rows = self._conn().execute(
+            "SELECT * FROM frames WHERE snapshot_id = ? AND symbol = ?",
+            (snapshot_id, symbol)
+        ).fetchall()
+        rows.sort(key=lambda row: TIMEFRAME_CODES.index(row["timeframe"]))
+        for row in rows:
+            df = frame_from_bytes(row["data"]) if row["data"] is not None else None
+            tf_context[row["timeframe"]] = {
+                "df": df,
+                "bars": row["bars"],
+                "valid": bool(row["valid"]),
+                "suitable": bool(row["valid"]),
+                "price": {
+                    "close": df["close"].iloc[-1],
+                    "high": df["high"].iloc[-1],
+                    "low": df["low"].iloc[-1],
+                } if df is not None and len(df) else None,
+                "error": row["error"],
+            }
+        return tf_context
+
+# =========================
+# CLI (read-only consumer)
+# =========================
+
+if __name__ == "__main__":
+    store = ResultStore(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH, readonly=True)
+    progress = store.progress() if store.exists() else None
+    if progress is None:
+        print("No snapshot yet – start python -m src.scanner_daemon")
+        sys.exit(0)
+
+    print(
+        f"📦 Snapshot {progress['id']} ({progress['status']}): "
+        f"{progress['finished']}/{progress['total']} symbols"
+    )
+    for row in store.overview():
+        print(f"{row['symbol']:>8}  score={row['score']}  {row['status']}  {row['errors']}")
+
+    state = store.ema_state(progress["id"])
+    if len(state):
+        print("\nEMA slope / position:")
+        print((state["slope"] + " / " + state["position"]).unstack("timeframe").fillna("").to_string())
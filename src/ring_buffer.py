@@ -0,0 +1,130 @@
+"""
+ring_buffer.py
+---------------------------------
+Fixed-Capacity Bar Ring Buffer
+
+Purpose:
+- Bounded bar history per (symbol, timeframe) for long-running live
+  mode: memory is allocated once and never grows, append is O(1)
+- Zero-copy windows: the last n bars are always ONE contiguous slice,
+  handed to indicator / structure code as numpy views or a DataFrame
+  over them
+
+Layout (double write):
+- Storage holds 2 x capacity rows; bar k is written at k % capacity
+  AND k % capacity + capacity. The newest `capacity` bars therefore sit
+  in order in storage[next : next + capacity] (next = next write slot),
+  so no window ever wraps around.
+
+Views alias the storage: they stay valid until the next append. Copy
+them to keep bars across appends.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+FIELDS: Tuple[str, ...] = ("open", "high", "low", "close", "volume")
+
+# =========================
+# RING
+# =========================
+
+class BarRing:
+    __slots__ = ("capacity", "fields", "_times", "_data", "_next", "_size")
+
+    def __init__(self, capacity: int, fields: Sequence[str] = FIELDS):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._times = np.zeros(2 * capacity, dtype=np.int64)   # ns UTC
+        self._data = np.zeros((2 * capacity, len(self.fields)), dtype=np.float64)
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._data.nbytes
+
+    @property
+    def last_time(self) -> Optional[pd.Timestamp]:
+        if self._size == 0:
+            return None
+        return pd.Timestamp(int(self._times[self._next + self.capacity - 1]), unit="ns", tz="UTC")
+
+    # -------------------------
+    # Writes
+    # -------------------------
+
+    def append(self, time_ns: int, values: Sequence[float]):
+        """One bar, O(1)."""
+        slot = self._next
+        self._times[slot] = self._times[slot + self.capacity] = time_ns
+        self._data[slot] = self._data[slot + self.capacity] = values
+        self._next = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, times: np.ndarray, values: np.ndarray):
+        """Many bars (time-sorted): only the last `capacity` are written."""
+        times = np.asarray(times, dtype=np.int64)[-self.capacity:]
+        values = np.asarray(values, dtype=np.float64)[-self.capacity:]
+        slots = (self._next + np.arange(len(times))) % self.capacity
+
+        for offset in (0, self.capacity):
+            self._times[slots + offset] = times
+            self._data[slots + offset] = values
+
+        self._next = (self._next + len(times)) % self.capacity
+        self._size = min(self._size + len(times), self.capacity)
+
+    def extend_frame(self, df: pd.DataFrame) -> int:
+        """
+        Append the bars of a standardized frame newer than last_time
+        (overlapping re-fetches are fine). Returns bars appended.
+        """
+        times = df.index.as_unit("ns").asi8
+        if self._size:
+            times_new = times > self._times[self._next + self.capacity - 1]
+            df, times = df[times_new], times[times_new]
+        self.extend(times, df[list(self.fields)].to_numpy(dtype=np.float64))
+        return len(times)
+
+    def clear(self):
+        self._next = 0
+        self._size = 0
+
+    # -------------------------
+    # Zero-copy reads
+    # -------------------------
+
+    def _window(self, n: Optional[int]) -> slice:
+        n = self._size if n is None else min(n, self._size)
+        end = self._next + self.capacity
+        return slice(end - n, end)
+
+    def times(self, n: Optional[int] = None) -> np.ndarray:
+        """int64 ns view of the last n bar times (oldest first)."""
+        return self._times[self._window(n)]
+
+    def values(self, n: Optional[int] = None) -> np.ndarray:
+        """(n, fields) float64 view of the last n bars."""
+        return self._data[self._window(n)]
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        return self._data[self._window(n), self.fields.index(name)]
+
+    def frame(self, n: Optional[int] = None) -> pd.DataFrame:
+        """
+        Standardized OHLCV DataFrame of the last n bars whose columns
+        wrap the ring's storage (no copy of the bar data).
+        """
+        window = self._window(n)
+        index = pd.DatetimeIndex(
+            pd.to_datetime(self._times[window], unit="ns", utc=True), name="time"
+        )
+        return pd.DataFrame(self._data[window], index=index, columns=list(self.fields), copy=False)
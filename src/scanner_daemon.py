@@ -0,0 +1,140 @@
+"""
+scanner_daemon.py
+---------------------------------
+Background Scan Daemon
+
+Purpose:
+- The ONLY process that talks to MT5 and runs analysis
+- Scans the watchlist every `interval` seconds through ScanOrchestrator
+  and writes frames / results / AI opinions into the ResultStore as
+  they arrive (a new versioned snapshot per scan)
+- Dashboard sessions and CLIs read the store: any number of viewers
+  costs one scan
+- Per scan, the EMA state of the whole watchlist is computed in one
+  vectorized pass per timeframe (analysis/panel.py) and stored too
+
+Usage:
+    python -m src.scanner_daemon                       # whole watchlist
+    python -m src.scanner_daemon EURUSD GBPUSD --interval 600 --ai
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+from typing import List, Optional
+
+from src.data_engine import WATCHLIST, connect_mt5, shutdown_mt5
+from src.orchestrator import ScanOrchestrator
+from src.result_store import COMPLETE, DEFAULT_PATH, FAILED, KEEP_SNAPSHOTS, ResultStore
+
+# =========================
+# CONFIG
+# =========================
+
+SCAN_INTERVAL = 300  # seconds between scan starts
+
+# =========================
+# DAEMON
+# =========================
+
+class ScannerDaemon:
+
+    def __init__(
+        self,
+        store: ResultStore,
+        symbols: List[str],
+        days_back: int = 60,
+        interval: float = SCAN_INTERVAL,
+        keep: int = KEEP_SNAPSHOTS,
+        **orchestrator_options
+    ):
+        """
+        orchestrator_options: forwarded to ScanOrchestrator (ai_enabled,
+        analysis_workers, api_key, cache_path, ...).
+        """
+        self.store = store
+        self.symbols = list(symbols)
+        self.days_back = days_back
+        self.interval = interval
+        self.keep = keep
+        self.orchestrator_options = orchestrator_options
+
+    async def scan_once(self, orch: ScanOrchestrator) -> int:
+        """Run one scan into a new snapshot; returns its id."""
+        snapshot_id = self.store.begin_snapshot(self.symbols, self.days_back)
+        status = FAILED
+        try:
+            async for event in orch.scan(self.symbols):
+                if event.kind == "context":
+                    self.store.put_context(snapshot_id, event.symbol, event.payload)
+                elif event.kind == "analysis":
+                    self.store.put_analysis(snapshot_id, event.symbol, event.payload)
+                elif event.kind == "ai":
+                    self.store.put_ai(snapshot_id, event.symbol, event.payload)
+                elif event.kind == "watchlist":
+                    self.store.put_ema_state(snapshot_id, event.payload)
+                else:
+                    self.store.put_error(snapshot_id, event.symbol, event.payload)
+            status = COMPLETE
+        finally:
+            self.store.finish_snapshot(snapshot_id, status)
+            self.store.prune(self.keep)
+        return snapshot_id
+
+    async def _run(self, stop_event: threading.Event):
+        loop = asyncio.get_running_loop()
+        async with ScanOrchestrator(
+            days_back=self.days_back, emit_context=True, watchlist_state=True,
+            **self.orchestrator_options
+        ) as orch:
+            while not stop_event.is_set():
+                started = time.monotonic()
+                try:
+                    snapshot_id = await self.scan_once(orch)
+                    print(f"📦 snapshot {snapshot_id} done in {time.monotonic() - started:.1f}s")
+                except Exception as e:
+                    print(f"[ERROR] scan failed – {e}")
+
+                delay = max(0.0, self.interval - (time.monotonic() - started))
+                await loop.run_in_executor(None, stop_event.wait, delay)
+
+    def run(self, stop_event: Optional[threading.Event] = None):
+        asyncio.run(self._run(stop_event or threading.Event()))
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scan the watchlist into the shared result store")
+    parser.add_argument("symbols", nargs="*", help="default: watchlist.yaml")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    parser.add_argument("--interval", type=float, default=SCAN_INTERVAL)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--keep", type=int, default=KEEP_SNAPSHOTS)
+    parser.add_argument("--ai", action="store_true", help="request AI opinions")
+    parser.add_argument("--compact", action="store_true", help="float32 / int32 frames (src/compact.py)")
+    parser.add_argument("--custom", nargs="*", default=(), help="tick-built timeframes, e.g. 2H 3H 45m")
+    parser.add_argument("--no-result-cache", action="store_true", help="always re-analyze every frame")
+    args = parser.parse_args()
+
+    daemon = ScannerDaemon(
+        ResultStore(args.db),
+        args.symbols or WATCHLIST,
+        days_back=args.days,
+        interval=args.interval,
+        keep=args.keep,
+        ai_enabled=args.ai,
+        compact=args.compact,
+        custom_timeframes=args.custom,
+        result_cache=not args.no_result_cache,
+    )
+
+    try:
+        connect_mt5()
+        daemon.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutdown_mt5()
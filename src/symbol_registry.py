@@ -0,0 +1,144 @@
+"""
+symbol_registry.py
+---------------------------------
+Symbol Metadata Registry
+
+Purpose:
+- One place for broker symbol specs (digits, point, tick size / value,
+  contract size, trade mode, currencies), resolved from MT5 in ONE bulk
+  symbols_get() per refresh (data_engine.resolve_symbols) instead of a
+  call per symbol / timeframe
+- Persisted to a local JSON file so processes without an MT5
+  connection (dashboard, pool workers) read the same specs
+- O(1) lookups for every module: registry.get(symbol), registry.digits()
+
+This module never imports MetaTrader5; data_engine fills it.
+
+Environment:
+- TRADING_SYMBOLS_PATH=<file>        default ./symbols.json
+- TRADING_SYMBOLS_REFRESH=<seconds>  spec age before a re-resolve
+                                     (default 1 day)
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional
+
+DEFAULT_PATH = os.getenv("TRADING_SYMBOLS_PATH", "symbols.json")
+REFRESH_SECONDS = float(os.getenv("TRADING_SYMBOLS_REFRESH", 24 * 3600))
+
+# =========================
+# SPEC
+# =========================
+
+class SymbolSpec(NamedTuple):
+    symbol: str
+    digits: int
+    point: float
+    tick_size: float
+    tick_value: float
+    contract_size: float
+    trade_mode: int
+    currency_base: str
+    currency_profit: str
+    description: str
+    updated_at: float
+
+    @classmethod
+    def from_info(cls, info, updated_at: Optional[float] = None) -> "SymbolSpec":
+        """From an MT5 SymbolInfo (mt5.symbols_get() / symbol_info())."""
+        return cls(
+            symbol=info.name,
+            digits=int(info.digits),
+            point=float(info.point),
+            tick_size=float(info.trade_tick_size),
+            tick_value=float(info.trade_tick_value),
+            contract_size=float(info.trade_contract_size),
+            trade_mode=int(info.trade_mode),
+            currency_base=info.currency_base,
+            currency_profit=info.currency_profit,
+            description=info.description,
+            updated_at=time.time() if updated_at is None else updated_at,
+        )
+
+# =========================
+# REGISTRY
+# =========================
+
+class SymbolRegistry:
+
+    def __init__(self, path: str = DEFAULT_PATH, refresh_seconds: float = REFRESH_SECONDS):
+        self.path = Path(path)
+        self.refresh_seconds = refresh_seconds
+        self._specs: Dict[str, SymbolSpec] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.get(symbol) is not None
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._specs)
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    def load(self):
+        """(Re)read the JSON file; a missing or corrupt file leaves the registry empty."""
+        with self._lock:
+            specs = {}
+            if self.path.exists():
+                try:
+                    data = json.loads(self.path.read_text(encoding="utf-8"))
+                    specs = {name: SymbolSpec(**spec) for name, spec in data["symbols"].items()}
+                except (ValueError, KeyError, TypeError) as e:
+                    print(f"[WARN] {self.path} ignored – {e}")
+            self._specs = specs
+            self._loaded = True
+
+    def save(self):
+        with self._lock:
+            data = {"symbols": {name: spec._asdict() for name, spec in sorted(self._specs.items())}}
+            tmp = self.path.with_name(self.path.name + ".tmp")
+            tmp.write_text(json.dumps(data, indent=1), encoding="utf-8")
+            os.replace(tmp, self.path)
+
+    # -------------------------
+    # Access
+    # -------------------------
+
+    def update(self, specs: Iterable[SymbolSpec]):
+        self._ensure_loaded()
+        with self._lock:
+            for spec in specs:
+                self._specs[spec.symbol] = spec
+
+    def get(self, symbol: str) -> Optional[SymbolSpec]:
+        self._ensure_loaded()
+        return self._specs.get(symbol)
+
+    def digits(self, symbol: str) -> Optional[int]:
+        spec = self.get(symbol)
+        return None if spec is None else spec.digits
+
+    def stale(self, symbols: Iterable[str], now: Optional[float] = None) -> bool:
+        """True when any symbol is unknown or older than refresh_seconds."""
+        self._ensure_loaded()
+        now = time.time() if now is None else now
+        for symbol in symbols:
+            spec = self._specs.get(symbol)
+            if spec is None or now - spec.updated_at > self.refresh_seconds:
+                return True
+        return False
+
+
+registry = SymbolRegistry()
@@ -0,0 +1,91 @@
+"""
+synthetic.py
+---------------------------------
+Deterministic Synthetic OHLCV (benchmarks and tests)
+
+Purpose:
+- synthetic_rates: raw copy_rates_range-shaped frame from a seeded
+  random walk with volatility regimes, no MT5 needed
+- to_ohlcv: standardize_dataframe() equivalent for those frames
+- kernel_inputs: arguments of every kernels.* function on one frame
+
+Usage:
+    df = to_ohlcv(synthetic_rates(10_000, seed=1))
+    args = kernel_inputs(df)["zigzag"]
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import aoi, ema, structure
+
+
+def synthetic_rates(n_bars: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Raw copy_rates_range-shaped frame (time index, tick_volume, spread,
+    real_volume) from a deterministic random walk with volatility regimes.
+    """
+    rng = np.random.default_rng(seed)
+    vol = 0.0008 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)).clip(-1, 1))
+    close = 1.10 * np.exp(np.cumsum(rng.normal(0, 1, n_bars) * vol))
+    open_ = np.r_[close[0], close[:-1]]
+    wick = np.abs(rng.normal(0, 1, (2, n_bars))) * vol * close
+
+    df = pd.DataFrame({
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close,
+        "tick_volume": rng.integers(50, 5_000, n_bars),
+        "spread": rng.integers(0, 20, n_bars),
+        "real_volume": np.zeros(n_bars, dtype=np.int64),
+    })
+    df.index = pd.date_range(
+        "2000-01-03", periods=n_bars, freq="30min", tz="UTC", name="time"
+    )
+    return df
+
+
+def to_ohlcv(raw: pd.DataFrame) -> pd.DataFrame:
+    """standardize_dataframe() equivalent without importing MT5."""
+    df = raw[["open", "high", "low", "close", "tick_volume"]].copy()
+    df.columns = ["open", "high", "low", "close", "volume"]
+    return df
+
+
+def kernel_inputs(df: pd.DataFrame, seed: int = 0) -> Dict[str, tuple]:
+    """Arguments of every kernels.* function on one frame."""
+    high = df["high"].to_numpy()
+    low = df["low"].to_numpy()
+    close = df["close"].to_numpy()
+    atr = ema.calculate_atr(df).bfill().to_numpy()
+
+    _, prices, is_high = structure.swing_candidate_arrays(df)
+
+    zones = aoi.detect_htf_aoi(df, "4H")
+    origins = np.array([z["origin_index"] for z in zones], dtype=np.int64)
+    zone_args = (
+        high, low, close,
+        np.array([z["low"] for z in zones], dtype=float),
+        np.array([z["high"] for z in zones], dtype=float),
+        np.array([1 if z["type"] == aoi.AOIType.DEMAND else -1 for z in zones], dtype=np.int64),
+        origins + 2, 10, atr[origins],
+    )
+
+    rng = np.random.default_rng(seed)
+    entry = np.sort(rng.choice(len(df), size=max(1, len(df) // 50), replace=False)).astype(np.int64)
+    direction = rng.choice(np.array([-1, 1], dtype=np.int64), size=len(entry))
+    trade_args = (
+        high, low, entry, direction,
+        close[entry] - direction * atr[entry],
+        close[entry] + direction * atr[entry] * 2, 50,
+    )
+
+    return {
+        "zigzag": (prices, is_high),
+        "zone_touches": zone_args,
+        "resolve_trades": trade_args,
+        "ema_recursive": (close, 2.0 / 51),
+    }
@@ -0,0 +1,221 @@
+"""
+tick_store.py
+---------------------------------
+Compressed Local Tick Store
+
+Purpose:
+- Keep MT5 ticks (copy_ticks_range / copy_ticks_from) on disk so custom
+  timeframes can be rebuilt without re-downloading history
+- One compressed .npz per symbol and UTC day:
+    <root>/<SYMBOL>/<YYYY-MM-DD>.npz
+- Lossless encoding that compresses well:
+    time_msc        delta-encoded int64
+    bid / ask / last integer points at the symbol's digits, delta-encoded
+                    (raw float64 when the prices are not exact decimals)
+    volume / flags / volume_real  as received
+  "time" (seconds) is rebuilt from time_msc on read
+
+Appends only take ticks strictly newer than the last stored one, so
+overlapping ingests are safe.
+
+Environment:
+- TRADING_TICK_DIR=<dir>   store root (default ./ticks)
+
+Usage:
+    python -m src.tick_store EURUSD --days 7     # ingest from MT5
+"""
+
+import argparse
+import os
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.compact import infer_digits
+
+DEFAULT_ROOT = os.getenv("TRADING_TICK_DIR", "ticks")
+
+# numpy dtype of MetaTrader5.copy_ticks_*() results
+TICK_DTYPE = np.dtype([
+    ("time", "<i8"),
+    ("bid", "<f8"),
+    ("ask", "<f8"),
+    ("last", "<f8"),
+    ("volume", "<u8"),
+    ("time_msc", "<i8"),
+    ("flags", "<u4"),
+    ("volume_real", "<f8"),
+])
+
+PRICE_FIELDS = ("bid", "ask", "last")
+RAW_FIELDS = ("volume", "flags", "volume_real")
+MS_PER_DAY = 86_400_000
+
+# =========================
+# ENCODING
+# =========================
+
+def _delta(values: np.ndarray) -> np.ndarray:
+    return np.diff(values, prepend=np.int64(0))
+
+
+def encode_ticks(ticks: np.ndarray) -> Dict[str, np.ndarray]:
+    arrays = {"time_msc": _delta(ticks["time_msc"].astype(np.int64))}
+
+    for field in PRICE_FIELDS:
+        prices = ticks[field]
+        digits = infer_digits(prices)
+        points = np.round(prices * 10.0 ** digits).astype(np.int64)
+        if np.array_equal(points / 10.0 ** digits, prices):
+            arrays[field] = _delta(points)
+            arrays[f"{field}_digits"] = np.array(digits, dtype=np.int8)
+        else:
+            arrays[field] = prices
+
+    for field in RAW_FIELDS:
+        arrays[field] = ticks[field]
+    return arrays
+
+
+def decode_ticks(arrays) -> np.ndarray:
+    time_msc = np.cumsum(arrays["time_msc"])
+    ticks = np.empty(len(time_msc), dtype=TICK_DTYPE)
+    ticks["time_msc"] = time_msc
+    ticks["time"] = time_msc // 1000
+
+    for field in PRICE_FIELDS:
+        digits_key = f"{field}_digits"
+        if digits_key in arrays:
+            ticks[field] = np.cumsum(arrays[field]) / 10.0 ** int(arrays[digits_key])
+        else:
+            ticks[field] = arrays[field]
+
+    for field in RAW_FIELDS:
+        ticks[field] = arrays[field]
+    return ticks
+
+# =========================
+# STORE
+# =========================
+
+def _day(time_msc: int) -> date:
+    return datetime.fromtimestamp(time_msc / 1000, tz=timezone.utc).date()
+
+
+def _msc(when) -> int:
+    """datetime / date / epoch ms -> epoch ms."""
+    if isinstance(when, datetime):
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        return int(when.timestamp() * 1000)
+    if isinstance(when, date):
+        return int(datetime(when.year, when.month, when.day, tzinfo=timezone.utc).timestamp() * 1000)
+    return int(when)
+
+
+class TickStore:
+
+    def __init__(self, root: str = DEFAULT_ROOT):
+        self.root = Path(root)
+
+    def path(self, symbol: str, day: date) -> Path:
+        return self.root / symbol / f"{day.isoformat()}.npz"
+
+    def days(self, symbol: str) -> List[date]:
+        folder = self.root / symbol
+        if not folder.is_dir():
+            return []
+        return sorted(date.fromisoformat(p.stem) for p in folder.glob("*.npz"))
+
+    def _load(self, path: Path) -> np.ndarray:
+        with np.load(path) as arrays:
+            return decode_ticks(arrays)
+
+    def last_time_msc(self, symbol: str) -> Optional[int]:
+        days = self.days(symbol)
+        if not days:
+            return None
+        ticks = self._load(self.path(symbol, days[-1]))
+        return int(ticks["time_msc"][-1]) if len(ticks) else None
+
+    # -------------------------
+    # Writes
+    # -------------------------
+
+    def append(self, symbol: str, ticks: np.ndarray) -> int:
+        """Store time-sorted ticks newer than the last stored one. Returns ticks written."""
+        last = self.last_time_msc(symbol)
+        if last is not None:
+            ticks = ticks[ticks["time_msc"] > last]
+        if len(ticks) == 0:
+            return 0
+
+        (self.root / symbol).mkdir(parents=True, exist_ok=True)
+        day_index = ticks["time_msc"] // MS_PER_DAY
+        starts = np.flatnonzero(np.r_[True, day_index[1:] != day_index[:-1]])
+
+        for start, end in zip(starts, np.r_[starts[1:], len(ticks)]):
+            chunk = ticks[start:end]
+            path = self.path(symbol, _day(int(chunk["time_msc"][0])))
+            if path.exists():
+                chunk = np.concatenate([self._load(path), chunk.astype(TICK_DTYPE)])
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **encode_ticks(chunk))
+            os.replace(tmp, path)
+
+        return len(ticks)
+
+    # -------------------------
+    # Reads
+    # -------------------------
+
+    def read(self, symbol: str, start=None, end=None) -> np.ndarray:
+        """
+        Ticks with start <= time < end (datetime / date / epoch ms,
+        None = unbounded), in TICK_DTYPE.
+        """
+        start_msc = None if start is None else _msc(start)
+        end_msc = None if end is None else _msc(end)
+
+        chunks = []
+        for day in self.days(symbol):
+            day_msc = _msc(day)
+            if start_msc is not None and day_msc + MS_PER_DAY <= start_msc:
+                continue
+            if end_msc is not None and day_msc >= end_msc:
+                break
+            chunks.append(self._load(self.path(symbol, day)))
+
+        if not chunks:
+            return np.empty(0, dtype=TICK_DTYPE)
+
+        ticks = np.concatenate(chunks)
+        times = ticks["time_msc"]
+        lo = 0 if start_msc is None else np.searchsorted(times, start_msc, "left")
+        hi = len(ticks) if end_msc is None else np.searchsorted(times, end_msc, "left")
+        return ticks[lo:hi]
+
+# =========================
+# CLI
+# =========================
+
+if __name__ == "__main__":
+    from src.data_engine import connect_mt5, ingest_ticks, shutdown_mt5
+
+    parser = argparse.ArgumentParser(description="Download MT5 ticks into the local tick store")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--days", type=int, default=7, help="history when the store is empty")
+    parser.add_argument("--root", default=DEFAULT_ROOT)
+    args = parser.parse_args()
+
+    store = TickStore(args.root)
+    try:
+        connect_mt5()
+        for symbol in args.symbols:
+            written = ingest_ticks(store, symbol, args.days)
+            print(f"💾 {symbol}: +{written} ticks")
+    finally:
+        shutdown_mt5()
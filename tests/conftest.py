@@ -0,0 +1,86 @@
+"""
+Shared fixtures: synthetic OHLCV and a local OpenAI-compatible stub server.
+
+Run from the repository root:
+    python -m pytest -q
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.synthetic import synthetic_rates, to_ohlcv
+
+
+@pytest.fixture
+def ohlcv():
+    """Factory: standardized synthetic OHLCV frame of n bars."""
+    def make(n_bars: int = 600, seed: int = 42):
+        return to_ohlcv(synthetic_rates(n_bars, seed))
+    return make
+
+# =========================
+# STUB AI SERVER
+# =========================
+
+class StubServer:
+    """
+    /chat/completions answering "opinion: <last prompt line>".
+    Prompts containing slow_marker are answered after slow_seconds.
+    """
+    slow_marker = "SLOW"
+    slow_seconds = 1.0
+
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][-1]["content"]
+                with stub._lock:
+                    stub.prompts.append(prompt)
+                if stub.slow_marker in prompt:
+                    time.sleep(stub.slow_seconds)
+
+                data = json.dumps({
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": f"opinion: {prompt.splitlines()[-1]}"},
+                        "finish_reason": "stop",
+                    }],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_port}/v1"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def ai_stub():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+from src.ai_service import AIOpinionService
+
+
+def _service(stub, **options):
+    return AIOpinionService(api_key="test", base_url=stub.url, rate_per_second=100, burst=100, **options)
+
+
+def test_opinion_round_trip_and_cache(ai_stub):
+    async def scenario():
+        service = _service(ai_stub)
+        try:
+            first = await service.opinion("EURUSD setup")
+            second = await service.opinion("EURUSD setup")
+        finally:
+            await service.close()
+        return first, second, service.stats()
+
+    first, second, stats = asyncio.run(scenario())
+    assert first == second == "opinion: EURUSD setup"
+    assert len(ai_stub.prompts) == 1
+    assert stats["hits"] == 1 and stats["misses"] == 1
+
+
+def test_identical_inflight_prompts_share_one_request(ai_stub):
+    async def scenario():
+        service = _service(ai_stub)
+        try:
+            return await asyncio.gather(*(service.opinion("GBPUSD setup") for _ in range(5)))
+        finally:
+            await service.close()
+
+    answers = asyncio.run(scenario())
+    assert set(answers) == {"opinion: GBPUSD setup"}
+    assert len(ai_stub.prompts) == 1
+
+
+def test_slow_opinion_does_not_delay_others(ai_stub):
+    async def scenario():
+        service = _service(ai_stub)
+        finished = {}
+
+        async def ask(name, prompt):
+            await service.opinion(prompt)
+            finished[name] = time.perf_counter()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(ask("slow", f"{ai_stub.slow_marker} setup"), ask("fast", "USDJPY setup"))
+        finally:
+            await service.close()
+        return {name: t - start for name, t in finished.items()}
+
+    elapsed = asyncio.run(scenario())
+    assert elapsed["fast"] < ai_stub.slow_seconds / 2
+    assert elapsed["slow"] >= ai_stub.slow_seconds
+
+
+def test_waiter_takes_over_when_leader_is_cancelled(ai_stub):
+    async def scenario():
+        service = _service(ai_stub)
+        prompt = f"{ai_stub.slow_marker} cancelled leader"
+        try:
+            leader = asyncio.create_task(service.opinion(prompt))
+            await asyncio.sleep(0.05)
+            waiter = asyncio.create_task(service.opinion(prompt))
+            await asyncio.sleep(0.05)
+            leader.cancel()
+            answer = await waiter
+        finally:
+            await service.close()
+        return leader.cancelled(), answer
+
+    leader_cancelled, answer = asyncio.run(scenario())
+    assert leader_cancelled
+    assert answer.startswith("opinion: ")
+
+
+def test_service_survives_successive_event_loops(ai_stub):
+    # concurrency=1: the second prompt of each loop waits on the semaphore
+    service = _service(ai_stub, concurrency=1)
+
+    async def ask(*prompts):
+        return await asyncio.gather(*(service.opinion(p) for p in prompts))
+
+    # run_scan() style: one asyncio.run() per scan, same shared service
+    assert asyncio.run(ask("AUDUSD setup", "NZDUSD setup")) == [
+        "opinion: AUDUSD setup", "opinion: NZDUSD setup"
+    ]
+    assert asyncio.run(ask("USDCAD setup", "USDCHF setup")) == [
+        "opinion: USDCAD setup", "opinion: USDCHF setup"
+    ]
+    asyncio.run(service.close())
+
+    stats = service.stats()
+    assert stats["misses"] == 4
+    assert stats["avg_latency"] > 0
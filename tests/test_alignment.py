@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src import optimizer
+from src.analysis import aoi, structure
+from src.analysis.alignment import (
+    STRUCTURE_CODES, align_htf_state, align_timeframes, htf_state, in_htf_aoi, structure_bias_codes
+)
+
+HOUR = pd.Timedelta(hours=1)
+
+
+def _resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+    return df.resample(rule).agg(
+        {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    ).dropna()
+
+
+def test_ltf_bars_only_see_closed_htf_bars(ohlcv):
+    ltf = ohlcv(3_000)              # 30m
+    htf = _resample(ltf, "4h")
+    aligned = align_htf_state(ltf, htf_state(htf), ltf_seconds=1800, htf_seconds=4 * 3600)
+
+    ltf_close = ltf.index + pd.Timedelta(minutes=30)
+    known = aligned["htf_time"].notna().to_numpy()
+
+    # nothing before the first 4H close (the 8th 30m bar closes it)
+    assert not known[:7].any() and known[7:].all()
+    assert (aligned["htf_time"][known] + 4 * HOUR <= ltf_close[known]).all()
+    # ...and always the latest one that has closed
+    assert (aligned["htf_time"][known] + 8 * HOUR > ltf_close[known]).all()
+    assert aligned["close"][known].equals(
+        htf["close"].reindex(aligned["htf_time"][known]).set_axis(ltf.index[known])
+    )
+    assert not aligned["in_aoi"][~known].any()
+
+    positions = align_timeframes(ltf.index, htf.index, 1800, 4 * 3600)
+    assert (positions.closed[:7] == -1).all()
+    assert (positions.forming >= positions.closed).all()
+
+
+def test_htf_state_matches_prefix_recompute(ohlcv):
+    df = ohlcv(400, seed=5)
+    codes = structure_bias_codes(df)
+    inside = in_htf_aoi(df)
+
+    for i in range(0, len(df), 7):
+        prefix = df.iloc[:i + 1]
+        bias = structure.classify_structure_from_swings(structure.detect_swings(prefix))
+        assert STRUCTURE_CODES[codes[i]] == bias, i
+
+        close = prefix["close"].iloc[-1]
+        zones = aoi.detect_htf_aoi(prefix, "4H", annotate=False)
+        assert inside[i] == any(z["low"] <= close <= z["high"] for z in zones), i
+
+
+def test_sweep_records_the_closed_htf_bias(ohlcv):
+    ltf = ohlcv(1_200, seed=2)  # 30m
+    htf = _resample(ltf, "4h")
+    grid = optimizer.build_grid()
+    table = optimizer.sweep_frame("EURUSD", "30m", ltf, grid, htf_df=htf)
+
+    ends = optimizer.window_ends(len(ltf), 300, 20, 10)
+    codes = structure_bias_codes(htf)
+    expected = []
+    for end in ends:
+        # bias of the last 4H bar closed by the close of bar end - 1
+        last_close = ltf.index[end - 1] + pd.Timedelta(minutes=30)
+        k = np.flatnonzero(htf.index + 4 * HOUR <= last_close)[-1]
+        expected.append({"bullish": 1, "bearish": -1}.get(STRUCTURE_CODES[codes[k]].value, 0))
+    np.testing.assert_array_equal(table["htf_direction"], expected)
+    assert set(expected) - {0}
+
+    plain = optimizer.sweep_frame("EURUSD", "30m", ltf, grid)
+    assert (plain["htf_direction"] == 0).all()
+    agree = optimizer.traded(table, min_score=0, htf_filter=True)
+    assert (table["direction"][agree] == table["htf_direction"][agree]).all()
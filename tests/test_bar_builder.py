@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from src.bar_builder import StoredBars, ticks_to_bars
+from src.tick_store import TICK_DTYPE, TickStore
+
+START = datetime(2024, 3, 4, tzinfo=timezone.utc)
+
+
+def make_ticks(n: int, start_msc: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    ticks = np.zeros(n, dtype=TICK_DTYPE)
+    ticks["time_msc"] = start_msc + np.cumsum(rng.integers(1, 20_000, n))
+    ticks["time"] = ticks["time_msc"] // 1000
+    ticks["bid"] = np.round(1.1 + np.cumsum(rng.normal(0, 1e-4, n)), 5)
+    ticks["ask"] = ticks["bid"] + 0.0001
+    return ticks
+
+
+def test_stored_bars_only_read_new_ticks(tmp_path):
+    store = TickStore(str(tmp_path))
+    start_msc = int(START.timestamp() * 1000)
+    first = make_ticks(20_000, start_msc)
+    second = make_ticks(5_000, int(first["time_msc"][-1]), seed=1)
+
+    series = StoredBars(3 * 3600, days_back=30)
+    store.append("EURUSD", first)
+    df = series.frame(store, "EURUSD", START)
+    pd.testing.assert_frame_equal(df, ticks_to_bars(first, 3 * 3600))
+
+    store.append("EURUSD", second)
+    assert series.update(store, "EURUSD", START) == len(second)
+    assert series.update(store, "EURUSD", START) == 0
+
+    expected = ticks_to_bars(store.read("EURUSD", start=START), 3 * 3600)
+    pd.testing.assert_frame_equal(series.frame(store, "EURUSD", START), expected)
+
+
+def test_stored_bars_window_moves_with_start(tmp_path):
+    store = TickStore(str(tmp_path))
+    ticks = make_ticks(30_000, int(START.timestamp() * 1000))
+    store.append("EURUSD", ticks)
+
+    series = StoredBars(3600, days_back=2)
+    later = START + pd.Timedelta(days=1)
+    df = series.frame(store, "EURUSD", START)
+    moved = series.frame(store, "EURUSD", later)
+    assert moved.index[0] >= later
+    pd.testing.assert_frame_equal(moved, df[df.index >= later])
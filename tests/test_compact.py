@@ -0,0 +1,36 @@
+import numpy as np
+
+from src.analysis import aoi
+from src.analysis.structure import StructureBias
+from src.compact import categorical, frame_bytes, zone_columns, zones_bytes, zones_from_columns
+
+
+def test_zone_columns_round_trip(ohlcv):
+    df = ohlcv(2_000, 7).round(5)  # EURUSD-like quotes
+    htf = aoi.detect_htf_aoi(df, "4H")
+    ltf = aoi.detect_ltf_aoi(df.iloc[-400:], "30m", htf[-3:])
+    zones = htf + ltf
+    assert any(zone["broken_at"] is not None for zone in htf)
+    assert any(zone["reactions"] for zone in htf)
+
+    table = zone_columns(zones, digits=5)
+    assert len(table) == len(zones)
+    assert table["type"].cat.codes.dtype == np.int8
+    assert table["low"].dtype == np.float32
+    # LTF zones carry no broken_at; the columns report them unbroken
+    assert zones_from_columns(table) == [{**zone, "broken_at": zone.get("broken_at")} for zone in zones]
+    assert frame_bytes(table) < zones_bytes(zones)
+
+
+def test_zone_columns_empty():
+    table = zone_columns([])
+    assert len(table) == 0
+    assert zones_from_columns(table) == []
+
+
+def test_categorical_biases():
+    values = [StructureBias.BULLISH, "range", StructureBias.BEARISH, "bullish"]
+    biases = categorical(values, StructureBias)
+    assert biases.codes.dtype == np.int8
+    assert list(biases.categories) == [b.value for b in StructureBias]
+    assert list(biases) == ["bullish", "range", "bearish", "bullish"]
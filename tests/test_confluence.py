@@ -0,0 +1,39 @@
+from src.analysis import aoi
+from src.analysis.confluence import run_analysis
+
+
+def test_confluence_scores_the_zone_holding_the_price(ohlcv):
+    # Across a few frames, the last close lands inside a live zone
+    inside = outside = 0
+    for seed in range(10):
+        df = ohlcv(1_500, seed)
+        zones = aoi.detect_htf_aoi(df, "4H")
+        price = df["close"].iloc[-1]
+        active = [
+            zone for zone in zones
+            if zone["broken_at"] is None and zone["low"] <= price <= zone["high"]
+        ]
+        reasons = run_analysis(df, "4H")["confluence"]["reasons"]
+        if active:
+            inside += 1
+            assert "htf_aoi" in reasons
+            assert ("ema_inside_htf_aoi" in reasons) == ("ema_invalid" not in reasons)
+        else:
+            outside += 1
+            assert "htf_aoi" not in reasons
+            assert "ema_inside_htf_aoi" not in reasons
+    assert inside and outside
+
+
+def test_confluence_psych_bonus_needs_the_symbol(ohlcv):
+    # synthetic EURUSD-like prices: some active zones sit on a round figure
+    seen = set()
+    for seed in range(30):
+        df = ohlcv(1_500, seed)
+        without = run_analysis(df, "4H")["confluence"]
+        with_symbol = run_analysis(df, "4H", "EURUSD")["confluence"]
+        assert "aoi_at_psych_level" not in without["reasons"]
+        bonus = "aoi_at_psych_level" in with_symbol["reasons"]
+        assert with_symbol["score_total"] - without["score_total"] == (10 if bonus else 0)
+        seen.add(bonus)
+    assert seen == {True, False}
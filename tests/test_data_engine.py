@@ -0,0 +1,142 @@
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("MetaTrader5")  # data_engine needs the MT5 package
+
+from src import data_engine  # noqa: E402
+from src.bar_schedule import BarCloseCache  # noqa: E402
+from src.symbol_registry import SymbolRegistry  # noqa: E402
+
+
+def test_reconnect_and_shutdown_forget_selected_symbols(monkeypatch):
+    monkeypatch.setattr(data_engine.mt5, "shutdown", lambda: None)
+    monkeypatch.setattr(data_engine, "connect_mt5", lambda: None)
+    monkeypatch.setattr(data_engine.time, "sleep", lambda seconds: None)
+
+    data_engine._selected.update({"EURUSD", "XAUUSD"})
+    data_engine._unknown["NOPE"] = time.time()
+    data_engine.reconnect_mt5()
+    assert not data_engine._selected and not data_engine._unknown
+
+    data_engine._selected.add("EURUSD")
+    data_engine._unknown["NOPE"] = time.time()
+    data_engine.shutdown_mt5()
+    assert not data_engine._selected and not data_engine._unknown
+
+
+def test_unknown_symbols_are_not_looked_up_every_scan(monkeypatch, tmp_path, capsys):
+    class Info:
+        def __init__(self, name):
+            self.name, self.visible = name, True
+            self.digits, self.point = 5, 1e-5
+            self.trade_tick_size, self.trade_tick_value, self.trade_contract_size = 1e-5, 1.0, 1e5
+            self.trade_mode, self.currency_base, self.currency_profit = 4, "EUR", "USD"
+            self.description = name
+
+    lookups = []
+
+    def symbols_get(group=""):
+        lookups.append(group)
+        return tuple(Info(name) for name in group.split(",") if name != "NOPE")
+
+    registry = SymbolRegistry(tmp_path / "symbols.json", refresh_seconds=3600)
+    saves = []
+    monkeypatch.setattr(registry, "save", lambda: saves.append(1))
+    monkeypatch.setattr(data_engine, "symbol_registry", registry)
+    monkeypatch.setattr(data_engine.mt5, "symbols_get", symbols_get, raising=False)
+    monkeypatch.setattr(data_engine, "_selected", set())
+    monkeypatch.setattr(data_engine, "_unknown", {})
+    clock = [1_000_000.0]
+    monkeypatch.setattr(data_engine.time, "time", lambda: clock[0])
+
+    specs = data_engine.resolve_symbols(["EURUSD", "NOPE"])
+    assert list(specs) == ["EURUSD"]
+    assert lookups == ["EURUSD,NOPE"] and len(saves) == 1
+    assert capsys.readouterr().out.count("NOPE unknown") == 1
+
+    # next scans: nothing to look up, no rewrite, no repeated warning
+    for _ in range(3):
+        assert list(data_engine.resolve_symbols(["EURUSD", "NOPE"])) == ["EURUSD"]
+    assert len(lookups) == 1 and len(saves) == 1
+    assert "NOPE" not in capsys.readouterr().out
+    with pytest.raises(ValueError):
+        data_engine.ensure_symbol("NOPE")
+    assert len(lookups) == 1
+
+    # re-checked once the refresh interval has passed
+    clock[0] += 3601
+    data_engine.resolve_symbols(["EURUSD", "NOPE"])
+    assert lookups[1:] == ["EURUSD,NOPE"]
+    data_engine.resolve_symbols(["EURUSD", "NOPE"])
+    assert len(lookups) == 2
+
+
+def _rates(opens, close):
+    return pd.DataFrame(
+        {"open": close, "high": close + 0.001, "low": close - 0.001, "close": close, "tick_volume": 100},
+        index=pd.to_datetime(opens, unit="s", utc=True).rename("time"),
+    )
+
+
+def test_cached_frames_refresh_the_forming_bar(monkeypatch):
+    hour = 3600
+    opens = np.arange(600) * hour
+    history = _rates(opens, np.linspace(1.1, 1.2, len(opens)))
+    fetches = []
+
+    def fetch_with_retry(symbol, label, tf, from_date, to_date):
+        fetches.append(label)
+        return history
+    forming = {"bar": history.iloc[-1:]}
+
+    monkeypatch.setattr(data_engine, "_frame_cache", BarCloseCache())
+    monkeypatch.setattr(data_engine, "fetch_with_retry", fetch_with_retry)
+    monkeypatch.setattr(data_engine, "fetch_forming_bar", lambda symbol, tf: forming["bar"])
+    monkeypatch.setattr(data_engine, "server_time_offset", lambda symbol: 0)
+    monkeypatch.setattr(data_engine, "frame_expiry", lambda symbol, label, offset: time.time() + hour)
+
+    first = data_engine.fetch_multi_timeframe("EURUSD", cached=True)["1H"]
+    assert len(fetches) == len(data_engine.TIMEFRAMES)
+
+    # the forming bar ticked: fresh price, closed history reused
+    forming["bar"] = _rates(opens[-1:], np.array([1.25]))
+    second = data_engine.fetch_multi_timeframe("EURUSD", cached=True)["1H"]
+    assert len(fetches) == len(data_engine.TIMEFRAMES)
+    assert second["price"]["close"] == 1.25 != first["price"]["close"]
+    pd.testing.assert_frame_equal(second["df"].iloc[:-1], first["df"].iloc[:-1])
+    assert second["quality"] == first["quality"]
+
+    # a new bar opened before the expiry: the history is refetched
+    forming["bar"] = _rates(opens[-1:] + hour, np.array([1.3]))
+    data_engine.fetch_multi_timeframe("EURUSD", cached=True)
+    assert len(fetches) == 2 * len(data_engine.TIMEFRAMES)
+
+
+def test_server_offset_is_kept_while_the_market_is_closed(monkeypatch):
+    # Saturday; the week closed Friday 17:00 New York = 21:00 UTC (EDT)
+    now = datetime(2024, 6, 8, 12, tzinfo=timezone.utc)
+
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now.astimezone(tz)
+
+    last_bar = int(datetime(2024, 6, 7, 23, 59, tzinfo=timezone.utc).timestamp())  # UTC+3 server
+    monkeypatch.setattr(data_engine, "datetime", FrozenDatetime)
+    monkeypatch.setattr(data_engine.mt5, "TIMEFRAME_M1", 1, raising=False)
+    monkeypatch.setattr(data_engine.mt5, "copy_rates_from_pos", lambda *args: np.array([(last_bar,)], dtype=[("time", "i8")]))
+    monkeypatch.setattr(data_engine, "measure_server_offset", lambda symbol: None)
+    monkeypatch.setattr(data_engine, "_last_offset", None)
+
+    assert data_engine.estimate_server_offset() == 3 * 3600
+    assert data_engine.server_time_offset() == 3 * 3600
+
+    # a measured offset wins, and is kept once the ticks go stale
+    monkeypatch.setattr(data_engine, "measure_server_offset", lambda symbol: 2 * 3600)
+    assert data_engine.server_time_offset() == 2 * 3600
+    monkeypatch.setattr(data_engine, "measure_server_offset", lambda symbol: None)
+    assert data_engine.server_time_offset() == 2 * 3600
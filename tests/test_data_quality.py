@@ -0,0 +1,22 @@
+from src.data_quality import validate_frame
+
+
+def test_news_bar_is_reported_but_not_blocking(ohlcv):
+    df = ohlcv(500)
+    bar = df.index[400]
+    move = (df["high"] - df["low"]).mean() * 20  # NFP-sized 30m bar
+    df.loc[bar, "high"] += move
+
+    report = validate_frame(df, 1800)
+    assert report["spikes"] == 1
+    assert report["first_spike"] == bar
+    assert report["clean"]
+
+
+def test_duplicate_bars_still_block(ohlcv):
+    df = ohlcv(500)
+    df = df.iloc[[*range(300), 299, *range(300, 500)]]
+
+    report = validate_frame(df, 1800)
+    assert report["duplicates"] == 1
+    assert not report["clean"]
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from src.analysis.entry.break_retest import BreakRetest, detect_break_retest
+from src.analysis.entry.entry_candle import SIGNAL_CODES
+from src.analysis.entry.entry_engine import (
+    DECISION_CODES, REASON_CODES, EntryDecision, analyze_entries, analyze_entry, trend_direction
+)
+from src.analysis.entry.entry_score import GRADE_CODES
+from src.analysis.entry.volume_filter import VOLUME_CODES
+from src.analysis.trend import TrendBias
+
+
+@pytest.mark.parametrize("bias", [TrendBias.BULLISH, TrendBias.BEARISH])
+def test_batch_entries_match_scalar_per_bar(ohlcv, bias):
+    df = ohlcv(250, seed=3)
+    rng = np.random.default_rng(0)
+    n = len(df)
+    trend = np.where(rng.random(n) < 0.1, TrendBias.RANGE, bias)
+    ema_weak = rng.random(n) < 0.1
+    in_aoi = rng.random(n) < 0.85
+    ema_score = rng.choice([20, 40, 60], n)
+
+    first = 21  # a full 20-bar volume window and a previous bar
+    retest_invalid = np.zeros(n, dtype=bool)
+    for i in range(first, n):
+        retest_invalid[i] = detect_break_retest(df.iloc[:i + 1], bias) == BreakRetest.INVALID
+
+    batch = analyze_entries(
+        df["open"].to_numpy(), df["high"].to_numpy(), df["low"].to_numpy(),
+        df["close"].to_numpy(), df["volume"].to_numpy(),
+        trend=np.array([trend_direction(t) for t in trend]),
+        ema_weak=ema_weak, in_aoi=in_aoi, ema_score=ema_score,
+        retest_invalid=retest_invalid,
+    )
+
+    seen = set()
+    for i in range(first, n):
+        scalar = analyze_entry(df.iloc[:i + 1], {
+            "trend_bias": trend[i],
+            "structure_bias": bias,
+            "ema_confidence": "weak" if ema_weak[i] else "strong",
+            "in_aoi": bool(in_aoi[i]),
+            "ema_score": int(ema_score[i]),
+        })
+        decision = scalar["decision"]
+        assert DECISION_CODES[batch["decision"][i]] == decision, i
+        seen.add(decision)
+        if decision == EntryDecision.TRADE:
+            assert REASON_CODES[batch["reason"][i]] == ""
+            assert SIGNAL_CODES[batch["signal"][i]].value == scalar["entry_type"]
+            assert GRADE_CODES[batch["grade"][i]].value == scalar["grade"]
+            assert VOLUME_CODES[batch["volume"][i]].value == scalar["volume"]
+        else:
+            assert REASON_CODES[batch["reason"][i]] == scalar["reason"], i
+
+    assert seen == set(EntryDecision)
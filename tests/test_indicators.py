@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import logic_engine
+from src.analysis import indicators
+
+needs_talib = pytest.mark.skipif(indicators.talib is None, reason="TA-Lib not installed")
+
+TALIB_WARMUP = 400  # TA-Lib seeds EMA / Wilder ATR with an SMA: skip until it decays
+
+
+def _all_indicators(df, backend):
+    h, l, c, v = df["high"], df["low"], df["close"], df["volume"].astype(float)
+    return {
+        "ema": indicators.ema(c, 50, backend=backend),
+        "atr_sma": indicators.atr(h, l, c, 14, backend=backend),
+        "atr_wilder": indicators.atr(h, l, c, 14, "wilder", backend=backend),
+        "rolling_mean": indicators.rolling_mean(v, 20, backend=backend),
+    }
+
+
+@pytest.mark.parametrize("n_bars", [1_000, 20_000])
+def test_backends_match_pandas(ohlcv, n_bars):
+    df = ohlcv(n_bars)
+    reference = _all_indicators(df, "pandas")
+    for name, got in _all_indicators(df, "numpy").items():
+        np.testing.assert_allclose(got, reference[name], rtol=1e-9, atol=0, err_msg=name)
+
+    if indicators.talib is None:
+        return
+    skip = {"ema": TALIB_WARMUP, "atr_wilder": TALIB_WARMUP, "atr_sma": 15, "rolling_mean": 0}
+    for name, got in _all_indicators(df, "talib").items():
+        np.testing.assert_allclose(
+            got.iloc[skip[name]:], reference[name].iloc[skip[name]:], rtol=1e-9, atol=0, err_msg=name
+        )
+
+
+def _with_gaps(ohlcv):
+    df = ohlcv(600).astype(float)
+    df.iloc[[0, 1]] = np.nan          # leading gap
+    df.iloc[[100, 101, 350]] = np.nan  # gaps inside the series
+    return df
+
+
+def test_numpy_backend_skips_nan_like_pandas(ohlcv):
+    df = _with_gaps(ohlcv)
+    h, l, c, v = df["high"], df["low"], df["close"], df["volume"]
+
+    pairs = [
+        lambda backend: indicators.ema(c, 50, backend=backend),
+        lambda backend: indicators.atr(h, l, c, 14, backend=backend),
+        lambda backend: indicators.atr(h, l, c, 14, "wilder", backend=backend),
+        lambda backend: indicators.rolling_mean(v, 20, backend=backend),
+    ]
+    for compute in pairs:
+        expected = compute("pandas")
+        got = compute("numpy")
+        np.testing.assert_allclose(got, expected, rtol=1e-9)
+        # recovers after the gaps instead of staying NaN
+        assert np.isfinite(got.iloc[-1])
+
+    # ema is bit-identical, NaN bars repeat the previous mean
+    np.testing.assert_array_equal(indicators.ema(c, 50, backend="numpy"), indicators.ema(c, 50, backend="pandas"))
+
+
+def test_numpy_ema_nan_example():
+    close = pd.Series([30.0, np.nan, 39.0, np.nan, np.nan, 40.0])
+    expected = close.ewm(span=3, adjust=False).mean()
+    np.testing.assert_array_equal(indicators.ema(close, 3, backend="numpy"), expected)
+
+
+def test_numpy_rolling_mean_only_drops_windows_with_nan():
+    values = pd.Series([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0])
+    got = indicators.rolling_mean(values, 2, backend="numpy")
+    np.testing.assert_allclose(got, values.rolling(2).mean())
+    assert got.tolist()[-3:] == [4.5, 5.5, 6.5]
+
+
+@pytest.mark.parametrize("backend", [b for b in indicators.BACKENDS if b != "talib" or indicators.talib])
+def test_empty_input(backend):
+    empty = pd.Series([], dtype=float)
+    assert indicators.ema(empty, 50, backend=backend).empty
+    assert indicators.atr(empty, empty, empty, 14, backend=backend).empty
+    assert indicators.atr(empty, empty, empty, 14, "wilder", backend=backend).empty
+    assert indicators.rolling_mean(empty, 20, backend=backend).empty
+    assert len(indicators.true_range(np.array([]), np.array([]), np.array([]))) == 0
+
+
+@needs_talib
+def test_talib_rejects_nan_inside_the_series(ohlcv):
+    df = _with_gaps(ohlcv)
+    with pytest.raises(ValueError, match="talib"):
+        indicators.ema(df["close"], 50, backend="talib")
+    with pytest.raises(ValueError, match="talib"):
+        indicators.atr(df["high"], df["low"], df["close"], 14, backend="talib")
+    with pytest.raises(ValueError, match="talib"):
+        indicators.rolling_mean(df["volume"], 20, backend="talib")
+
+    # a leading gap is fine: TA-Lib starts after it
+    lead = df["close"].iloc[:100]
+    assert np.isfinite(indicators.ema(lead, 20, backend="talib").iloc[-1])
+
+
+@needs_talib
+def test_logic_engine_ema_stays_on_talib(ohlcv):
+    df = ohlcv(300)
+    out = logic_engine.calculate_ema(df.copy(), 20)
+    np.testing.assert_array_equal(
+        out["EMA_20"], indicators.talib.EMA(df["close"].to_numpy(dtype=float), timeperiod=20)
+    )
+    assert out["EMA_20"].iloc[:19].isna().all()
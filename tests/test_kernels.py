@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src import optimizer
+from src.analysis import aoi, kernels
+from src.synthetic import kernel_inputs
+
+
+@pytest.mark.skipif(kernels.BACKEND != "numba", reason="Numba not installed")
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("name", sorted(kernels.PY_KERNELS))
+def test_compiled_kernels_match_python(ohlcv, name, seed):
+    args = kernel_inputs(ohlcv(5_000, seed), seed)[name]
+    fast = kernels.KERNELS[name](*args)
+    slow = kernels.PY_KERNELS[name](*args)
+    fast = fast if isinstance(fast, tuple) else (fast,)
+    slow = slow if isinstance(slow, tuple) else (slow,)
+    for a, b in zip(fast, slow):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_htf_zones_are_annotated(ohlcv):
+    df = ohlcv(3_000)
+    zones = aoi.detect_htf_aoi(df, "4H")
+    assert zones
+    assert any(zone["touches"] for zone in zones)
+    for zone in zones:
+        assert len(zone["reactions"]) == zone["touches"]
+        broken = zone["broken_at"]
+        assert broken is None or zone["origin_index"] + 2 <= broken < len(df)
+
+    bare = aoi.detect_htf_aoi(df, "4H", annotate=False)
+    assert all(zone["touches"] == 0 and "broken_at" not in zone for zone in bare)
+
+
+def test_resolve_trades_first_hit_wins():
+    high = np.array([1.0, 1.2, 1.5, 1.1, 1.0, 1.6])
+    low = np.array([0.9, 1.0, 1.1, 0.7, 0.9, 1.0])
+    entry = np.array([0, 0, 2, 4], dtype=np.int64)
+    direction = np.array([1, -1, 1, 1], dtype=np.int64)
+    stop = np.array([0.8, 1.45, 1.0, 0.5])
+    target = np.array([1.4, 0.6, 1.5, 2.0])
+
+    for resolve in (kernels.resolve_trades, kernels.PY_KERNELS["resolve_trades"]):
+        outcome, exit_at = resolve(high, low, entry, direction, stop, target, 3)
+        # long hits 1.4 at bar 2; short stopped at bar 2 (1.5 >= 1.45);
+        # a bar touching both (bar 3) is a stop; the last runs out of bars
+        np.testing.assert_array_equal(
+            outcome, [kernels.OUTCOME_TARGET, kernels.OUTCOME_STOP, kernels.OUTCOME_STOP, kernels.OUTCOME_OPEN]
+        )
+        np.testing.assert_array_equal(exit_at, [2, 2, 3, -1])
+
+
+def test_sweep_resolves_bracket_exits(ohlcv):
+    df = ohlcv(1_000, seed=4)
+    table = optimizer.sweep_frame("EURUSD", "4H", df, optimizer.build_grid(), step=5, stop_atr=1.0, reward=2.0)
+    atr = optimizer.ema.calculate_atr(df).to_numpy()
+    high, low, close = (df[c].to_numpy() for c in ("high", "low", "close"))
+
+    ends = optimizer.window_ends(len(df), 300, 5, 10)
+    for w, end in enumerate(ends):
+        row = table[table["window"] == w].iloc[0]
+        side, entry = int(row["direction"]), end - 1
+        if side == 0:
+            assert row["outcome"] == 0 and row["exit_atr"] == 0
+            continue
+        stop = close[entry] - side * atr[entry]
+        target = close[entry] + side * 2 * atr[entry]
+        expected, result = kernels.OUTCOME_OPEN, side * (close[entry + 10] - close[entry]) / atr[entry]
+        for i in range(entry + 1, entry + 11):
+            if (low[i] <= stop) if side > 0 else (high[i] >= stop):
+                expected, result = kernels.OUTCOME_STOP, -1.0
+                break
+            if (high[i] >= target) if side > 0 else (low[i] <= target):
+                expected, result = kernels.OUTCOME_TARGET, 2.0
+                break
+        assert row["outcome"] == expected, w
+        assert row["exit_atr"] == pytest.approx(result, rel=1e-6), w
+
+    assert set(table["outcome"]) >= {kernels.OUTCOME_TARGET, kernels.OUTCOME_STOP}
+    exits = optimizer.signed_returns(table, min_score=0, exits=True)
+    take = optimizer.traded(table, min_score=0)
+    assert (exits[take] == table["exit_atr"][take]).all()
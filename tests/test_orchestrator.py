@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("MetaTrader5")  # data_engine needs the MT5 package
+
+import numpy as np  # noqa: E402
+
+from src import data_engine, orchestrator  # noqa: E402
+from src.bar_schedule import BarCloseCache  # noqa: E402
+from src.orchestrator import ScanOrchestrator  # noqa: E402
+
+
+def test_slow_ai_opinion_does_not_delay_other_symbols(ai_stub, ohlcv, monkeypatch):
+    frames = {"4H": ohlcv(600, 1), "1H": ohlcv(600, 2)}
+
+    def fake_fetch(symbol, *args, **kwargs):
+        return {label: {"df": df, "valid": True} for label, df in frames.items()}
+
+    monkeypatch.setattr(orchestrator, "fetch_multi_timeframe", fake_fetch)
+    monkeypatch.setattr(orchestrator, "resolve_symbols", lambda symbols: {})
+
+    slow = ai_stub.slow_marker
+
+    async def scenario():
+        events = []
+        async with ScanOrchestrator(
+            api_key="test", base_url=ai_stub.url, analysis_workers=1,
+            rate_per_second=100, burst=100
+        ) as orch:
+            async for event in orch.scan([slow, "EURUSD"]):
+                events.append((event.kind, event.symbol))
+        return events
+
+    events = asyncio.run(scenario())
+    assert ("error", slow) not in events
+    # Both analyses and the fast opinion arrive before the slow opinion
+    assert events[-1] == ("ai", slow)
+    assert events.index(("ai", "EURUSD")) < events.index(("ai", slow))
+    assert events.index(("analysis", slow)) < events.index(("ai", slow))
+
+
+def test_watchlist_state_follows_the_last_fetch(ohlcv, monkeypatch):
+    frames = {"4H": ohlcv(600, 1), "1H": ohlcv(600, 2)}
+
+    def fake_fetch(symbol, *args, **kwargs):
+        if symbol == "NOPE":
+            raise ValueError("Symbol NOPE not tradable")
+        return {label: {"df": df, "valid": True} for label, df in frames.items()}
+
+    monkeypatch.setattr(orchestrator, "fetch_multi_timeframe", fake_fetch)
+    monkeypatch.setattr(orchestrator, "resolve_symbols", lambda symbols: {})
+
+    async def scenario():
+        async with ScanOrchestrator(
+            ai_enabled=False, analysis_workers=1, watchlist_state=True, api_key="test"
+        ) as orch:
+            return [event async for event in orch.scan(["EURUSD", "NOPE", "GBPUSD"])]
+
+    events = asyncio.run(scenario())
+    watchlist = [event for event in events if event.kind == "watchlist"]
+    assert len(watchlist) == 1
+    states = watchlist[0].payload
+    assert list(states) == ["4H", "1H"]
+    assert list(states["4H"].index) == ["EURUSD", "GBPUSD"]
+    assert ("error", "NOPE") in [(event.kind, event.symbol) for event in events]
+
+
+def test_rescan_before_the_next_close_reuses_closed_bars(monkeypatch):
+    now = 1_700_006_400  # a Wednesday 00:00 UTC, aligned to every timeframe
+    seconds = {tf: data_engine.TIMEFRAME_SECONDS[label] for label, tf in data_engine.TIMEFRAMES.items()}
+
+    def rates(tf, count):
+        opens = now // seconds[tf] * seconds[tf] - seconds[tf] * np.arange(count)[::-1]
+        close = 1.1 + 0.001 * np.sin(np.arange(count) / 7)
+        out = np.zeros(count, dtype=[
+            ("time", "i8"), ("open", "f8"), ("high", "f8"), ("low", "f8"),
+            ("close", "f8"), ("tick_volume", "i8"), ("spread", "i4"), ("real_volume", "i8"),
+        ])
+        out["time"], out["open"], out["close"] = opens, close, close
+        out["high"], out["low"], out["tick_volume"] = close + 0.0005, close - 0.0005, 100
+        return out
+
+    range_calls = []
+
+    def copy_rates_range(symbol, tf, from_date, to_date):
+        range_calls.append((symbol, tf))
+        return rates(tf, 600)
+
+    monkeypatch.setattr(data_engine.mt5, "copy_rates_range", copy_rates_range, raising=False)
+    monkeypatch.setattr(data_engine.mt5, "copy_rates_from_pos", lambda symbol, tf, pos, count: rates(tf, 1), raising=False)
+    monkeypatch.setattr(data_engine, "server_time_offset", lambda symbol="EURUSD": 0)
+    monkeypatch.setattr(data_engine, "frame_expiry", lambda symbol, label, offset=None: time.time() + 3600)
+    monkeypatch.setattr(data_engine, "_frame_cache", BarCloseCache())
+    monkeypatch.setattr(data_engine, "_selected", {"EURUSD"})
+    monkeypatch.setattr(orchestrator, "resolve_symbols", lambda symbols: {})
+
+    async def scenario():
+        async with ScanOrchestrator(ai_enabled=False, analysis_workers=1, api_key="test") as orch:
+            first = [event async for event in orch.scan(["EURUSD"])]
+            calls = len(range_calls)
+            second = [event async for event in orch.scan(["EURUSD"])]
+            return first, calls, second
+
+    first, calls, second = asyncio.run(scenario())
+    assert calls == len(data_engine.TIMEFRAMES)
+    assert len(range_calls) == calls  # second scan: forming bars only
+    assert [event.kind for event in first] == [event.kind for event in second]
+    assert "error" not in [event.kind for event in second]
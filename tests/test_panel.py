@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from src.analysis import ema, structure
+from src.analysis.entry.entry_candle import entry_candle_signals
+from src.analysis.panel import (
+    OHLCVPanel, latest_ema_state, panel_atr, panel_ema, panel_entry_signals,
+    panel_pivots, watchlist_ema_state
+)
+from src.result_store import ResultStore
+
+
+def _frames(ohlcv):
+    """Three symbols: different lengths, start dates and missing bars."""
+    eurusd = ohlcv(800, 1)
+    gbpusd = ohlcv(700, 2).iloc[50:]
+    xauusd = ohlcv(800, 3)
+    xauusd = xauusd.drop(xauusd.index[[10, 11, 12, 300, 301, 555]])  # gaps
+    return {"EURUSD": eurusd, "GBPUSD": gbpusd, "XAUUSD": xauusd}
+
+
+def test_panel_indicators_match_per_symbol(ohlcv):
+    frames = _frames(ohlcv)
+    panel = OHLCVPanel.from_frames(frames)
+    compact = panel.compact()
+
+    emas = panel_ema(compact, 50)
+    atrs = panel_atr(compact, 14)
+    is_high, is_low = panel_pivots(compact, 5)
+    direction = np.array([1, -1, 1])
+    signals = panel_entry_signals(compact, direction)
+    aligned = compact.scatter(emas)
+
+    for s, (symbol, df) in enumerate(frames.items()):
+        n = len(df)
+        np.testing.assert_array_equal(panel.to_frame(symbol).index.asi8, df.index.as_unit("ns").asi8)
+        np.testing.assert_array_equal(panel.to_frame(symbol), df.to_numpy(dtype=float))
+        np.testing.assert_array_equal(emas[s, :n], ema.calculate_ema(df, 50))
+        np.testing.assert_allclose(atrs[s, :n], ema.calculate_atr(df, 14), rtol=1e-12)
+        assert np.isnan(emas[s, n:]).all()
+
+        positions, _, highs = structure.swing_candidate_arrays(df, 5)
+        np.testing.assert_array_equal(np.flatnonzero(is_high[s, :n]), positions[highs])
+        np.testing.assert_array_equal(np.flatnonzero(is_low[s, :n]), positions[~highs])
+
+        expected = entry_candle_signals(
+            *(df[c].to_numpy(dtype=float) for c in ("open", "high", "low", "close")), direction[s]
+        )
+        np.testing.assert_array_equal(signals[s, :n], expected)
+
+        # back on the common time axis: NaN where the symbol has no bar
+        present = np.isin(panel.times, df.index.as_unit("ns").asi8)
+        np.testing.assert_array_equal(aligned[s, present], emas[s, :n])
+        assert np.isnan(aligned[s, ~present]).all()
+
+
+def test_latest_ema_state_matches_analyze_ema(ohlcv):
+    frames = _frames(ohlcv)
+    frames["SHORT"] = ohlcv(60, 4)  # below analyze_ema's minimum history
+    state = latest_ema_state(OHLCVPanel.from_frames(frames).compact())
+
+    for symbol, df in frames.items():
+        expected = ema.analyze_ema(df, "4H")
+        row = state.loc[symbol]
+        assert row["valid"] == expected["valid"]
+        if expected["valid"]:
+            assert row["slope"] == expected["slope"].value
+            assert row["position"] == expected["position"].value
+            assert row["ema"] == expected["ema_value"]
+
+
+def test_watchlist_state_is_stored_per_snapshot(ohlcv, tmp_path):
+    frames = _frames(ohlcv)
+    contexts = {
+        symbol: {
+            "4H": {"df": df, "valid": True},
+            "1H": {"df": df.iloc[-100:], "valid": symbol != "GBPUSD"},
+        }
+        for symbol, df in frames.items()
+    }
+    states = watchlist_ema_state(contexts)
+    assert list(states) == ["4H", "1H"]
+    assert list(states["1H"].index) == ["EURUSD", "XAUUSD"]
+
+    store = ResultStore(str(tmp_path / "store.sqlite"))
+    snapshot_id = store.begin_snapshot(list(frames), 60)
+    store.put_ema_state(snapshot_id, states)
+    stored = store.ema_state(snapshot_id)
+    assert len(stored) == 5
+    for label, state in states.items():
+        np.testing.assert_array_equal(stored.loc[label, "slope"], state["slope"].astype(str))
+        np.testing.assert_array_equal(stored.loc[label, "valid"], state["valid"])
+
+    store.prune(keep=0)
+    assert store.ema_state(snapshot_id).empty
+    store.close()
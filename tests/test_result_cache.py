@@ -0,0 +1,64 @@
+import pytest
+
+from src.analysis import indicators
+from src.result_cache import (
+    ENTRY_OVERHEAD, ResultCache, cache_key, cached_analysis, frame_fingerprint
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache.sqlite"), max_bytes=10_000)
+    yield cache
+    cache.close()
+
+
+def test_key_depends_on_indicator_backend(ohlcv):
+    fingerprint = frame_fingerprint(ohlcv(300))
+    default = cache_key("analysis", fingerprint, {"timeframe": "4H"})
+    try:
+        indicators.set_backend("numpy")
+        assert cache_key("analysis", fingerprint, {"timeframe": "4H"}) != default
+    finally:
+        indicators.set_backend(indicators.DEFAULT_BACKEND)
+    assert cache_key("analysis", fingerprint, {"timeframe": "4H"}) == default
+
+
+def test_small_entries_are_bounded_by_accounted_size(cache):
+    entry = 17 + 32 + ENTRY_OVERHEAD  # record + key + overhead
+    for i in range(1_000):
+        cache.put(f"{i:032x}", bytes(17))
+    assert cache.nbytes <= cache.max_bytes
+    assert len(cache) <= cache.max_bytes // entry
+    assert cache.get(f"{999:032x}") is not None
+    assert cache.get(f"{0:032x}") is None
+
+
+def test_replaced_entries_are_counted_once(cache):
+    for _ in range(5):
+        for i in range(3):
+            cache.put(f"key{i}", b"x" * 100)
+    cache.put("key0", b"x" * 10)
+    assert cache._size == cache.nbytes == 2 * (100 + 4 + ENTRY_OVERHEAD) + 10 + 4 + ENTRY_OVERHEAD
+    assert len(cache) == 3
+
+
+def test_get_refreshes_lru(cache):
+    cache.put("keep", b"x" * 1_000)
+    for i in range(30):
+        cache.put(f"filler{i}", b"y" * 1_000)
+        assert cache.get("keep") is not None
+
+
+def test_cached_analysis_survives_reopen(tmp_path, ohlcv):
+    df = ohlcv(600)
+    path = str(tmp_path / "cache.sqlite")
+
+    first = ResultCache(path)
+    result = cached_analysis(df, "4H", "EURUSD", cache=first)
+    first.close()
+
+    second = ResultCache(path)
+    assert cached_analysis(df, "4H", "EURUSD", cache=second) == result
+    assert (second.hits, second.misses) == (1, 0)
+    second.close()
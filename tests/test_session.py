@@ -0,0 +1,27 @@
+from src.analysis.entry.volume_filter import evaluate_volume, session_volume_baseline, VolumeState
+from src.analysis.session import SESSION_CODES, label_sessions, session_stats
+
+OFFSET = 3 * 3600  # broker server clock UTC+3
+
+
+def test_volume_lookup_uses_the_offset_the_stats_were_built_with(ohlcv):
+    df = ohlcv(2_000)
+    stats = session_stats(df, offset_seconds=OFFSET)
+
+    expected = label_sessions(df.index, offset_seconds=OFFSET)
+    assert (stats.label(df.index) == expected).all()
+    assert (session_volume_baseline(df.index, stats) == stats.volume[expected]).all()
+
+    # Current bar judged against the mean of ITS (server-clock) session
+    last = df.iloc[-1:]
+    session_mean = stats.get(SESSION_CODES[expected[-1]])["volume"]
+    bar = df.astype({"volume": float})
+    bar.loc[last.index, "volume"] = session_mean * 1.2
+    assert evaluate_volume(bar, session_stats=stats) == VolumeState.NORMAL
+    bar.loc[last.index, "volume"] = session_mean * 1.05
+    assert evaluate_volume(bar, session_stats=stats) == VolumeState.LOW
+
+
+def test_stats_offset_defaults_to_utc(ohlcv):
+    df = ohlcv(500)
+    assert session_stats(df).offset_seconds == 0